@@ -2,9 +2,20 @@
 Main application entry point for Layered Monolith (MVC) architecture.
 """
 from flask import Flask
+from sqlalchemy.schema import CreateIndex
 from config import Config
 from models import db
+from database.engine import configure_engine
+from database.routing import init_read_replica
+from database.querycount import install_slow_query_log
+from database.snapshot import init_task_snapshot
+from database.invalidation import install_cache_invalidation
 from routes import register_routes
+from metrics import init_metrics
+from profiling import init_profiling
+from http_cache import init_compression
+from assets import init_assets
+from cache import init_cache
 
 def create_app(config_class=Config):
     """Application factory pattern."""
@@ -13,17 +24,51 @@ def create_app(config_class=Config):
     
     # Initialize database
     db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config['DB_PROFILE'])
+    init_read_replica(app)
+    with app.app_context():
+        install_slow_query_log(db.engine, app.config['SLOW_QUERY_THRESHOLD_MS'], app.logger)
+    if 'read_replica' in app.extensions:
+        install_slow_query_log(app.extensions['read_replica']['engine'],
+                               app.config['SLOW_QUERY_THRESHOLD_MS'], app.logger)
+    init_task_snapshot(app)
+    init_cache(app, namespace='monolith')
+    install_cache_invalidation(db.session)
     
     # Register routes
     register_routes(app)
-    
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    init_metrics(app, service='monolith')
+    init_profiling(app)
+    init_compression(app)
+    init_assets(app)
+    register_commands(app)
     
     return app
 
+def register_commands(app):
+    """CLI commands, e.g. flask --app app init-db."""
+    
+    @app.cli.command('init-db')
+    def init_db():
+        """Create missing tables and indexes. Schema creation is a deploy step rather than
+        part of create_app, so workers and tests start without DDL round trips."""
+        db.create_all()
+        # create_all skips existing tables; add indexes defined since
+        with db.engine.begin() as connection:
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+        print('Initialized the database.')
+
+def shutdown_app(app):
+    """Release pooled database connections before the process exits."""
+    with app.app_context():
+        db.engine.dispose()
+
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    with app.app_context():
+        db.create_all()
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
 
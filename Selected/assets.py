@@ -0,0 +1,275 @@
+"""
+Static asset fingerprinting with long-lived caching.
+
+The monolith and the frontend service keep an identical copy of this module.
+
+init_assets(app) serves an in-memory manifest of the CSS and JavaScript files
+under the static folder, built once per process on first use: each file is
+minified, named after a hash of its minified content (css/style.css ->
+css/style.1a2b3c4d5e6f.css) and pre-compressed once with gzip (and brotli when
+installed). Templates keep
+calling url_for('static', filename='css/style.css'); the URL is rewritten to
+the fingerprinted name, which is served with
+
+    Cache-Control: public, max-age=31536000, immutable
+
+so browsers never revalidate it, and any change to a file gives it a new name
+that the next page load picks up. Unfingerprinted names are still served by
+Flask's static view with its usual revalidation.
+
+In debug mode a file is rebuilt when its modification time changes.
+ASSET_FINGERPRINTING=false turns the rewriting off.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from flask import Response, request
+from http_cache import brotli, choose_encoding, compress
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+_CSS_TOKENS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|[^"\'/]+|/', re.S)
+
+def _squeeze_css(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r' ?([{};,>]) ?', r'\1', text)
+    return re.sub(r': ', ':', text)
+
+def minify_css(source):
+    """Drop comments and collapse whitespace outside strings."""
+    out, pending = [], []
+    for token in _CSS_TOKENS.findall(source):
+        if token[0] in '"\'':
+            out.append(_squeeze_css(''.join(pending)))
+            out.append(token)
+            pending = []
+        else:
+            pending.append(' ' if token.startswith('/*') else token)
+    out.append(_squeeze_css(''.join(pending)))
+    return ''.join(out).replace(';}', '}').strip()
+
+def _string_end(source, i):
+    """Index just past the string or template literal starting at source[i]."""
+    quote = source[i]
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if quote == '`' and source.startswith('${', i):
+            i = _expression_end(source, i + 2)
+            continue
+        if char == '\n' and quote != '`':
+            raise ValueError(f'unterminated string at offset {i}')
+        i += 1
+    raise ValueError('unterminated string at end of file')
+
+def _expression_end(source, i):
+    """Index just past the } closing a template literal's ${ expression."""
+    depth = 1
+    while i < len(source):
+        char = source[i]
+        if char in '\'"`':
+            i = _string_end(source, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError('unterminated template expression')
+
+def _regex_end(source, i):
+    """Index just past the regular expression literal starting at source[i]."""
+    in_class = False
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            raise ValueError(f'unterminated regular expression at offset {i}')
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            return i + 1
+        i += 1
+    raise ValueError('unterminated regular expression')
+
+def _is_word(char):
+    return char.isalnum() or char in '_$'
+
+REGEX_KEYWORDS = frozenset(['return', 'typeof', 'case', 'in', 'of', 'void', 'delete'])
+
+def _regex_allowed(out):
+    """Whether a / after the output so far starts a regex rather than dividing."""
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if not end:
+        return True
+    if out[end - 1][-1] in '(,=:[!&|?{};+-*%<>~^':
+        return True
+    # Code outside strings and regexes is emitted a character at a time
+    start = end
+    while start and len(out[start - 1]) == 1 and _is_word(out[start - 1]):
+        start -= 1
+    if start and out[start - 1].endswith('.'):
+        return False
+    return ''.join(out[start:end]) in REGEX_KEYWORDS
+
+def minify_js(source):
+    """Drop comments and indentation and collapse whitespace, leaving strings,
+    template literals and regular expressions untouched. Newlines are kept
+    wherever automatic semicolon insertion could depend on them."""
+    out, space = [], None
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char.isspace() or source.startswith('//', i) or source.startswith('/*', i):
+            if source.startswith('//', i):
+                end = source.find('\n', i)
+                end = len(source) if end == -1 else end
+            elif source.startswith('/*', i):
+                end = source.find('*/', i + 2)
+                if end == -1:
+                    raise ValueError(f'unterminated comment at offset {i}')
+                end += 2
+            else:
+                end = i + 1
+            newline = '\n' in source[i:end] or space == '\n'
+            space = '\n' if newline else ' '
+            i = end
+            continue
+        if char in '\'"`':
+            end = _string_end(source, i)
+        elif char == '/' and _regex_allowed(out):
+            end = _regex_end(source, i)
+        else:
+            end = i + 1
+        if space and out:
+            previous = out[-1][-1]
+            if space == '\n' and previous not in '{;,([' and char not in '});],.':
+                out.append('\n')
+            elif _is_word(previous) and _is_word(char) or previous + char in ('++', '--', '+-', '-+', '//'):
+                out.append(' ')
+        space = None
+        out.append(source[i:end])
+        i = end
+    return ''.join(out)
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+class Asset:
+    """One fingerprinted file: its minified bytes and their compressed forms."""
+    
+    def __init__(self, filename, path):
+        self.filename = filename
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        stem, extension = os.path.splitext(filename)
+        try:
+            source = MINIFIERS[extension](source)
+        except ValueError as e:
+            print(f"Serving {filename} unminified: {e}")
+        self.data = source.encode('utf-8')
+        digest = hashlib.sha256(self.data).hexdigest()
+        self.hashed_name = f'{stem}.{digest[:12]}{extension}'
+        self.etag = digest[:32]
+        self.mimetype = mimetypes.guess_type(filename)[0]
+        self.encoded = {'gzip': compress(self.data, 'gzip')}
+        if brotli is not None:
+            self.encoded['br'] = compress(self.data, 'br')
+    
+    def is_stale(self):
+        return os.path.getmtime(self.path) != self.mtime
+
+class Manifest:
+    """Source name -> Asset for every minifiable file under a static folder."""
+    
+    def __init__(self, static_folder, reload=False):
+        self.static_folder = static_folder
+        self.reload = reload
+        self.assets = {}
+        self.by_hashed_name = {}
+        self._lock = threading.Lock()
+        for root, _, files in os.walk(static_folder):
+            for name in sorted(files):
+                if os.path.splitext(name)[1] in MINIFIERS:
+                    path = os.path.join(root, name)
+                    self._add(os.path.relpath(path, static_folder).replace(os.sep, '/'), path)
+    
+    def _add(self, filename, path):
+        previous = self.assets.get(filename)
+        asset = Asset(filename, path)
+        self.assets[filename] = asset
+        self.by_hashed_name[asset.hashed_name] = asset
+        if previous is not None and previous.hashed_name != asset.hashed_name:
+            self.by_hashed_name.pop(previous.hashed_name, None)
+        return asset
+    
+    def get(self, filename):
+        """The Asset for a source name, rebuilt first if reloading and stale."""
+        asset = self.assets.get(filename)
+        if asset is not None and self.reload and asset.is_stale():
+            with self._lock:
+                asset = self._add(filename, asset.path)
+        return asset
+    
+    def to_dict(self):
+        return {filename: asset.hashed_name for filename, asset in sorted(self.assets.items())}
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+def get_manifest(app):
+    """The manifest for app's static folder, built on first use and shared by
+    every app instance in the process (tests create one per test)."""
+    key = (app.static_folder, app.debug)
+    manifest = _manifests.get(key)
+    if manifest is None:
+        with _manifests_lock:
+            manifest = _manifests.get(key)
+            if manifest is None:
+                manifest = _manifests[key] = Manifest(app.static_folder, reload=app.debug)
+    return manifest
+
+def init_assets(app):
+    """Rewrite url_for('static') to fingerprinted names and serve them immutable."""
+    if os.environ.get('ASSET_FINGERPRINTING', 'true').lower() not in ('1', 'true'):
+        return
+    send_static_file = app.view_functions['static']
+    
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static':
+            asset = get_manifest(app).get(values.get('filename'))
+            if asset is not None:
+                values['filename'] = asset.hashed_name
+    
+    def static(filename):
+        asset = get_manifest(app).by_hashed_name.get(filename)
+        if asset is None:
+            return send_static_file(filename=filename)
+        coding = choose_encoding(request.accept_encodings)
+        response = Response(asset.encoded.get(coding, asset.data), mimetype=asset.mimetype)
+        if coding in asset.encoded:
+            response.headers['Content-Encoding'] = coding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f'{asset.etag}-{coding}' if coding in asset.encoded else asset.etag)
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response.make_conditional(request)
+    
+    app.view_functions['static'] = static
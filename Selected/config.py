@@ -2,10 +2,51 @@
 Configuration settings for the application.
 """
 import os
+from database.engine import engine_options, normalize_database_uri
 
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///task_manager.db'
+    SQLALCHEMY_DATABASE_URI = normalize_database_uri(os.environ.get('DATABASE_URL') or 'sqlite:///task_manager.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional replica or read-only URI for read-heavy queries, e.g.
+    # sqlite:///file:/data/task_manager.db?mode=ro&uri=true
+    SQLALCHEMY_READ_DATABASE_URI = os.environ.get('READ_DATABASE_URL')
+    DEBUG = os.environ.get('FLASK_DEBUG', 'true').lower() in ('1', 'true')
+    # Database performance profile: 'dev' (stock settings) or 'throughput'
+    # (WAL, relaxed fsync, larger caches and a pool sized for worker threads)
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'dev')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    # Log SQL statements slower than this many milliseconds (0 disables)
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '250'))
+    # Serve dashboard stats, deadlines and the calendar from an in-memory,
+    # column-oriented task snapshot instead of loading Task objects
+    TASK_SNAPSHOT = os.environ.get('TASK_SNAPSHOT', 'false').lower() in ('1', 'true')
+    # Cache for the task list, stats, deadlines and users (see cache.py):
+    # memory://, mmap:// (shared by the workers on a host), redis://host:6379/0
+    # or none://; entries live at most CACHE_TTL seconds
+    CACHE_URL = os.environ.get('CACHE_URL', 'memory://')
+    CACHE_TTL = float(os.environ.get('CACHE_TTL', '30'))
 
+class ProductionConfig(Config):
+    """Configuration used when serving through gunicorn/uvicorn."""
+    DEBUG = False
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'throughput')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config.SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    CACHE_URL = os.environ.get('CACHE_URL', 'mmap://')
+
+class TestConfig(Config):
+    """Configuration for the test suite. Set TEST_DATABASE_URL to run it
+    against another backend, e.g. postgresql://localhost/task_manager_test."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = normalize_database_uri(os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:')
+    SQLALCHEMY_READ_DATABASE_URI = None
+    DB_PROFILE = 'dev'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    CACHE_URL = 'memory://'
+
+config_by_name = {
+    'development': Config,
+    'production': ProductionConfig,
+    'testing': TestConfig,
+}
@@ -0,0 +1,38 @@
+"""
+Cache invalidation for the repository layer.
+Cached results name the tables they were read from (cache.key(...,
+depends_on=('tasks', 'users'))). Flushes and Core INSERT/UPDATE/DELETE
+statements run through the session record the tables they write, and when the
+transaction commits the cache generation of each is replaced, so no worker
+reads a result computed before the write. A rollback forgets them.
+"""
+from itertools import chain
+from sqlalchemy import event
+from cache import get_cache
+
+def install_cache_invalidation(session):
+    """Invalidate the tables each committed transaction of session wrote."""
+    if event.contains(session, 'after_commit', _invalidate_written):
+        return
+    event.listen(session, 'after_flush', _record_flush)
+    event.listen(session, 'do_orm_execute', _record_statement)
+    event.listen(session, 'after_commit', _invalidate_written)
+    event.listen(session, 'after_rollback', _forget_written)
+
+def _written(session):
+    return session.info.setdefault('written_tables', set())
+
+def _record_flush(session, flush_context):
+    _written(session).update(obj.__table__.name for obj in chain(session.new, session.dirty, session.deleted))
+
+def _record_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _written(orm_execute_state.session).add(orm_execute_state.statement.table.name)
+
+def _invalidate_written(session):
+    tables = session.info.pop('written_tables', None)
+    if tables:
+        get_cache().invalidate(*sorted(tables))
+
+def _forget_written(session):
+    session.info.pop('written_tables', None)
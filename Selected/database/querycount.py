@@ -0,0 +1,85 @@
+"""
+SQL query accounting.
+count_queries() and the query_budget decorator record the statements run while
+a block executes, so tests can pin each endpoint to a query budget and catch
+N+1 regressions. install_slow_query_log() reports statements slower than a
+threshold together with the route that issued them.
+"""
+import functools
+import time
+from contextlib import contextmanager
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more SQL statements than its budget allows."""
+
+class QueryCounter:
+    """Statements executed by any engine while the counter is active."""
+    
+    def __init__(self):
+        self.statements = []
+    
+    @property
+    def count(self):
+        return len(self.statements)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+    
+    def report(self):
+        return '\n'.join(f'{i}. {statement}' for i, (statement, _) in enumerate(self.statements, 1))
+
+@contextmanager
+def count_queries():
+    """Yield a QueryCounter that records every statement run inside the block."""
+    counter = QueryCounter()
+    event.listen(Engine, 'after_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, 'after_cursor_execute', counter._record)
+
+@contextmanager
+def assert_max_queries(limit):
+    """Raise QueryBudgetExceeded if the block runs more than limit statements."""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise QueryBudgetExceeded(
+            f'Expected at most {limit} queries, got {counter.count}:\n{counter.report()}')
+
+def query_budget(limit):
+    """Decorator form of assert_max_queries for tests or view functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with assert_max_queries(limit):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _current_route():
+    if not has_request_context():
+        return None
+    return request.url_rule.rule if request.url_rule is not None else request.path
+
+def install_slow_query_log(engine, threshold_ms, logger):
+    """Log statements on engine that take at least threshold_ms milliseconds."""
+    if not threshold_ms:
+        return
+    
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def log_if_slow(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if elapsed_ms >= threshold_ms:
+            logger.warning('Slow query (%.1f ms) on route %s: %s; parameters=%s',
+                           elapsed_ms, _current_route(), statement, repr(parameters)[:500])
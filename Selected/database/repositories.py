@@ -2,10 +2,48 @@
 Database repositories - Data access layer.
 This layer abstracts database operations from the business logic.
 """
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import Conflict, NotFound
 from models import db, Task, User, ActivityLog
-from typing import List, Optional
+from database.engine import STREAM_BATCH_SIZE
+from database.routing import read_session, mark_written
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+class VersionConflict(Conflict):
+    """The task was changed by someone else since the caller read it."""
+    description = 'The task was modified by another request. Reload it and try again.'
+
+# Columns behind activity API fields that are not plain columns
+ACTIVITY_FIELD_COLUMNS = {'description': ('description', 'details')}
+
+def _starts_with(expression, prefix):
+    """Whether expression starts with prefix, written as a range so an index on
+    the expression serves it. The LIKE keeps the match exact under collations
+    that sort other strings into the range."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return and_(expression >= prefix, expression < upper, expression.like(pattern, escape='\\'))
+
+def _starts_with_ignoring_case(column, prefix):
+    """Prefix match on lower(column), or on the column as typed: SQLite's
+    lower() only folds ASCII, so 'É' must still find 'Éric' there."""
+    return or_(_starts_with(func.lower(column), prefix.lower()), _starts_with(column, prefix))
+
+def _task_options(fields=None, include=()):
+    """Loader options for the requested task fields (see Task.to_dict).
+    With fields, only their columns are selected, plus the version and
+    updated_at (for ETags and Last-Modified), and the assignee is joined only when a field or include needs it."""
+    if fields is None:
+        return [joinedload(Task.assignee)]
+    columns = [getattr(Task, field) for field in fields if field in Task.__table__.c]
+    options = [load_only(Task.id, Task.version, Task.updated_at, *columns)]
+    if 'assigned_to_username' in fields or 'assignee' in include:
+        options.append(joinedload(Task.assignee).load_only(*[getattr(User, field) for field in User.FIELDS]))
+    return options
+
 class TaskRepository:
     """Repository for Task data access operations."""
     
@@ -31,41 +69,123 @@ class TaskRepository:
         return Task.query.get(task_id)
     
     @staticmethod
-    def get_by_id_or_404(task_id: int) -> Task:
-        """Get a task by ID or raise 404."""
-        return Task.query.get_or_404(task_id)
+    def get_by_id_or_404(task_id: int, fields: List[str] = None, include=()) -> Task:
+        """Get a task by ID or raise 404, loading only what fields/include need."""
+        if fields is None and not include:
+            return Task.query.get_or_404(task_id)
+        return Task.query.options(*_task_options(fields, include)).get_or_404(task_id)
+    
+    @staticmethod
+    def get_all(fields: List[str] = None, include=()) -> List[Task]:
+        """Get all tasks, with assignees loaded in the same query.
+        fields selects only the columns those task fields need."""
+        return read_session().query(Task).options(*_task_options(fields, include)).all()
     
     @staticmethod
-    def get_all() -> List[Task]:
-        """Get all tasks."""
-        return Task.query.all()
+    def iter_all(batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Task]:
+        """Stream all tasks with their assignees, batch_size rows at a time.
+        Uses a server-side cursor on PostgreSQL so large scans stay flat in memory."""
+        statement = (
+            select(Task)
+            .options(joinedload(Task.assignee))
+            .order_by(Task.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return read_session().execute(statement).scalars()
     
     @staticmethod
     def get_by_user(user_id: int) -> List[Task]:
         """Get all tasks assigned to a user."""
         return Task.query.filter_by(assigned_to=user_id).all()
     
+    @staticmethod
+    def collection_version() -> Tuple[int, Optional[datetime]]:
+        """Row count and newest updated_at: changes whenever a task is added,
+        updated or deleted, so it validates cached task lists."""
+        return tuple(read_session().execute(select(func.count(Task.id), func.max(Task.updated_at))).one())
+    
+    @staticmethod
+    def count_by_status() -> Dict[str, int]:
+        """Number of tasks per status."""
+        rows = read_session().execute(select(Task.status, func.count(Task.id)).group_by(Task.status))
+        return {status: count for status, count in rows}
+    
     @staticmethod
     def get_upcoming_deadlines(days: int = 7) -> List[Task]:
         """Get tasks with upcoming deadlines."""
         from datetime import timedelta
         cutoff_date = datetime.utcnow() + timedelta(days=days)
-        return Task.query.filter(
+        return read_session().query(Task).filter(
             Task.due_date <= cutoff_date,
             Task.due_date >= datetime.utcnow(),
             Task.status != 'completed'
         ).all()
     
     @staticmethod
-    def update(task: Task, **kwargs) -> Task:
-        """Update task fields."""
+    def update(task: Task, expected_version: int = None, **kwargs) -> Task:
+        """Update task fields.
+        The UPDATE only applies if the row still has the version that was read
+        (or expected_version, when given); otherwise VersionConflict is raised."""
+        if expected_version is not None and task.version != expected_version:
+            raise VersionConflict()
         for key, value in kwargs.items():
             if hasattr(task, key):
                 setattr(task, key, value)
         task.updated_at = datetime.utcnow()
-        db.session.commit()
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            raise VersionConflict()
         return task
     
+    @staticmethod
+    def update_columns(task_id: int, values: Dict, expected_version: int = None) -> Tuple[Dict, int, datetime]:
+        """Set only the given columns without loading the task.
+        Returns (old values of those columns, new version, updated_at).
+        PostgreSQL does this in one UPDATE ... RETURNING that reads the old
+        values from a locked CTE. SQLite's RETURNING only sees the new row, so
+        there the old values come from a narrow SELECT and the UPDATE is a
+        compare-and-set on the version that SELECT returned."""
+        tasks = Task.__table__
+        columns = [tasks.c[key] for key in values]
+        now = datetime.utcnow()
+        new_values = dict(values, version=tasks.c.version + 1, updated_at=now)
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            old = select(tasks.c.id, *columns).where(tasks.c.id == task_id).with_for_update().cte('old')
+            statement = update(tasks).where(tasks.c.id == old.c.id)
+            if expected_version is not None:
+                statement = statement.where(tasks.c.version == expected_version)
+            statement = statement.values(new_values).returning(
+                tasks.c.version, *[old.c[key].label(f'old_{key}') for key in values])
+            row = db.session.execute(statement).first()
+            if row is None:
+                exists = db.session.execute(select(tasks.c.id).where(tasks.c.id == task_id)).first()
+                db.session.rollback()
+                raise VersionConflict() if exists else NotFound()
+            old_values = {key: row._mapping[f'old_{key}'] for key in values}
+        else:
+            current = db.session.execute(select(tasks.c.version, *columns).where(tasks.c.id == task_id)).first()
+            if current is None:
+                raise NotFound()
+            if expected_version is not None and current.version != expected_version:
+                raise VersionConflict()
+            row = db.session.execute(
+                update(tasks)
+                .where(tasks.c.id == task_id, tasks.c.version == current.version)
+                .values(new_values)
+                .returning(tasks.c.version)
+            ).first()
+            if row is None:
+                db.session.rollback()
+                raise VersionConflict()
+            old_values = {key: current._mapping[key] for key in values}
+        
+        mark_written()
+        db.session.commit()
+        return old_values, row.version, now
+    
     @staticmethod
     def delete(task_id: int) -> bool:
         """Delete a task."""
@@ -102,19 +222,43 @@ class UserRepository:
         return User.query.get_or_404(user_id)
     
     @staticmethod
-    def get_all() -> List[User]:
-        """Get all users."""
-        return User.query.all()
+    def get_all(fields: List[str] = None) -> List[User]:
+        """Get all users, selecting only the columns of fields if given."""
+        query = read_session().query(User)
+        if fields is not None:
+            query = query.options(load_only(*[getattr(User, field) for field in fields]))
+        return query.all()
+    
+    @staticmethod
+    def get_usernames(user_ids) -> Dict[int, str]:
+        """Map user IDs to usernames with a single query."""
+        rows = read_session().query(User.id, User.username).filter(User.id.in_(list(user_ids))).all()
+        return {user_id: username for user_id, username in rows}
     
     @staticmethod
     def get_by_username(username: str) -> Optional[User]:
-        """Get a user by username."""
-        return User.query.filter_by(username=username).first()
+        """Get a user by username, ignoring case (an exact-case match wins)."""
+        return (User.query.filter(func.lower(User.username) == func.lower(username))
+                .order_by((User.username == username).desc()).first())
     
     @staticmethod
     def get_by_email(email: str) -> Optional[User]:
-        """Get a user by email."""
-        return User.query.filter_by(email=email).first()
+        """Get a user by email, ignoring case (an exact-case match wins)."""
+        return (User.query.filter(func.lower(User.email) == func.lower(email))
+                .order_by((User.email == email).desc()).first())
+    
+    @staticmethod
+    def search(query: str, limit: int, fields: List[str] = None) -> List[User]:
+        """Users whose username or email starts with query, ignoring case,
+        ordered by username. An empty query lists the first users by name."""
+        statement = read_session().query(User)
+        prefix = query.strip()
+        if prefix:
+            statement = statement.filter(or_(_starts_with_ignoring_case(User.username, prefix),
+                                             _starts_with_ignoring_case(User.email, prefix)))
+        if fields is not None:
+            statement = statement.options(load_only(*[getattr(User, field) for field in fields]))
+        return statement.order_by(User.username).limit(limit).all()
     
     @staticmethod
     def update(user: User, **kwargs) -> User:
@@ -137,12 +281,14 @@ class ActivityLogRepository:
     """Repository for ActivityLog data access operations."""
     
     @staticmethod
-    def create(task_id: int, action: str, description: str = None, user_id: int = None) -> ActivityLog:
+    def create(task_id: int, action: str, description: str = None, user_id: int = None,
+               details: List[Dict] = None) -> ActivityLog:
         """Create a new activity log entry."""
         activity = ActivityLog(
             task_id=task_id,
             action=action,
             description=description,
+            details=details,
             user_id=user_id
         )
         db.session.add(activity)
@@ -155,12 +301,24 @@ class ActivityLogRepository:
         return ActivityLog.query.filter_by(task_id=task_id).order_by(ActivityLog.created_at.desc()).all()
     
     @staticmethod
-    def get_recent(limit: int = 50) -> List[ActivityLog]:
-        """Get recent activity logs."""
-        return ActivityLog.query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
+    def get_recent(limit: int = 50, fields: List[str] = None) -> List[ActivityLog]:
+        """Get recent activity logs, selecting only the columns of fields if given."""
+        query = read_session().query(ActivityLog)
+        if fields is not None:
+            columns = [column for field in fields for column in ACTIVITY_FIELD_COLUMNS.get(field, (field,))]
+            query = query.options(load_only(ActivityLog.created_at, *[getattr(ActivityLog, column) for column in columns]))
+        return query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
+    
+    @staticmethod
+    def get_recent_versions(limit: int = 50) -> List[Tuple[int, datetime]]:
+        """(id, created_at) of the entries get_recent would return. Entries never
+        change, so these identify that page for cache validation."""
+        return read_session().execute(
+            select(ActivityLog.id, ActivityLog.created_at).order_by(ActivityLog.created_at.desc()).limit(limit)
+        ).all()
     
     @staticmethod
     def get_all() -> List[ActivityLog]:
         """Get all activity logs."""
-        return ActivityLog.query.order_by(ActivityLog.created_at.desc()).all()
+        return read_session().query(ActivityLog).order_by(ActivityLog.created_at.desc()).all()
 
@@ -0,0 +1,49 @@
+"""
+Read/write routing for the repository layer.
+Read-only repository methods use a replica (or read-only connection) when one
+is configured. Once the current request or app context has written through the
+primary session, reads stick to the primary so callers see their own writes.
+"""
+from flask import current_app, g, has_app_context
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from models import db
+from database.engine import engine_options, configure_engine
+
+def _app_ctx_id():
+    """Scope replica sessions to the current app context, like db.session."""
+    return id(app_ctx._get_current_object())
+
+def init_read_replica(app):
+    """Create the read engine and session if SQLALCHEMY_READ_DATABASE_URI is set."""
+    uri = app.config.get('SQLALCHEMY_READ_DATABASE_URI')
+    if not uri:
+        return
+
+    profile = app.config.get('DB_PROFILE', 'dev')
+    engine = create_engine(uri, **engine_options(uri, profile))
+    configure_engine(engine, profile)
+    session = scoped_session(sessionmaker(bind=engine), scopefunc=_app_ctx_id)
+    app.extensions['read_replica'] = {'engine': engine, 'session': session}
+
+    @app.teardown_appcontext
+    def remove_read_session(exc):
+        session.remove()
+
+def read_session():
+    """Return the session read-only queries should use."""
+    replica = current_app.extensions.get('read_replica')
+    if replica is None or g.get('db_wrote'):
+        return db.session
+    return replica['session']
+
+def mark_written():
+    """Pin later reads in this context to the primary (read-your-writes).
+    Flushes do this automatically; Core UPDATE/INSERT statements must call it."""
+    if has_app_context():
+        g.db_wrote = True
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_written(session, flush_context):
+    mark_written()
@@ -0,0 +1,207 @@
+"""
+Column-oriented in-memory snapshot of tasks for read-heavy views.
+The dashboard counts, deadline notifications and calendar only need a few
+fields per task, so instead of hydrating a Task ORM instance for every row they
+read packed arrays (ids, status and priority codes, due dates in microseconds,
+assignee ids, versions) plus the title and description strings.
+
+The snapshot is optional (TASK_SNAPSHOT=true) and kept per process. Before each
+read it compares a cheap aggregate (row count, sum of versions, newest
+updated_at) with the database; if anything changed it re-reads only rows updated
+since its watermark, and falls back to a full reload when the result still does
+not add up (deletes, or rows written without bumping updated_at). Writes from
+other workers are picked up the same way.
+"""
+import sys
+import threading
+from array import array
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select
+from models import Task
+from database.routing import read_session
+
+EPOCH = datetime(1970, 1, 1)
+NO_DATE = -2 ** 63
+# Rows committed this long after a newer row are still picked up incrementally
+LOOKBACK = timedelta(seconds=5)
+
+def _to_micros(value):
+    return NO_DATE if value is None else (value - EPOCH) // timedelta(microseconds=1)
+
+def _from_micros(value):
+    return None if value == NO_DATE else EPOCH + timedelta(microseconds=value)
+
+class TaskRow:
+    """The snapshot fields of one task."""
+    __slots__ = ('id', 'title', 'description', 'status', 'priority', 'due_date', 'assigned_to')
+    
+    def __init__(self, id, title, description, status, priority, due_date, assigned_to):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.status = status
+        self.priority = priority
+        self.due_date = due_date
+        self.assigned_to = assigned_to
+    
+    def to_dict(self, usernames):
+        """Calendar fields; usernames maps user_id -> username."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'priority': self.priority,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'assigned_to': self.assigned_to,
+            'assigned_to_username': usernames.get(self.assigned_to)
+        }
+
+class TaskSnapshot:
+    """Packed copy of the task columns the read-heavy views use."""
+    
+    COLUMNS = (Task.id, Task.title, Task.description, Task.status, Task.priority,
+               Task.due_date, Task.assigned_to, Task.version, Task.updated_at)
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._clear()
+        self.full_reloads = 0
+        self.incremental_refreshes = 0
+    
+    def _clear(self):
+        self.ids = array('q')
+        self.status = array('B')
+        self.priority = array('B')
+        self.due = array('q')
+        self.assignee = array('q')
+        self.version = array('q')
+        self.titles = []
+        self.descriptions = []
+        self.positions = {}
+        # status and priority strings are stored once and referenced by code
+        self.codes = {}
+        self.labels = []
+        self.version_total = 0
+        self.token = None
+        self.watermark = None
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _code(self, label):
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+    
+    def _upsert(self, row):
+        position = self.positions.get(row.id)
+        values = (self._code(row.status), self._code(row.priority), _to_micros(row.due_date),
+                  row.assigned_to or 0, row.version)
+        if position is None:
+            self.positions[row.id] = len(self.ids)
+            self.ids.append(row.id)
+            for column, value in zip((self.status, self.priority, self.due, self.assignee, self.version), values):
+                column.append(value)
+            self.titles.append(row.title)
+            self.descriptions.append(row.description)
+        else:
+            self.version_total -= self.version[position]
+            for column, value in zip((self.status, self.priority, self.due, self.assignee, self.version), values):
+                column[position] = value
+            self.titles[position] = row.title
+            self.descriptions[position] = row.description
+        self.version_total += row.version
+        if row.updated_at is not None and (self.watermark is None or row.updated_at > self.watermark):
+            self.watermark = row.updated_at
+    
+    def _load(self, rows):
+        """Replace the contents with rows, building each column in one pass."""
+        self._clear()
+        code = self._code
+        self.ids = array('q', [row.id for row in rows])
+        self.status = array('B', [code(row.status) for row in rows])
+        self.priority = array('B', [code(row.priority) for row in rows])
+        self.due = array('q', [_to_micros(row.due_date) for row in rows])
+        self.assignee = array('q', [row.assigned_to or 0 for row in rows])
+        self.version = array('q', [row.version for row in rows])
+        self.titles = [row.title for row in rows]
+        self.descriptions = [row.description for row in rows]
+        self.positions = {task_id: position for position, task_id in enumerate(self.ids)}
+        self.version_total = sum(self.version)
+        self.watermark = max((row.updated_at for row in rows if row.updated_at is not None), default=None)
+    
+    def _current_token(self, session):
+        return tuple(session.execute(
+            select(func.count(Task.id), func.coalesce(func.sum(Task.version), 0), func.max(Task.updated_at))
+        ).one())
+    
+    def refresh(self):
+        """Bring the snapshot up to date with the database."""
+        session = read_session()
+        with self.lock:
+            token = self._current_token(session)
+            if token == self.token:
+                return
+            if self.watermark is not None:
+                changed = session.execute(
+                    select(*self.COLUMNS).where(Task.updated_at >= self.watermark - LOOKBACK))
+                for row in changed:
+                    self._upsert(row)
+                self.incremental_refreshes += 1
+            if (len(self.ids), self.version_total) != token[:2]:
+                self._load(session.execute(select(*self.COLUMNS).order_by(Task.id)).all())
+                self.full_reloads += 1
+            self.token = token
+    
+    def _row(self, position):
+        return TaskRow(
+            self.ids[position], self.titles[position], self.descriptions[position],
+            self.labels[self.status[position]], self.labels[self.priority[position]],
+            _from_micros(self.due[position]), self.assignee[position] or None)
+    
+    def count_by_status(self):
+        """Mapping of status -> number of tasks."""
+        self.refresh()
+        with self.lock:
+            totals = [0] * len(self.labels)
+            for code in self.status:
+                totals[code] += 1
+            return {label: total for label, total in zip(self.labels, totals) if total}
+    
+    def due_between(self, start, end, exclude_status=None):
+        """Tasks due in [start, end], optionally skipping one status."""
+        self.refresh()
+        with self.lock:
+            low, high = _to_micros(start), _to_micros(end)
+            skip = self.codes.get(exclude_status, -1)
+            return [self._row(i) for i, due in enumerate(self.due)
+                    if low <= due <= high and self.status[i] != skip]
+    
+    def with_due_date(self):
+        """Every task that has a due date."""
+        self.refresh()
+        with self.lock:
+            return [self._row(i) for i, due in enumerate(self.due) if due != NO_DATE]
+    
+    def memory_bytes(self):
+        """Approximate bytes held by the snapshot, strings included."""
+        with self.lock:
+            total = sum(sys.getsizeof(column) for column in
+                        (self.ids, self.status, self.priority, self.due, self.assignee, self.version))
+            total += sys.getsizeof(self.titles) + sys.getsizeof(self.descriptions) + sys.getsizeof(self.positions)
+            total += sum(sys.getsizeof(text) for text in self.titles)
+            total += sum(sys.getsizeof(text) for text in self.descriptions if text is not None)
+            return total
+
+def init_task_snapshot(app):
+    """Create the snapshot if TASK_SNAPSHOT is enabled; it loads on first use."""
+    if app.config.get('TASK_SNAPSHOT'):
+        app.extensions['task_snapshot'] = TaskSnapshot()
+
+def task_snapshot():
+    """The app's TaskSnapshot, or None when the read model is disabled."""
+    return current_app.extensions.get('task_snapshot')
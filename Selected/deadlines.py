@@ -0,0 +1,134 @@
+"""
+Batched deadline notifications.
+
+The monolith and the frontend service keep an identical copy of this module.
+deadline_notifications() takes every candidate task at once, converts the due
+dates to epoch microseconds, and computes the time remaining and the message
+bucket for all of them in one vectorized pass. Message text comes from the
+MESSAGES template table. NumPy is used when installed, otherwise the same
+arithmetic runs in a plain loop.
+"""
+import importlib
+import importlib.util
+import warnings
+from datetime import datetime, timedelta
+
+# NumPy adds ~60 ms to every process start, so it is imported on first use;
+# np is None when it is not installed.
+_NOT_LOADED = object()
+np = _NOT_LOADED if importlib.util.find_spec('numpy') else None
+
+def _numpy():
+    global np
+    if np is _NOT_LOADED:
+        np = importlib.import_module('numpy')
+    return np
+
+EPOCH = datetime(1970, 1, 1)
+MICROS = 1_000_000
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Message per bucket, chosen by the largest non-zero unit of time remaining
+MESSAGES = (
+    'Task "{title}" is due in {days} day(s)',
+    'Task "{title}" is due in {hours} hour(s), {minutes} minute(s)',
+    'Task "{title}" is due in {hours} hour(s)',
+    'Task "{title}" is due in {minutes} minute(s), {seconds} second(s)',
+    'Task "{title}" is due in {minutes} minute(s)',
+    'Task "{title}" is due in {seconds} second(s)',
+    'Task "{title}" is overdue!',
+)
+
+def _parse(value):
+    """Naive UTC datetime for a datetime or an ISO string."""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    offset = value.utcoffset()
+    return value if offset is None else value.replace(tzinfo=None) - offset
+
+def _to_micros(value):
+    return (_parse(value) - EPOCH) // ONE_MICROSECOND
+
+def _epoch_micros(due_dates):
+    """Epoch microseconds per due date, or None where it cannot be parsed.
+    NumPy parses a batch of naive ISO strings in one call; datetimes and
+    anything it rejects (offsets, bad strings) are converted one by one."""
+    if _numpy() is not None and all(isinstance(due_date, str) for due_date in due_dates):
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                micros = np.array(due_dates, dtype='datetime64[us]')
+            if not np.isnat(micros).any():
+                return micros.astype(np.int64)
+        except (TypeError, ValueError, DeprecationWarning):
+            pass
+    micros = []
+    for due_date in due_dates:
+        try:
+            micros.append(_to_micros(due_date))
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"Error processing task notification: {e}")
+            micros.append(None)
+    return micros
+
+def _remaining_numpy(due_micros, now_micros):
+    delta = np.asarray(due_micros, dtype=np.int64) - now_micros
+    # int(timedelta.total_seconds()) truncates towards zero; days floor like timedelta.days
+    total = np.where(delta >= 0, delta // MICROS, -(-delta // MICROS))
+    days = delta // (86400 * MICROS)
+    hours = total // 3600
+    minutes = (total // 60) % 60
+    seconds = total % 60
+    bucket = np.select(
+        [days > 0, (hours > 0) & (minutes > 0), hours > 0, (minutes > 0) & (seconds > 0), minutes > 0, seconds > 0],
+        [0, 1, 2, 3, 4, 5],
+        default=6,
+    )
+    return [column.tolist() for column in (total, days, hours, minutes, seconds, bucket)]
+
+def _remaining_python(due_micros, now_micros):
+    columns = ([], [], [], [], [], [])
+    for due in due_micros:
+        delta = due - now_micros
+        total = delta // MICROS if delta >= 0 else -(-delta // MICROS)
+        days, hours, minutes, seconds = delta // (86400 * MICROS), total // 3600, (total // 60) % 60, total % 60
+        if days > 0:
+            bucket = 0
+        elif hours > 0:
+            bucket = 1 if minutes > 0 else 2
+        elif minutes > 0:
+            bucket = 3 if seconds > 0 else 4
+        else:
+            bucket = 5 if seconds > 0 else 6
+        for column, value in zip(columns, (total, days, hours, minutes, seconds, bucket)):
+            column.append(value)
+    return columns
+
+def deadline_notifications(tasks, now=None):
+    """Notification dicts for (task_id, title, due_date) tuples.
+    due_date may be a naive UTC datetime or an ISO string; tasks whose due date
+    cannot be parsed are skipped."""
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    due_micros = _epoch_micros([due_date for _, _, due_date in tasks])
+    if not isinstance(due_micros, list):
+        remaining = _remaining_numpy
+    else:
+        tasks = [task for task, micros in zip(tasks, due_micros) if micros is not None]
+        due_micros = [micros for micros in due_micros if micros is not None]
+        remaining = _remaining_numpy if _numpy() is not None else _remaining_python
+    
+    columns = remaining(due_micros, _to_micros(now or datetime.utcnow()))
+    return [{
+        'type': 'deadline_approaching',
+        'task_id': task_id,
+        'task_title': title,
+        'due_date': due_date if isinstance(due_date, str) else due_date.isoformat(),
+        'days_until': days,
+        'hours_until': hours,
+        'minutes_until': minutes,
+        'seconds_until': seconds,
+        'total_seconds': total,
+        'message': MESSAGES[bucket].format(title=title, days=days, hours=hours, minutes=minutes, seconds=seconds),
+    } for (task_id, title, due_date), total, days, hours, minutes, seconds, bucket in zip(tasks, *columns)]
@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for serving the monolith in production.
+
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# One process per core plus one spare, each with a small thread pool so
+# requests blocked on the database do not hold a whole worker.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import the app once in the master and fork it into the workers.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true')
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+def post_fork(server, worker):
+    """Drop connections inherited from the preloading master."""
+    from wsgi import app
+    from app import shutdown_app
+    shutdown_app(app)
+
+def worker_exit(server, worker):
+    """Close pooled connections when a worker shuts down."""
+    from wsgi import app
+    from app import shutdown_app
+    shutdown_app(app)
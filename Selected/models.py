@@ -15,11 +15,24 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Case-insensitive lookups and prefix search compare lower(column)
+    __table_args__ = (
+        db.Index('ix_users_username_lower', db.func.lower(username)),
+        db.Index('ix_users_email_lower', db.func.lower(email)),
+    )
+    
     # Relationships
     assigned_tasks = db.relationship('Task', foreign_keys='Task.assigned_to', backref='assignee', lazy=True)
     
+    # Keys of to_dict(); API clients may ask for a subset with ?fields=
+    FIELDS = ('id', 'username', 'email')
+    
     def __repr__(self):
         return f'<User {self.username}>'
+    
+    def to_dict(self, fields=None):
+        """Convert user to dictionary, limited to fields if given."""
+        return {field: getattr(self, field) for field in fields or User.FIELDS}
 
 class Task(db.Model):
     """Task model."""
@@ -35,28 +48,45 @@ class Task(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    # Bumped on every UPDATE, which is issued as UPDATE ... WHERE version = ?
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     activities = db.relationship('ActivityLog', backref='task', lazy=True, cascade='all, delete-orphan')
     
+    __mapper_args__ = {'version_id_col': version}
+    
+    # Keys of to_dict(); API clients may ask for a subset with ?fields=
+    FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date', 'created_at',
+              'updated_at', 'assigned_to', 'assigned_to_username', 'created_by', 'version')
+    
     def __repr__(self):
         return f'<Task {self.title}>'
     
-    def to_dict(self):
-        """Convert task to dictionary for JSON serialization."""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'assigned_to': self.assigned_to,
-            'assigned_to_username': self.assignee.username if self.assignee else None,
-            'created_by': self.created_by
-        }
+    @staticmethod
+    def etag_for(task_id, version):
+        """Entity tag identifying one version of a task."""
+        return f'task-{task_id}-v{version}'
+    
+    @property
+    def etag(self):
+        return Task.etag_for(self.id, self.version)
+    
+    def to_dict(self, fields=None, include=()):
+        """Convert task to dictionary for JSON serialization.
+        fields limits the keys to a subset of FIELDS and only those attributes
+        are read, so a task loaded with just their columns serializes without
+        further queries. include=('assignee',) adds the assigned user."""
+        result = {}
+        for field in fields or Task.FIELDS:
+            if field == 'assigned_to_username':
+                result[field] = self.assignee.username if self.assignee else None
+            else:
+                value = getattr(self, field)
+                result[field] = value.isoformat() if isinstance(value, datetime) else value
+        if 'assignee' in include:
+            result['assignee'] = self.assignee.to_dict() if self.assignee else None
+        return result
 
 class ActivityLog(db.Model):
     """Activity log for tracking task updates."""
@@ -66,9 +96,14 @@ class ActivityLog(db.Model):
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)  # created, updated, assigned, status_changed
     description = db.Column(db.Text)
+    # Structured field changes ({field, old, new}), rendered to text at read time
+    details = db.Column(db.JSON, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Keys of the activity API; API clients may ask for a subset with ?fields=
+    FIELDS = ('id', 'task_id', 'action', 'description', 'created_at')
+    
     def __repr__(self):
         return f'<ActivityLog {self.action} for Task {self.task_id}>'
 
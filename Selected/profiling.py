@@ -0,0 +1,204 @@
+"""
+On-demand request profiling.
+
+The monolith and every microservice keep an identical copy of this module.
+Nothing is installed unless PROFILING_TOKEN is set. Then:
+- a request carrying `X-Profile-Token: <token>` (or `?_profile=<token>`) runs
+  its view under a profiler; the response gets an X-Profile-Id header
+- PROFILE_SAMPLE_RATE (default 0) profiles that fraction of all requests and
+  keeps the slowest PROFILE_KEEP (default 20) of them
+- GET /debug/profiles lists stored profiles and /debug/profiles/<id> shows one;
+  both need the token too
+
+pyinstrument (a low-overhead sampling profiler) is used when installed,
+otherwise cProfile. Set PROFILER=cprofile or PROFILER=pyinstrument to choose.
+Profiles live in process memory, so each gunicorn worker keeps its own.
+"""
+import cProfile
+import functools
+import heapq
+import hmac
+import inspect
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import Response, abort, g, jsonify, request
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+class ProfileRun:
+    """One profiler capture, started and stopped on the thread running the view."""
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self.profiler = None
+    
+    def start(self):
+        if self.backend == 'pyinstrument':
+            self.profiler = SamplingProfiler(async_mode='disabled')
+            self.profiler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+    
+    def stop(self):
+        if self.backend == 'pyinstrument':
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+    
+    def render(self, html=False):
+        if self.backend == 'pyinstrument':
+            return self.profiler.output_html() if html else self.profiler.output_text(unicode=True)
+        output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(60)
+        return output.getvalue()
+
+class ProfileStore:
+    """Recently requested profiles plus the slowest sampled ones."""
+    
+    def __init__(self, keep=20):
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.requested = deque(maxlen=keep)
+        self.slowest = []  # min-heap of (duration, id, entry)
+    
+    def add(self, entry):
+        with self.lock:
+            entry['id'] = next(self.ids)
+            if entry['trigger'] == 'token':
+                self.requested.append(entry)
+            elif len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, (entry['duration_ms'], entry['id'], entry))
+            elif entry['duration_ms'] > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (entry['duration_ms'], entry['id'], entry))
+            return entry['id']
+    
+    def entries(self):
+        with self.lock:
+            return list(self.requested) + [entry for _, _, entry in self.slowest]
+    
+    def get(self, profile_id):
+        return next((entry for entry in self.entries() if entry['id'] == profile_id), None)
+
+def _setting(app, name, default):
+    return app.config.get(name, os.environ.get(name, default))
+
+def _choose_backend(name):
+    if name == 'pyinstrument' or (name == 'auto' and SamplingProfiler is not None):
+        if SamplingProfiler is None:
+            raise RuntimeError('PROFILER=pyinstrument but pyinstrument is not installed')
+        return 'pyinstrument'
+    return 'cprofile'
+
+def init_profiling(app):
+    """Enable token-gated profiling on app if PROFILING_TOKEN is configured."""
+    token = _setting(app, 'PROFILING_TOKEN', None)
+    if not token:
+        return None
+    sample_rate = float(_setting(app, 'PROFILE_SAMPLE_RATE', 0))
+    backend = _choose_backend(_setting(app, 'PROFILER', 'auto'))
+    store = ProfileStore(int(_setting(app, 'PROFILE_KEEP', 20)))
+    app.extensions['profiling'] = store
+    
+    def has_token():
+        supplied = request.headers.get('X-Profile-Token') or request.args.get('_profile') or ''
+        return hmac.compare_digest(supplied.encode(), token.encode())
+    
+    @app.before_request
+    def choose_request():
+        if request.path.startswith('/debug/profiles'):
+            return
+        if has_token():
+            g.profile_trigger = 'token'
+        elif sample_rate and random.random() < sample_rate:
+            g.profile_trigger = 'sample'
+        else:
+            return
+        g.profile_run = ProfileRun(backend)
+        g.profile_start = time.perf_counter()
+    
+    @app.after_request
+    def store_profile(response):
+        run = g.pop('profile_run', None)
+        if run is None or run.profiler is None:
+            return response
+        profile_id = store.add({
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': request.url_rule.rule if request.url_rule is not None else None,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.profile_start) * 1000, 3),
+            'captured_at': datetime.utcnow().isoformat(),
+            'trigger': g.profile_trigger,
+            'profiler': backend,
+            'run': run,
+        })
+        response.headers['X-Profile-Id'] = str(profile_id)
+        return response
+    
+    # Views are wrapped where they execute: async views run on asgiref's loop
+    # thread, which a profiler started in before_request would not see.
+    ensure_sync = app.ensure_sync
+    
+    def profiled_ensure_sync(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def profiled_async(*args, **kwargs):
+                run = g.get('profile_run')
+                if run is None or func is not app.view_functions.get(request.endpoint):
+                    return await func(*args, **kwargs)
+                run.start()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    run.stop()
+            return ensure_sync(profiled_async)
+        
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            run = g.get('profile_run')
+            if run is None or func is not app.view_functions.get(request.endpoint):
+                return func(*args, **kwargs)
+            run.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                run.stop()
+        return profiled
+    
+    app.ensure_sync = profiled_ensure_sync
+    
+    @app.route('/debug/profiles')
+    def list_profiles():
+        """Stored profiles, slowest first."""
+        if not has_token():
+            abort(404)
+        entries = sorted(store.entries(), key=lambda entry: entry['duration_ms'], reverse=True)
+        return jsonify([{key: value for key, value in entry.items() if key != 'run'} for entry in entries])
+    
+    @app.route('/debug/profiles/<int:profile_id>')
+    def show_profile(profile_id):
+        """One profile as text, or HTML with ?format=html under pyinstrument."""
+        if not has_token():
+            abort(404)
+        entry = store.get(profile_id)
+        if entry is None:
+            abort(404)
+        if request.args.get('format') == 'html' and backend == 'pyinstrument':
+            return Response(entry['run'].render(html=True), mimetype='text/html')
+        header = f'{entry["method"]} {entry["path"]} -> {entry["status"]} in {entry["duration_ms"]} ms\n\n'
+        return Response(header + entry['run'].render(), mimetype='text/plain')
+    
+    return store
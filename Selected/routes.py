@@ -1,26 +1,81 @@
 """
 Route handlers (Controller layer).
 """
-from flask import render_template, request, jsonify, redirect, url_for, send_file
+from flask import render_template, request, jsonify, redirect, url_for, send_file, Response, stream_with_context
+from werkzeug.exceptions import BadRequest
 from models import db, Task, User, ActivityLog
-from database.repositories import UserRepository, ActivityLogRepository
+from database.repositories import UserRepository, ActivityLogRepository, VersionConflict
 from services.task_service import TaskService
 from services.notification_service import NotificationService
+from services.activity_formatter import render_activities
+from cache import get_cache
+from http_cache import collection_etag, is_conditional, not_modified, set_validators
 import csv
 import io
 from datetime import datetime
 
+# Columns PATCH /api/tasks/<id> may set
+PATCHABLE_FIELDS = ('title', 'description', 'status', 'priority', 'due_date', 'assigned_to')
+
+# Related records GET /api/tasks may embed with ?include=
+TASK_INCLUDES = ('assignee',)
+
+# Default and largest page of GET /api/users/search
+USER_SEARCH_LIMIT = 20
+USER_SEARCH_MAX = 100
+
+def _expected_version(task_id):
+    """Task version the client last saw, from If-Match or a 'version' field."""
+    if request.if_match:
+        if request.if_match.star_tag:
+            return None
+        prefix = f'task-{task_id}-v'
+        for tag in request.if_match.as_set(include_weak=True):
+            if tag.startswith(prefix) and tag[len(prefix):].isdigit():
+                return int(tag[len(prefix):])
+        raise VersionConflict()
+    version = (request.get_json(silent=True) or {}).get('version')
+    if version is None:
+        return None
+    try:
+        return int(version)
+    except (TypeError, ValueError):
+        raise BadRequest('version must be an integer.')
+
+def _requested(param, allowed):
+    """Names listed in ?<param>=a,b, or None when absent. Unknown names are a 400."""
+    value = request.args.get(param)
+    if value is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise BadRequest(f'Unknown {param}: {", ".join(unknown)}. Choose from {", ".join(allowed)}.')
+    return names
+
+def _requested_fields(allowed):
+    """Sparse fieldset from ?fields=; the id is always included."""
+    fields = _requested('fields', allowed)
+    if fields is not None and 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def _activity_validators(versions):
+    """ETag and Last-Modified for a page of activity from its (id, created_at) pairs."""
+    return (collection_etag(*[activity_id for activity_id, _ in versions]),
+            max((created_at for _, created_at in versions), default=None))
+
 def register_routes(app):
     """Register all routes with the Flask app."""
     
     @app.route('/')
     def index():
         """Dashboard view."""
-        tasks = TaskService.get_all_tasks()
+        stats = TaskService.get_task_stats()
         notifications = NotificationService.check_upcoming_deadlines()
         recent_activity = NotificationService.get_recent_activity()
         return render_template('dashboard.html', 
-                             tasks=tasks, 
+                             stats=stats, 
                              notifications=notifications,
                              recent_activity=recent_activity)
     
@@ -34,10 +89,7 @@ def register_routes(app):
     @app.route('/calendar')
     def calendar():
         """Calendar view."""
-        tasks = TaskService.get_all_tasks()
-        # Convert tasks to dictionaries for JSON serialization
-        tasks_dict = [task.to_dict() for task in tasks]
-        return render_template('calendar.html', tasks=tasks_dict)
+        return render_template('calendar.html', tasks=TaskService.get_calendar_tasks())
     
     @app.route('/users')
     def users():
@@ -47,9 +99,19 @@ def register_routes(app):
     
     @app.route('/api/tasks', methods=['GET'])
     def get_tasks():
-        """API endpoint to get all tasks."""
-        tasks = TaskService.get_all_tasks()
-        return jsonify([task.to_dict() for task in tasks])
+        """API endpoint to get all tasks.
+        ?fields=title,status limits both the response and the columns selected;
+        ?include=assignee embeds the assigned user."""
+        fields = _requested_fields(Task.FIELDS)
+        include = _requested('include', TASK_INCLUDES) or ()
+        if is_conditional():
+            # Answer a still-current client copy from one aggregate query
+            count, last_modified = TaskService.get_tasks_version()
+            response = not_modified(collection_etag(count, last_modified), last_modified)
+            if response:
+                return response
+        tasks, last_modified = TaskService.get_task_list(fields, include)
+        return set_validators(jsonify(tasks), collection_etag(len(tasks), last_modified), last_modified)
     
     @app.route('/api/tasks', methods=['POST'])
     def create_task():
@@ -71,9 +133,13 @@ def register_routes(app):
     
     @app.route('/api/tasks/<int:task_id>', methods=['GET'])
     def get_task(task_id):
-        """API endpoint to get a specific task."""
-        task = TaskService.get_task_by_id(task_id)
-        return jsonify(task.to_dict())
+        """API endpoint to get a specific task (accepts ?fields= and ?include=)."""
+        fields = _requested_fields(Task.FIELDS)
+        include = _requested('include', TASK_INCLUDES) or ()
+        task = TaskService.get_task_by_id(task_id, fields, include)
+        response = jsonify(task.to_dict(fields, include))
+        response.set_etag(task.etag)
+        return response
     
     @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
     def update_task(task_id):
@@ -94,8 +160,44 @@ def register_routes(app):
         if 'assigned_to' in data:
             update_data['assigned_to'] = data['assigned_to']
         
-        task = TaskService.update_task(task_id, **update_data)
-        return jsonify(task.to_dict())
+        try:
+            task = TaskService.update_task(task_id, expected_version=_expected_version(task_id), **update_data)
+        except VersionConflict as e:
+            current = TaskService.get_task_by_id(task_id)
+            response = jsonify({'error': e.description, 'task': current.to_dict()})
+            response.set_etag(current.etag)
+            return response, 409
+        response = jsonify(task.to_dict())
+        response.set_etag(task.etag)
+        return response
+    
+    @app.route('/api/tasks/<int:task_id>', methods=['PATCH'])
+    def patch_task(task_id):
+        """API endpoint to change some fields of a task in a single UPDATE."""
+        data = request.json
+        changes = {key: data[key] for key in PATCHABLE_FIELDS if key in data}
+        if not changes:
+            return jsonify({'error': f'Nothing to update; send any of {", ".join(PATCHABLE_FIELDS)}'}), 400
+        if 'due_date' in changes:
+            try:
+                changes['due_date'] = datetime.fromisoformat(changes['due_date'].replace('Z', '+00:00')) if changes['due_date'] else None
+            except (AttributeError, ValueError):
+                raise BadRequest('due_date must be an ISO 8601 date or time.')
+        
+        try:
+            version, updated_at = TaskService.patch_task(
+                task_id, changes, expected_version=_expected_version(task_id), updated_by=data.get('updated_by'))
+        except VersionConflict as e:
+            current = TaskService.get_task_by_id(task_id)
+            response = jsonify({'error': e.description, 'task': current.to_dict()})
+            response.set_etag(current.etag)
+            return response, 409
+        
+        if changes.get('due_date'):
+            changes['due_date'] = changes['due_date'].isoformat()
+        response = jsonify({'id': task_id, **changes, 'version': version, 'updated_at': updated_at.isoformat()})
+        response.set_etag(Task.etag_for(task_id, version))
+        return response
     
     @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
     def delete_task(task_id):
@@ -119,61 +221,83 @@ def register_routes(app):
     
     @app.route('/api/activity')
     def get_activity():
-        """API endpoint to get activity log."""
-        activities = ActivityLogRepository.get_recent(50)
-        return jsonify([{
-            'id': activity.id,
-            'task_id': activity.task_id,
-            'action': activity.action,
-            'description': activity.description,
-            'created_at': activity.created_at.isoformat()
-        } for activity in activities])
+        """API endpoint to get activity log (accepts ?fields=)."""
+        fields = _requested_fields(ActivityLog.FIELDS)
+        if is_conditional():
+            versions = ActivityLogRepository.get_recent_versions(50)
+            response = not_modified(*_activity_validators(versions))
+            if response:
+                return response
+        activities = ActivityLogRepository.get_recent(50, fields)
+        fields = fields or ActivityLog.FIELDS
+        descriptions = render_activities(activities) if 'description' in fields else [None] * len(activities)
+        entries = []
+        for activity, description in zip(activities, descriptions):
+            entry = {field: getattr(activity, field) for field in fields}
+            if 'description' in entry:
+                entry['description'] = description
+            if 'created_at' in entry:
+                entry['created_at'] = entry['created_at'].isoformat()
+            entries.append(entry)
+        versions = [(activity.id, activity.created_at) for activity in activities]
+        return set_validators(jsonify(entries), *_activity_validators(versions))
     
     @app.route('/export/csv')
     def export_csv():
-        """Export tasks to CSV."""
-        tasks = TaskService.get_all_tasks()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['ID', 'Title', 'Description', 'Status', 'Priority', 
-                        'Due Date', 'Assigned To', 'Created At', 'Updated At'])
+        """Export tasks to CSV, streamed row by row."""
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            
+            # Write header
+            writer.writerow(['ID', 'Title', 'Description', 'Status', 'Priority', 
+                            'Due Date', 'Assigned To', 'Created At', 'Updated At'])
+            
+            # Write data
+            for task in TaskService.iter_all_tasks():
+                assignee = task.assignee.username if task.assignee else 'Unassigned'
+                due_date = task.due_date.strftime('%Y-%m-%d %H:%M:%S') if task.due_date else ''
+                writer.writerow([
+                    task.id,
+                    task.title,
+                    task.description or '',
+                    task.status,
+                    task.priority,
+                    due_date,
+                    assignee,
+                    task.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                    task.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+                ])
+                if output.tell() >= 65536:
+                    yield output.getvalue().encode('utf-8')
+                    output.seek(0)
+                    output.truncate()
+            
+            yield output.getvalue().encode('utf-8')
         
-        # Write data
-        for task in tasks:
-            assignee = task.assignee.username if task.assignee else 'Unassigned'
-            due_date = task.due_date.strftime('%Y-%m-%d %H:%M:%S') if task.due_date else ''
-            writer.writerow([
-                task.id,
-                task.title,
-                task.description or '',
-                task.status,
-                task.priority,
-                due_date,
-                assignee,
-                task.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                task.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
+        filename = f'tasks_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        return Response(
+            stream_with_context(generate()),
             mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'tasks_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
     
     @app.route('/api/users', methods=['GET'])
     def get_users():
-        """API endpoint to get all users."""
-        users = UserRepository.get_all()
-        return jsonify([{
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        } for user in users])
+        """API endpoint to get all users (accepts ?fields=), cached until a user is written."""
+        fields = _requested_fields(User.FIELDS)
+        cache = get_cache()
+        key = cache.key('users', ','.join(fields or ()), depends_on=('users',))
+        return jsonify(cache.get_or_set(key, lambda: [user.to_dict(fields) for user in UserRepository.get_all(fields)]))
+    
+    @app.route('/api/users/search', methods=['GET'])
+    def search_users():
+        """Users whose username or email starts with ?q=, ignoring case
+        (accepts ?limit=, default 20, at most 100, and ?fields=)."""
+        fields = _requested_fields(User.FIELDS)
+        limit = min(max(request.args.get('limit', USER_SEARCH_LIMIT, type=int), 1), USER_SEARCH_MAX)
+        users = UserRepository.search(request.args.get('q', ''), limit, fields)
+        return jsonify([user.to_dict(fields) for user in users])
     
     @app.route('/api/users', methods=['POST'])
     def create_user():
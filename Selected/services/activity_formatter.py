@@ -0,0 +1,70 @@
+"""
+Renders activity log entries to text at read time.
+Task updates store what changed as structured details (field, old value, new
+value), so the write path does no lookups or formatting. Reading a page of
+activity fetches every username it mentions in one query, and field names and
+dates are formatted through memoized helpers.
+"""
+from datetime import datetime
+from functools import lru_cache
+from database.repositories import UserRepository
+
+FIELD_NAMES = {
+    'due_date': 'due date',
+    'assigned_to': 'assigned to',
+    'created_by': 'created by',
+    'updated_by': 'updated by'
+}
+
+# Fields whose values are user IDs or ISO timestamps in stored details
+USER_FIELDS = frozenset(['assigned_to', 'created_by', 'updated_by'])
+DATETIME_FIELDS = frozenset(['due_date'])
+
+def describe_change(field, old_value, new_value):
+    """Structured record of one field change, safe to store as JSON."""
+    return {'field': field, 'old': _to_json(old_value), 'new': _to_json(new_value)}
+
+def _to_json(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+@lru_cache(maxsize=256)
+def format_field_name(field_name):
+    """Convert field names to user-friendly format."""
+    return FIELD_NAMES.get(field_name, field_name.replace('_', ' '))
+
+@lru_cache(maxsize=4096)
+def format_datetime(iso_value):
+    """Format a stored ISO timestamp as readable date and time."""
+    return datetime.fromisoformat(iso_value).strftime('%B %d, %Y at %I:%M %p')
+
+def format_value(field_name, value, usernames):
+    """Format a stored value for display; usernames maps user_id -> username."""
+    if value is None:
+        return 'not set'
+    if field_name in DATETIME_FIELDS:
+        return format_datetime(value)
+    if field_name in USER_FIELDS and isinstance(value, int):
+        return usernames.get(value) or f'user {value}'
+    return str(value)
+
+def render_activity(activity, usernames):
+    """Text for one activity entry; entries without details keep their stored text."""
+    if not activity.details:
+        return activity.description
+    return '; '.join(
+        f"{format_field_name(change['field'])} was changed from "
+        f"{format_value(change['field'], change['old'], usernames)} to "
+        f"{format_value(change['field'], change['new'], usernames)}"
+        for change in activity.details
+    )
+
+def render_activities(activities):
+    """Text for each activity entry, looking up all mentioned users at once."""
+    user_ids = {
+        change[side]
+        for activity in activities if activity.details
+        for change in activity.details if change['field'] in USER_FIELDS
+        for side in ('old', 'new') if isinstance(change[side], int)
+    }
+    usernames = UserRepository.get_usernames(user_ids) if user_ids else {}
+    return [render_activity(activity, usernames) for activity in activities]
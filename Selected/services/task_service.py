@@ -2,45 +2,19 @@
 Business logic for task management operations.
 Uses the database layer (repositories) for data access.
 """
-from datetime import datetime
-from database.repositories import TaskRepository, UserRepository, ActivityLogRepository
+from database.repositories import TaskRepository, UserRepository, ActivityLogRepository, VersionConflict
+from database.snapshot import task_snapshot
+from cache import get_cache
+from services.activity_formatter import describe_change
+from datetime import datetime, timedelta
+
+# Task fields the calendar view renders (the same keys as TaskRow.to_dict)
+CALENDAR_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date',
+                   'assigned_to', 'assigned_to_username')
 
 class TaskService:
     """Service layer for task operations."""
     
-    @staticmethod
-    def _format_field_name(field_name):
-        """Convert field names to user-friendly format."""
-        field_map = {
-            'due_date': 'due date',
-            'assigned_to': 'assigned to',
-            'created_by': 'created by',
-            'updated_by': 'updated by'
-        }
-        return field_map.get(field_name, field_name.replace('_', ' '))
-    
-    @staticmethod
-    def _format_value(value, field_name=''):
-        """Format values for display in activity logs."""
-        if value is None:
-            return 'not set'
-        if isinstance(value, datetime):
-            # Format datetime as readable date and time
-            return value.strftime('%B %d, %Y at %I:%M %p')
-        if field_name == 'assigned_to':
-            # Handle user assignment - value could be int (user_id) or User object
-            user_id = value
-            if hasattr(value, 'id'):
-                user_id = value.id
-            if isinstance(user_id, int):
-                # Try to get username if it's a user ID
-                try:
-                    user = UserRepository.get_by_id(user_id)
-                    return user.username if user else f'user {user_id}'
-                except:
-                    return f'user {user_id}'
-        return str(value)
-    
     @staticmethod
     def create_task(title, description, priority='medium', due_date=None, assigned_to=None, created_by=None):
         """Create a new task."""
@@ -65,10 +39,13 @@ class TaskService:
         return task
     
     @staticmethod
-    def update_task(task_id, **kwargs):
-        """Update an existing task."""
+    def update_task(task_id, expected_version=None, **kwargs):
+        """Update an existing task.
+        With expected_version, raise VersionConflict if the task has moved on."""
         # Get task using repository
         task = TaskRepository.get_by_id_or_404(task_id)
+        if expected_version is not None and task.version != expected_version:
+            raise VersionConflict()
         
         # Track changes for activity log
         changes = []
@@ -76,30 +53,44 @@ class TaskService:
         
         for key, value in kwargs.items():
             if hasattr(task, key) and getattr(task, key) != value:
-                old_value = getattr(task, key)
                 update_data[key] = value
-                
-                # Format the change message
-                field_name = TaskService._format_field_name(key)
-                old_formatted = TaskService._format_value(old_value, key)
-                new_formatted = TaskService._format_value(value, key)
-                changes.append(f"{field_name} was changed from {old_formatted} to {new_formatted}")
+                # Recorded as data; rendered to text when activity is read
+                changes.append(describe_change(key, getattr(task, key), value))
         
         # Update using repository
         if update_data:
-            task = TaskRepository.update(task, **update_data)
+            task = TaskRepository.update(task, expected_version=expected_version, **update_data)
         
         # Log activity if there were changes
         if changes:
             ActivityLogRepository.create(
                 task_id=task.id,
                 action='updated',
-                description='; '.join(changes),
+                details=changes,
                 user_id=kwargs.get('updated_by')
             )
         
         return task
     
+    @staticmethod
+    def patch_task(task_id, changes, expected_version=None, updated_by=None):
+        """Update only the given fields without loading the task.
+        Returns (new version, updated_at) and logs the changes like update_task."""
+        old_values, version, updated_at = TaskRepository.update_columns(task_id, changes, expected_version)
+        
+        details = [describe_change(key, old_values[key], value)
+                   for key, value in changes.items() if old_values[key] != value]
+        
+        if details:
+            ActivityLogRepository.create(
+                task_id=task_id,
+                action='updated',
+                details=details,
+                user_id=updated_by
+            )
+        
+        return version, updated_at
+    
     @staticmethod
     def assign_task(task_id, user_id, assigned_by=None):
         """Assign a task to a user, or unassign if user_id is None."""
@@ -137,14 +128,40 @@ class TaskService:
         return task
     
     @staticmethod
-    def get_all_tasks():
-        """Get all tasks."""
-        return TaskRepository.get_all()
+    def get_all_tasks(fields=None, include=()):
+        """Get all tasks, loading only what the requested fields need."""
+        return TaskRepository.get_all(fields, include)
     
     @staticmethod
-    def get_task_by_id(task_id):
+    def get_task_list(fields=None, include=()):
+        """All tasks as dictionaries, and the newest updated_at among them.
+        Shared through the cache until a task or user is written."""
+        def load():
+            tasks = TaskRepository.get_all(fields, include)
+            last_modified = max((task.updated_at for task in tasks), default=None)
+            return {'tasks': [task.to_dict(fields, include) for task in tasks],
+                    'last_modified': last_modified.isoformat() if last_modified else None}
+        
+        cache = get_cache()
+        key = cache.key('tasks', 'list', ','.join(fields or ()), ','.join(include), depends_on=('tasks', 'users'))
+        result = cache.get_or_set(key, load)
+        last_modified = result['last_modified']
+        return result['tasks'], datetime.fromisoformat(last_modified) if last_modified else None
+    
+    @staticmethod
+    def iter_all_tasks():
+        """Stream all tasks for exports and other large scans."""
+        return TaskRepository.iter_all()
+    
+    @staticmethod
+    def get_tasks_version():
+        """(row count, newest updated_at) of all tasks, for validating cached lists."""
+        return TaskRepository.collection_version()
+    
+    @staticmethod
+    def get_task_by_id(task_id, fields=None, include=()):
         """Get a task by ID."""
-        return TaskRepository.get_by_id_or_404(task_id)
+        return TaskRepository.get_by_id_or_404(task_id, fields, include)
     
     @staticmethod
     def get_tasks_by_user(user_id):
@@ -153,8 +170,42 @@ class TaskService:
     
     @staticmethod
     def get_upcoming_deadlines(days=7):
-        """Get tasks with upcoming deadlines."""
-        return TaskRepository.get_upcoming_deadlines(days)
+        """Get tasks with upcoming deadlines.
+        Served from the in-memory task snapshot when it is enabled."""
+        snapshot = task_snapshot()
+        if snapshot is None:
+            return TaskRepository.get_upcoming_deadlines(days)
+        now = datetime.utcnow()
+        return snapshot.due_between(now, now + timedelta(days=days), exclude_status='completed')
+    
+    @staticmethod
+    def get_task_stats():
+        """Task totals per status for the dashboard, cached until a task is written."""
+        def count():
+            snapshot = task_snapshot()
+            counts = snapshot.count_by_status() if snapshot else TaskRepository.count_by_status()
+            return {
+                'total': sum(counts.values()),
+                'pending': counts.get('pending', 0),
+                'in_progress': counts.get('in_progress', 0),
+                'completed': counts.get('completed', 0)
+            }
+        
+        cache = get_cache()
+        return cache.get_or_set(cache.key('tasks', 'stats', depends_on=('tasks',)), count)
+    
+    @staticmethod
+    def get_calendar_tasks():
+        """Tasks as dictionaries for the calendar view.
+        With the task snapshot enabled only dated tasks are returned (the
+        calendar shows nothing else) and assignee names come from one lookup."""
+        snapshot = task_snapshot()
+        if snapshot is None:
+            return [task.to_dict(CALENDAR_FIELDS) for task in TaskRepository.get_all(CALENDAR_FIELDS)]
+        rows = snapshot.with_due_date()
+        user_ids = {row.assigned_to for row in rows if row.assigned_to}
+        usernames = UserRepository.get_usernames(user_ids) if user_ids else {}
+        return [row.to_dict(usernames) for row in rows]
     
     @staticmethod
     def delete_task(task_id):
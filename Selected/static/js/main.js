@@ -1,5 +1,8 @@
 // Main JavaScript for task management
 
+// ETag of the task open in the edit modal, sent back as If-Match on save
+let editingTaskEtag = null;
+
 // Task CRUD operations
 async function saveTask() {
     const taskId = document.getElementById('taskId').value;
@@ -22,17 +25,23 @@ async function saveTask() {
     try {
         const url = taskId ? `/api/tasks/${taskId}` : '/api/tasks';
         const method = taskId ? 'PUT' : 'POST';
+        const headers = {
+            'Content-Type': 'application/json'
+        };
+        if (taskId && editingTaskEtag) {
+            headers['If-Match'] = editingTaskEtag;
+        }
         
         const response = await fetch(url, {
             method: method,
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: headers,
             body: JSON.stringify(taskData)
         });
         
         if (response.ok) {
             location.reload();
+        } else if (response.status === 409) {
+            alert('This task was changed by someone else while you were editing. Reopen it to see the latest version.');
         } else {
             alert('Error saving task');
         }
@@ -46,6 +55,7 @@ async function editTask(taskId) {
     try {
         const response = await fetch(`/api/tasks/${taskId}`);
         const task = await response.json();
+        editingTaskEtag = response.headers.get('ETag');
         
         document.getElementById('taskId').value = task.id;
         document.getElementById('taskTitle').value = task.title;
@@ -96,28 +106,58 @@ async function deleteTask(taskId) {
     }
 }
 
+// Assignee picker: lists users matching the typed username or email prefix
+// instead of loading every user into the dropdown
+const ASSIGNEE_SEARCH_LIMIT = 20;
+let assigneeSearchTimer = null;
+let assigneeSearchSeq = 0;
+
+function userOption(id, username) {
+    const option = document.createElement('option');
+    option.value = id;
+    option.textContent = `${username} (ID: ${id})`;
+    return option;
+}
+
+function searchAssignees(query) {
+    clearTimeout(assigneeSearchTimer);
+    assigneeSearchTimer = setTimeout(() => loadAssignees(query), 200);
+}
+
+async function loadAssignees(query) {
+    const seq = ++assigneeSearchSeq;
+    const params = new URLSearchParams({ q: query.trim(), limit: ASSIGNEE_SEARCH_LIMIT, fields: 'username' });
+    const response = await fetch(`/api/users/search?${params}`);
+    const users = await response.json();
+    if (seq !== assigneeSearchSeq) {
+        return; // A later keystroke started a newer search
+    }
+    
+    // Keep the selected user listed even when it no longer matches
+    const assignSelect = document.getElementById('assignUserSelect');
+    const selected = assignSelect.selectedOptions[0];
+    const keep = selected && selected.value && !users.some(user => String(user.id) === selected.value) ? selected : null;
+    assignSelect.innerHTML = '<option value="">Unassigned</option>';
+    if (keep) {
+        assignSelect.appendChild(keep);
+    }
+    users.forEach(user => assignSelect.appendChild(userOption(user.id, user.username)));
+    assignSelect.value = selected ? selected.value : '';
+}
+
 async function assignTask(taskId) {
-    // Load users for the dropdown
     try {
-        const usersResponse = await fetch('/api/users');
-        const users = await usersResponse.json();
-        
-        // Populate the assign modal dropdown
-        const assignSelect = document.getElementById('assignUserSelect');
-        assignSelect.innerHTML = '<option value="">Unassigned</option>';
-        users.forEach(user => {
-            const option = document.createElement('option');
-            option.value = user.id;
-            option.textContent = `${user.username} (ID: ${user.id})`;
-            assignSelect.appendChild(option);
-        });
-        
-        // Get current task to pre-select assigned user
+        // Start from the current assignee, then list the first users by name
         const taskResponse = await fetch(`/api/tasks/${taskId}`);
         const task = await taskResponse.json();
+        const assignSelect = document.getElementById('assignUserSelect');
+        assignSelect.innerHTML = '<option value="">Unassigned</option>';
         if (task.assigned_to) {
-            assignSelect.value = task.assigned_to;
+            assignSelect.appendChild(userOption(task.assigned_to, task.assigned_to_username || 'User'));
         }
+        assignSelect.value = task.assigned_to || '';
+        document.getElementById('assignUserSearch').value = '';
+        await loadAssignees('');
         
         // Store task ID for the form submission
         document.getElementById('assignTaskId').value = taskId;
@@ -227,6 +267,7 @@ function closeUserModal() {
 function showCreateTaskModal() {
     document.getElementById('taskForm').reset();
     document.getElementById('taskId').value = '';
+    editingTaskEtag = null;
     document.getElementById('taskDueDate').value = '';
     document.getElementById('taskDueTime').value = '';
     document.getElementById('modalTitle').textContent = 'Create Task';
@@ -0,0 +1,14 @@
+"""
+Shared pytest fixtures.
+"""
+import pytest
+from database.querycount import assert_max_queries
+
+@pytest.fixture
+def max_queries():
+    """Assert a block stays within a SQL query budget:
+
+        with max_queries(1):
+            client.get('/api/tasks')
+    """
+    return assert_max_queries
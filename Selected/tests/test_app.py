@@ -0,0 +1,28 @@
+"""
+Tests for the application factory and production entry point.
+"""
+from app import create_app, shutdown_app
+from config import Config, ProductionConfig
+from models import db
+
+def test_production_config_disables_debug():
+    """Test the production config turns the debugger off."""
+    app = create_app(ProductionConfig)
+    assert app.debug is False
+    assert ProductionConfig.DEBUG is False
+    assert issubclass(ProductionConfig, Config)
+
+def test_shutdown_releases_connections():
+    """Test the shutdown hook disposes the connection pool."""
+    app = create_app(ProductionConfig)
+    with app.app_context():
+        db.create_all()
+    with app.test_client() as client:
+        assert client.get('/api/tasks').status_code == 200
+    with app.app_context():
+        pool = db.engine.pool
+    assert pool.checkedin() > 0
+    shutdown_app(app)
+    assert pool.checkedin() == 0
+    with app.app_context():
+        assert db.engine.pool is not pool
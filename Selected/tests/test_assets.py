@@ -0,0 +1,59 @@
+"""
+Tests for static asset fingerprinting.
+"""
+import gzip
+import re
+import pytest
+from app import create_app
+from config import TestConfig
+from models import db
+from assets import get_manifest, minify_css, minify_js
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app(TestConfig)
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+def test_pages_link_fingerprinted_assets(client, app):
+    """Test templates reference hashed names served as immutable, minified files."""
+    html = client.get('/').get_data(as_text=True)
+    manifest = get_manifest(app)
+    script = manifest.get('js/main.js').hashed_name
+    assert re.fullmatch(r'js/main\.[0-9a-f]{12}\.js', script)
+    assert f'/static/{script}' in html
+    assert f'/static/{manifest.get("css/style.css").hashed_name}' in html
+    
+    response = client.get(f'/static/{script}')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Content-Encoding' not in response.headers
+    original = client.get('/static/js/main.js')
+    assert len(response.data) < len(original.data) * 0.8
+    assert 'immutable' not in original.headers.get('Cache-Control', '')
+    original.close()
+    
+    compressed = client.get(f'/static/{script}', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == response.data
+    assert client.get(f'/static/{script}', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/static/js/main.000000000000.js').status_code == 404
+
+def test_minifiers_keep_strings_and_templates():
+    """Test comments and whitespace go but literal text and line breaks ASI needs stay."""
+    js = minify_js("// note\nconst a = 'x  // y';\nlet b = `${a}  /* z */`\nreturn  b / 2\n")
+    assert js == "const a='x  // y';let b=`${a}  /* z */`\nreturn b/2"
+    js = minify_js("function f(s) {\n    return / +x/.test(s) && typeof /a b/ && obj.return / 2\n}\n")
+    assert js == "function f(s){return/ +x/.test(s)&&typeof/a b/&&obj.return/2}"
+    css = minify_css('/* header */\n.a > .b:hover {\n    content: "  ;  ";\n    margin: 0 auto;\n}\n')
+    assert css == '.a>.b:hover{content:"  ;  ";margin:0 auto}'
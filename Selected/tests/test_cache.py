@@ -0,0 +1,247 @@
+"""
+Tests for the worker-shared cache and its use by the service layer.
+The Redis backend runs against a local stand-in speaking the Redis protocol;
+set CACHE_TEST_REDIS_URL=redis://localhost:6379/15 to use a real server.
+"""
+import multiprocessing
+import os
+import socketserver
+import threading
+import time
+import pytest
+from app import create_app
+from config import TestConfig
+from models import db, Task, User
+from cache import LocalCache, RedisCache, SharedMemoryCache, create_cache
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """The Redis commands the cache uses, on a dict, for one test."""
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self):
+        self.data = {}  # key -> (value, expiry or None)
+        self.password = None
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), RespHandler)
+    
+    def live(self, key):
+        value, expiry = self.data.get(key, (None, None))
+        if expiry is not None and expiry <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            with self.server.lock:
+                self.wfile.write(self.execute(args[0].upper().decode(), args[1:]))
+    
+    def execute(self, command, args):
+        server = self.server
+        if command == 'AUTH' and args[-1].decode() != server.password:
+            return b'-WRONGPASS invalid username-password pair\r\n'
+        if command in ('PING', 'SELECT', 'AUTH'):
+            return b'+OK\r\n'
+        if command == 'GET':
+            value = server.live(args[0])
+            return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+        if command == 'SET':
+            options = [arg.upper() for arg in args[2:]]
+            if b'NX' in options and server.live(args[0]) is not None:
+                return b'$-1\r\n'
+            expiry = time.time() + int(options[options.index(b'PX') + 1]) / 1000 if b'PX' in options else None
+            server.data[args[0]] = (args[1], expiry)
+            return b'+OK\r\n'
+        if command == 'DEL':
+            return b':%d\r\n' % sum(server.data.pop(key, None) is not None for key in args)
+        if command == 'SCAN':
+            prefix = args[args.index(b'MATCH') + 1].rstrip(b'*')
+            keys = [key for key in server.data if key.startswith(prefix)]
+            return b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(keys) + b''.join(
+                b'$%d\r\n%s\r\n' % (len(key), key) for key in keys)
+        return b'-ERR unknown command\r\n'
+
+@pytest.fixture
+def redis_url():
+    """URL of a Redis-protocol server for the test."""
+    if os.environ.get('CACHE_TEST_REDIS_URL'):
+        yield os.environ['CACHE_TEST_REDIS_URL']
+        return
+    server = RespStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'redis://127.0.0.1:%d/0' % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(params=['memory', 'mmap', 'redis'])
+def cache(request, tmp_path):
+    """Each shared backend in turn, empty."""
+    if request.param == 'memory':
+        cache = LocalCache(prefix='test:')
+    elif request.param == 'mmap':
+        cache = create_cache(f'mmap://{tmp_path}/test.cache?slots=64&slot_size=4096', 'test')
+    else:
+        cache = create_cache(request.getfixturevalue('redis_url'), 'test')
+    cache.clear()
+    yield cache
+    cache.clear()
+
+def test_set_get_add_and_expire(cache):
+    """Test the basic operations behave alike on every backend."""
+    assert cache.get('missing') is None
+    cache.set('stats', {'total': 3, 'tags': ['a']})
+    assert cache.get('stats') == {'total': 3, 'tags': ['a']}
+    assert cache.add('stats', {}) is False
+    assert cache.add('other', None) is True
+    assert cache.get('other', 'default') is None
+    cache.delete('stats')
+    assert cache.get('stats') is None
+    
+    cache.set('brief', 1, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get('brief') is None
+    assert cache.add('brief', 2) is True
+
+def test_generations_make_old_keys_unreachable(cache):
+    """Test invalidate() changes the keys of everything that depends on a name."""
+    key = cache.key('tasks', 'stats', depends_on=('tasks',))
+    assert cache.key('tasks', 'stats', depends_on=('tasks',)) == key
+    cache.set(key, 1)
+    users_key = cache.key('users', depends_on=('users',))
+    cache.invalidate('tasks')
+    assert cache.key('tasks', 'stats', depends_on=('tasks',)) != key
+    assert cache.key('users', depends_on=('users',)) == users_key
+
+def test_get_or_set_computes_once_under_concurrency(cache):
+    """Test concurrent misses for one key run the expensive fill once."""
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'total': 42}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('stats', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{'total': 42}] * 8
+    assert len(calls) == 1
+    assert cache.get_or_set('stats', compute) == {'total': 42}
+    assert len(calls) == 1
+
+def test_local_cache_evicts_least_recently_used():
+    """Test the in-process backend keeps at most max_entries."""
+    cache = LocalCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+
+def _fill_in_child(path):
+    cache = SharedMemoryCache(path, slots=64, slot_size=4096)
+    cache.set('from-child', {'pid': os.getpid()})
+    cache.get_or_set('shared', lambda: 'child')
+
+def test_shared_memory_cache_is_seen_by_other_processes(tmp_path):
+    """Test a value written by another process is read here, and oversized values are skipped."""
+    path = str(tmp_path / 'shared.cache')
+    cache = SharedMemoryCache(path, slots=64, slot_size=4096)
+    cache.set('before-fork', 1)
+    child = multiprocessing.get_context('fork').Process(target=_fill_in_child, args=(path,))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    assert cache.get('from-child')['pid'] == child.pid
+    assert cache.get_or_set('shared', lambda: 'parent') == 'child'
+    
+    cache.set('large', 'x' * 5000)
+    assert cache.get('large') is None
+    cache.set('compressible', 'y' * 50000)
+    assert cache.get('compressible') == 'y' * 50000
+    assert cache.get('before-fork') == 1
+
+def test_unreachable_redis_falls_back_to_computing():
+    """Test a down cache server makes requests slower, not failed."""
+    cache = RedisCache('127.0.0.1', 1, timeout=0.2)
+    assert cache.get('stats') is None
+    assert cache.get_or_set('stats', lambda: 7) == 7
+
+def test_rejected_login_falls_back_to_computing():
+    """Test an error reply to AUTH is treated like an unreachable server."""
+    server = RespStandIn()
+    server.password = 'secret'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        cache = RedisCache(*server.server_address, password='wrong', timeout=0.2)
+        assert cache.get('stats') is None
+        assert cache.get_or_set('stats', lambda: 7) == 7
+        assert RedisCache(*server.server_address, password='secret').add('stats', 1) is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def app():
+    """Create application with a user and a few tasks."""
+    app = create_app(TestConfig)
+    
+    with app.app_context():
+        db.create_all()
+        user = User(username='alice', email='alice@example.com')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(Task(title=f'Task {i}', assigned_to=user.id) for i in range(3))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+def test_cached_reads_are_invalidated_by_writes(client, app, max_queries):
+    """Test repeat reads skip the database until a commit writes a table they read."""
+    first = client.get('/api/tasks?include=assignee').get_json()
+    users = client.get('/api/users').get_json()
+    with max_queries(0):
+        assert client.get('/api/tasks?include=assignee').get_json() == first
+        assert client.get('/api/users').get_json() == users
+    
+    # PATCH writes with a Core UPDATE rather than a flush
+    client.patch('/api/tasks/1', json={'status': 'completed'})
+    assert client.get('/api/tasks?include=assignee').get_json()[0]['status'] == 'completed'
+    
+    client.post('/api/users', json={'username': 'bob', 'email': 'bob@example.com'})
+    assert [user['username'] for user in client.get('/api/users').get_json()] == ['alice', 'bob']
+    db.session.get(User, 1).username = 'alicia'
+    db.session.commit()
+    assert client.get('/api/tasks?include=assignee').get_json()[0]['assignee']['username'] == 'alicia'
+
+def test_dashboard_stats_follow_writes(client, app):
+    """Test cached stats change once a task is added, and not on a rollback."""
+    from services.task_service import TaskService
+    with app.test_request_context():
+        assert TaskService.get_task_stats()['total'] == 3
+        db.session.add(Task(title='Rolled back'))
+        db.session.flush()
+        db.session.rollback()
+        assert TaskService.get_task_stats()['total'] == 3
+    client.post('/api/tasks', json={'title': 'Another'})
+    with app.test_request_context():
+        assert TaskService.get_task_stats() == {'total': 4, 'pending': 4, 'in_progress': 0, 'completed': 0}
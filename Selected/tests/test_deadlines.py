@@ -0,0 +1,43 @@
+"""
+Tests for the batched deadline notifications.
+"""
+import pytest
+from datetime import datetime, timedelta
+import deadlines
+from deadlines import deadline_notifications
+
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    """Run each test with NumPy (when installed) and with the plain loop."""
+    if request.param == 'python':
+        monkeypatch.setattr(deadlines, 'np', None)
+    elif deadlines.np is None:
+        pytest.skip('numpy is not installed')
+    return request.param
+
+@pytest.mark.parametrize('remaining, message', [
+    (timedelta(days=2, hours=3), 'is due in 2 day(s)'),
+    (timedelta(hours=5, minutes=10, seconds=30), 'is due in 5 hour(s), 10 minute(s)'),
+    (timedelta(hours=5, seconds=30), 'is due in 5 hour(s)'),
+    (timedelta(minutes=3, seconds=7), 'is due in 3 minute(s), 7 second(s)'),
+    (timedelta(minutes=3), 'is due in 3 minute(s)'),
+    (timedelta(seconds=9, microseconds=999999), 'is due in 9 second(s)'),
+    (timedelta(microseconds=999999), 'is overdue!'),
+    (-timedelta(hours=1), 'is overdue!'),
+])
+def test_message_buckets(engine, remaining, message):
+    """Test each bucket picks its template and matches timedelta arithmetic."""
+    (notification,) = deadline_notifications([(1, 'Report', NOW + remaining)], now=NOW)
+    assert notification['message'] == f'Task "Report" {message}'
+    assert notification['total_seconds'] == int(remaining.total_seconds())
+    assert notification['days_until'] == remaining.days
+
+def test_iso_strings_kept_and_bad_dates_skipped(engine):
+    """Test string due dates are parsed in a batch and echoed back unchanged."""
+    due = (NOW + timedelta(hours=2)).isoformat()
+    notifications = deadline_notifications([(1, 'A', due), (2, 'B', 'not a date'), (3, 'C', due + 'Z')], now=NOW)
+    assert [n['task_id'] for n in notifications] == [1, 3]
+    assert notifications[0]['due_date'] == due
+    assert notifications[1]['hours_until'] == 2
@@ -0,0 +1,58 @@
+"""
+Tests for the database engine performance profiles.
+"""
+import pytest
+from sqlalchemy import text
+from app import create_app
+from config import Config
+from database.engine import engine_options, normalize_database_uri
+from models import db
+
+def make_config(uri, profile):
+    """Build a config class for a database URI and profile."""
+    class ProfileConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = uri
+        DB_PROFILE = profile
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options(uri, profile)
+    return ProfileConfig
+
+def test_throughput_profile_applies_pragmas(tmp_path):
+    """Test every new connection gets the throughput pragmas."""
+    app = create_app(make_config(f'sqlite:///{tmp_path / "perf.db"}', 'throughput'))
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            assert conn.execute(text('PRAGMA cache_size')).scalar() == -65536
+            assert conn.execute(text('PRAGMA temp_store')).scalar() == 2  # MEMORY
+        assert db.engine.pool.size() == 10
+        db.engine.dispose()
+
+def test_dev_profile_keeps_stock_journal(tmp_path):
+    """Test the dev profile leaves the rollback journal in place."""
+    app = create_app(make_config(f'sqlite:///{tmp_path / "dev.db"}', 'dev'))
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        db.engine.dispose()
+
+def test_memory_database_skips_pool_sizing():
+    """Test in-memory SQLite gets no pool size options."""
+    options = engine_options('sqlite:///:memory:', 'throughput')
+    assert 'pool_size' not in options
+
+def test_unknown_profile_rejected():
+    """Test an unknown profile name raises ValueError."""
+    with pytest.raises(ValueError):
+        engine_options('sqlite:///x.db', 'turbo')
+
+def test_postgres_options_are_dialect_aware():
+    """Test PostgreSQL URIs get pooled, pre-pinged connections and no SQLite args."""
+    options = engine_options('postgres://app@localhost/task_manager', 'throughput')
+    assert options['pool_pre_ping'] is True
+    assert options['pool_size'] == 10
+    assert 'connect_args' not in options
+    assert normalize_database_uri('postgres://app@db/tm') == 'postgresql://app@db/tm'
@@ -0,0 +1,83 @@
+"""
+Tests for response compression and conditional GETs.
+"""
+import gzip
+import pytest
+from app import create_app
+from config import TestConfig
+from models import db, Task, ActivityLog
+import http_cache
+
+@pytest.fixture
+def app():
+    """Create application with enough tasks for a compressible list."""
+    app = create_app(TestConfig)
+    
+    with app.app_context():
+        db.create_all()
+        for i in range(30):
+            task = Task(title=f'Task {i}', description='Write the quarterly report ' * 3)
+            db.session.add(task)
+            db.session.flush()
+            db.session.add(ActivityLog(task_id=task.id, action='created', description=f'Task {i} created'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+def test_large_json_is_gzipped_when_accepted(client, monkeypatch):
+    """Test gzip is negotiated and small or unaccepted responses stay plain."""
+    monkeypatch.setattr(http_cache, 'brotli', None)
+    plain = client.get('/api/tasks')
+    assert 'Content-Encoding' not in plain.headers
+    
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == plain.data
+    assert len(response.data) < len(plain.data) / 3
+    assert response.headers['ETag'].startswith('W/')
+    
+    small = client.get('/api/tasks/1?fields=title', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+@pytest.mark.skipif(http_cache.brotli is None, reason='Brotli not installed')
+def test_brotli_preferred_when_available(client):
+    """Test br wins over gzip at equal quality but not when the client ranks it lower."""
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert http_cache.brotli.decompress(response.data) == client.get('/api/tasks').data
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip;q=1.0, br;q=0.5'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+def test_task_list_revalidates_with_one_query(client, app, max_queries):
+    """Test an unchanged list answers 304 from the aggregate query alone."""
+    first = client.get('/api/tasks?fields=title')
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+    
+    with max_queries(1):
+        response = client.get('/api/tasks?fields=title', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.get('/api/tasks?fields=status', headers={'If-None-Match': etag}).status_code == 200
+    
+    client.patch('/api/tasks/3', json={'status': 'completed'})
+    changed = client.get('/api/tasks?fields=title', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    
+    client.delete('/api/tasks/4')
+    assert client.get('/api/tasks?fields=title', headers={'If-None-Match': changed.headers['ETag']}).status_code == 200
+
+def test_activity_revalidates_until_new_entries(client):
+    """Test the activity page is cached until an entry is added."""
+    etag = client.get('/api/activity').headers['ETag']
+    assert client.get('/api/activity', headers={'If-None-Match': etag}).status_code == 304
+    client.put('/api/tasks/1', json={'status': 'in_progress'})
+    assert client.get('/api/activity', headers={'If-None-Match': etag}).status_code == 200
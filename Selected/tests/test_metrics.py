@@ -0,0 +1,44 @@
+"""
+Tests for the /metrics endpoint and request instrumentation.
+"""
+import pytest
+from app import create_app
+from config import TestConfig
+from metrics import REGISTRY, track_outbound
+from models import db, User
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+def test_metrics_exposes_route_latency_and_status(client):
+    """Test requests show up as counters and latency histograms."""
+    client.get('/api/tasks')
+    client.get('/api/tasks/999')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{service="monolith"' in body
+    assert 'method="GET",route="/api/tasks",status="200"}' in body
+    assert 'route="/api/tasks/<int:task_id>",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{' in body
+    assert 'le="+Inf"}' in body
+
+def test_metrics_counts_sql_per_request(client):
+    """Test SQL statements are counted against the route that ran them."""
+    before = REGISTRY.db_queries_total.values.get(('/api/users',), 0)
+    db.session.add(User(username='metrics', email='metrics@example.com'))
+    db.session.commit()
+    client.get('/api/users')
+    assert REGISTRY.db_queries_total.values[('/api/users',)] - before >= 1
+    assert 'db_queries_per_request_count{' in client.get('/metrics').get_data(as_text=True)
+
+def test_track_outbound_records_target_and_status():
+    """Test outbound calls are timed per target host."""
+    with track_outbound('http://user-service:5002') as call:
+        call['status'] = 200
+    assert REGISTRY.outbound_duration.values[('user-service:5002', '200')]['count'] >= 1
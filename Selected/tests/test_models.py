@@ -4,18 +4,18 @@ Unit tests for data models.
 import pytest
 from datetime import datetime
 from app import create_app
+from config import TestConfig
 from models import db, User, Task, ActivityLog
 
 @pytest.fixture
 def app():
     """Create application for testing."""
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app(TestConfig)
     
     with app.app_context():
         db.create_all()
         yield app
+        db.session.remove()
         db.drop_all()
 
 @pytest.fixture
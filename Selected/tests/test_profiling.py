@@ -0,0 +1,92 @@
+"""
+Tests for token-gated request profiling.
+"""
+import time
+import pytest
+from app import create_app
+from config import TestConfig
+from models import db
+
+class ProfilingConfig(TestConfig):
+    PROFILING_TOKEN = 'secret'
+    PROFILER = 'cprofile'
+    PROFILE_KEEP = 2
+
+@pytest.fixture
+def client():
+    """Create test client with profiling enabled."""
+    app = create_app(ProfilingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+def test_profiling_disabled_without_token():
+    """Test nothing is exposed when PROFILING_TOKEN is unset."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        response = client.get('/api/tasks', headers={'X-Profile-Token': 'secret'})
+        assert 'X-Profile-Id' not in response.headers
+        assert client.get('/debug/profiles').status_code == 404
+        db.session.remove()
+        db.drop_all()
+
+def test_token_request_is_profiled(client):
+    """Test a request with the token header is profiled and retrievable."""
+    response = client.get('/api/tasks', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    
+    listing = client.get('/debug/profiles?_profile=secret').get_json()
+    assert listing[0]['route'] == '/api/tasks'
+    assert listing[0]['trigger'] == 'token'
+    assert listing[0]['profiler'] == 'cprofile'
+    
+    report = client.get(f'/debug/profiles/{profile_id}', headers={'X-Profile-Token': 'secret'})
+    assert report.status_code == 200
+    assert 'GET /api/tasks -> 200' in report.get_data(as_text=True)
+    assert 'get_tasks' in report.get_data(as_text=True)
+
+def test_wrong_token_is_ignored(client):
+    """Test a bad token neither profiles nor reveals profiles."""
+    response = client.get('/api/tasks', headers={'X-Profile-Token': 'wrong'})
+    assert 'X-Profile-Id' not in response.headers
+    assert client.get('/debug/profiles', headers={'X-Profile-Token': 'wrong'}).status_code == 404
+
+def _sampling_app(rate):
+    """App sampling that fraction of requests, with one slow route."""
+    class SamplingConfig(ProfilingConfig):
+        PROFILE_SAMPLE_RATE = rate
+    app = create_app(SamplingConfig)
+    
+    @app.route('/slow')
+    def slow():
+        time.sleep(0.05)
+        return 'done'
+    
+    return app
+
+@pytest.mark.parametrize('rate', [0, 1])
+def test_sampled_requests_keep_slowest(rate):
+    """Test PROFILE_SAMPLE_RATE picks the requests profiled and only the slowest
+    PROFILE_KEEP of them are kept."""
+    app = _sampling_app(rate)
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        responses = [client.get(path) for path in ('/api/tasks', '/slow', '/api/users', '/api/tasks')]
+        entries = app.extensions['profiling'].entries()
+        db.session.remove()
+        db.drop_all()
+    
+    if rate == 0:
+        assert not any('X-Profile-Id' in response.headers for response in responses)
+        assert entries == []
+    else:
+        assert all('X-Profile-Id' in response.headers for response in responses)
+        assert len(entries) == 2
+        assert {entry['trigger'] for entry in entries} == {'sample'}
+        assert '/slow' in [entry['path'] for entry in entries]
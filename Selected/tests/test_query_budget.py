@@ -0,0 +1,116 @@
+"""
+Query budgets per endpoint, guarding against N+1 regressions.
+"""
+import logging
+import pytest
+from datetime import datetime, timedelta
+from app import create_app
+from config import TestConfig
+from database.querycount import QueryBudgetExceeded, count_queries, query_budget
+from models import db, User, Task, ActivityLog
+
+@pytest.fixture
+def app():
+    """Create application with a few users, tasks and activity entries."""
+    app = create_app(TestConfig)
+    
+    with app.app_context():
+        db.create_all()
+        users = [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(5)]
+        db.session.add_all(users)
+        db.session.flush()
+        for i in range(20):
+            task = Task(title=f'Task {i}', assigned_to=users[i % 5].id,
+                        due_date=datetime.utcnow() + timedelta(days=i % 10))
+            db.session.add(task)
+            db.session.flush()
+            db.session.add(ActivityLog(task_id=task.id, action='created', description=f'Task {i} created'))
+        db.session.commit()
+        db.session.expunge_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+@pytest.mark.parametrize('path, budget', [
+    ('/api/tasks', 1),
+    ('/tasks', 2),
+    ('/calendar', 1),
+    ('/', 3),
+    ('/export/csv', 1),
+    ('/api/users', 1),
+    ('/api/activity', 1),
+])
+def test_endpoint_query_budget(client, max_queries, path, budget):
+    """Test read endpoints don't issue a query per row."""
+    with max_queries(budget):
+        response = client.get(path)
+        response.get_data()
+    assert response.status_code == 200
+
+def test_budget_violation_lists_statements():
+    """Test exceeding the budget fails with the offending statements."""
+    @query_budget(1)
+    def two_queries():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.execute(db.text('SELECT 2'))
+    
+    app = create_app(TestConfig)
+    with app.app_context():
+        with pytest.raises(QueryBudgetExceeded) as excinfo:
+            two_queries()
+    assert 'got 2' in str(excinfo.value)
+    assert 'SELECT 2' in str(excinfo.value)
+
+def test_count_queries_records_statements(app):
+    """Test the counter sees each statement."""
+    with count_queries() as counter:
+        db.session.get(Task, 1)
+    assert counter.count == 1
+    assert counter.statements[0][0].startswith('SELECT')
+
+def test_slow_query_log_includes_route(caplog):
+    """Test statements over the threshold are logged with their route."""
+    class SlowConfig(TestConfig):
+        SLOW_QUERY_THRESHOLD_MS = 1e-6
+    
+    app = create_app(SlowConfig)
+    with app.app_context():
+        db.create_all()
+        with caplog.at_level(logging.WARNING, logger=app.logger.name):
+            app.test_client().get('/api/tasks')
+        db.session.remove()
+        db.drop_all()
+    
+    messages = [record.getMessage() for record in caplog.records]
+    assert any('Slow query' in m and 'route /api/tasks' in m and 'FROM tasks' in m for m in messages)
+
+def test_sparse_fieldsets_narrow_the_select(client):
+    """Test ?fields= drops unrequested columns from the SQL and the response."""
+    with count_queries() as counter:
+        tasks = client.get('/api/tasks?fields=title,status').get_json()
+    assert counter.count == 1
+    select_list = counter.statements[0][0].split(' FROM ')[0]
+    assert 'tasks.title' in select_list and 'tasks.description' not in select_list
+    assert 'users' not in counter.statements[0][0]
+    assert set(tasks[0]) == {'id', 'title', 'status'}
+    
+    with count_queries() as counter:
+        tasks = client.get('/api/tasks?fields=title&include=assignee').get_json()
+    assert counter.count == 1
+    assert tasks[0]['assignee'] == {'id': tasks[0]['assignee']['id'], 'username': 'user0', 'email': 'user0@example.com'}
+    
+    task = client.get('/api/tasks/1?fields=due_date,assigned_to_username')
+    assert set(task.get_json()) == {'id', 'due_date', 'assigned_to_username'}
+    assert task.headers['ETag'] == '"task-1-v1"'
+    
+    assert client.get('/api/users?fields=username').get_json()[0] == {'id': 1, 'username': 'user0'}
+    assert set(client.get('/api/activity?fields=action,created_at').get_json()[0]) == {'id', 'action', 'created_at'}
+    
+    response = client.get('/api/tasks?fields=title,secret')
+    assert response.status_code == 400
+    assert b'secret' in response.data
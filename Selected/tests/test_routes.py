@@ -3,19 +3,20 @@ Integration tests for routes.
 """
 import pytest
 import json
+from datetime import datetime
 from app import create_app
+from config import TestConfig
 from models import db, User, Task
 
 @pytest.fixture
 def app():
     """Create application for testing."""
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app(TestConfig)
     
     with app.app_context():
         db.create_all()
         yield app
+        db.session.remove()
         db.drop_all()
 
 @pytest.fixture
@@ -54,3 +55,185 @@ def test_create_task(client, app):
         data = json.loads(response.data)
         assert data['title'] == 'New Task'
 
+
+def test_export_csv_streams_all_tasks(client, app):
+    """Test GET /export/csv streams every task with its assignee."""
+    with app.app_context():
+        user = User(username='exporter', email='exporter@example.com')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([Task(title=f'Task {i}', assigned_to=user.id) for i in range(1200)])
+        db.session.commit()
+    
+    response = client.get('/export/csv')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'].startswith('attachment; filename=tasks_export_')
+    rows = response.get_data(as_text=True).strip().splitlines()
+    assert len(rows) == 1201
+    assert rows[1].startswith('1,Task 0,')
+    assert ',exporter,' in rows[1]
+
+def test_update_task_with_matching_if_match(client, app):
+    """Test PUT with the current ETag applies and returns the next version."""
+    with app.app_context():
+        task = Task(title='Versioned')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    
+    etag = client.get(f'/api/tasks/{task_id}').headers['ETag']
+    assert etag == f'"task-{task_id}-v1"'
+    
+    response = client.put(f'/api/tasks/{task_id}', json={'status': 'in_progress'},
+                          headers={'If-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+    assert response.headers['ETag'] == f'"task-{task_id}-v2"'
+
+def test_update_task_with_stale_version_conflicts(client, app):
+    """Test PUT with an outdated ETag or version gets 409 and changes nothing."""
+    with app.app_context():
+        task = Task(title='Versioned')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    
+    stale = client.get(f'/api/tasks/{task_id}').headers['ETag']
+    assert client.put(f'/api/tasks/{task_id}', json={'title': 'First'}).status_code == 200
+    
+    response = client.put(f'/api/tasks/{task_id}', json={'title': 'Second'},
+                          headers={'If-Match': stale})
+    assert response.status_code == 409
+    data = response.get_json()
+    assert data['task']['title'] == 'First'
+    assert data['task']['version'] == 2
+    
+    response = client.put(f'/api/tasks/{task_id}', json={'title': 'Second', 'version': 1})
+    assert response.status_code == 409
+    assert client.get(f'/api/tasks/{task_id}').get_json()['title'] == 'First'
+    
+    response = client.put(f'/api/tasks/{task_id}', json={'title': 'Second', 'version': 'abc'})
+    assert response.status_code == 400
+
+def test_concurrent_write_raises_version_conflict(tmp_path):
+    """Test the UPDATE is conditional on the version that was read."""
+    from sqlalchemy.orm import Session
+    from database.engine import engine_options
+    from database.repositories import TaskRepository, VersionConflict
+    
+    uri = f'sqlite:///{tmp_path / "occ.db"}'
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options(uri)
+    
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        task = Task(title='Versioned')
+        db.session.add(task)
+        db.session.commit()
+        assert task.version == 1
+        
+        # Another worker commits an update after this one read the row
+        with Session(db.engine) as other:
+            theirs = other.get(Task, task.id)
+            theirs.title = 'Theirs'
+            other.commit()
+        
+        with pytest.raises(VersionConflict):
+            TaskRepository.update(task, title='Mine')
+        assert db.session.get(Task, task.id).title == 'Theirs'
+        db.session.remove()
+
+def test_patch_task_updates_only_sent_columns(client, app):
+    """Test PATCH changes one column without loading the task and logs the diff."""
+    from database.querycount import count_queries
+    with app.app_context():
+        task = Task(title='Patch me', description='Keep me', status='pending')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    
+    with count_queries() as counter:
+        response = client.patch(f'/api/tasks/{task_id}', json={'status': 'in_progress'})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data == {'id': task_id, 'status': 'in_progress', 'version': 2, 'updated_at': data['updated_at']}
+    assert response.headers['ETag'] == f'"task-{task_id}-v2"'
+    
+    # Only the patched column and version are read; the row is never hydrated
+    selects = [statement for statement, _ in counter.statements if statement.startswith('SELECT')]
+    assert all('tasks.title' not in statement for statement in selects)
+    assert len([s for s, _ in counter.statements if s.startswith('UPDATE tasks')]) == 1
+    
+    task = client.get(f'/api/tasks/{task_id}').get_json()
+    assert task['status'] == 'in_progress'
+    assert task['description'] == 'Keep me'
+    activity = client.get('/api/activity').get_json()
+    assert activity[0]['description'] == 'status was changed from pending to in_progress'
+
+def test_patch_task_conflict_and_missing(client, app):
+    """Test PATCH honours If-Match and 404s for unknown tasks."""
+    with app.app_context():
+        task = Task(title='Patch me')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    
+    assert client.patch(f'/api/tasks/{task_id}', json={'priority': 'high'}).status_code == 200
+    response = client.patch(f'/api/tasks/{task_id}', json={'priority': 'low'},
+                            headers={'If-Match': f'"task-{task_id}-v1"'})
+    assert response.status_code == 409
+    assert response.get_json()['task']['priority'] == 'high'
+    assert client.patch('/api/tasks/9999', json={'status': 'completed'}).status_code == 404
+    assert client.patch(f'/api/tasks/{task_id}', json={'bogus': 1}).status_code == 400
+    assert client.patch(f'/api/tasks/{task_id}', json={'due_date': 'garbage'}).status_code == 400
+
+def test_patch_task_clears_due_date_with_empty_value(client, app):
+    """Test PATCH treats an empty due_date as clearing it, like PUT."""
+    with app.app_context():
+        task = Task(title='Dated', due_date=datetime(2030, 1, 2))
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    
+    response = client.patch(f'/api/tasks/{task_id}', json={'due_date': ''})
+    assert response.status_code == 200
+    assert response.get_json()['due_date'] is None
+    assert client.get(f'/api/tasks/{task_id}').get_json()['due_date'] is None
+
+def test_user_search_matches_prefixes_ignoring_case(client, app):
+    """Test /api/users/search matches username or email prefixes through the lower() indexes."""
+    from sqlalchemy import text
+    from database.repositories import UserRepository
+    with app.app_context():
+        for username, email in [('Alice', 'alice@example.com'), ('alfred', 'fred@corp.example'),
+                                ('bob', 'Al.bob@example.com'), ('al_x', 'x@example.com'), ('carol', 'carol@example.com')]:
+            db.session.add(User(username=username, email=email))
+        db.session.commit()
+        
+        plan = ' '.join(row[-1] for row in db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM users WHERE lower(username) >= 'al' AND lower(username) < 'am'")))
+        assert 'ix_users_username_lower' in plan
+        assert UserRepository.get_by_username('ALICE').username == 'Alice'
+        assert UserRepository.get_by_email('CAROL@example.com').username == 'carol'
+    
+    names = [user['username'] for user in client.get('/api/users/search?q=AL').get_json()]
+    assert names == ['Alice', 'al_x', 'alfred', 'bob']
+    assert [user['username'] for user in client.get('/api/users/search?q=al_').get_json()] == ['al_x']
+    assert client.get('/api/users/search?q=al&limit=2&fields=username').get_json() == [
+        {'id': 1, 'username': 'Alice'}, {'id': 4, 'username': 'al_x'}]
+    assert len(client.get('/api/users/search').get_json()) == 5
+    assert client.get('/api/users/search?q=zed').get_json() == []
+
+def test_user_lookups_find_non_ascii_names(client, app):
+    """Test names SQLite's ASCII-only lower() leaves alone are still found."""
+    from database.repositories import UserRepository
+    with app.app_context():
+        db.session.add(User(username='Éric', email='Éric@example.com'))
+        db.session.commit()
+        assert UserRepository.get_by_username('Éric').username == 'Éric'
+        assert UserRepository.get_by_username('ÉRIC').username == 'Éric'
+        assert UserRepository.get_by_email('Éric@EXAMPLE.com').username == 'Éric'
+    assert [user['username'] for user in client.get('/api/users/search?q=É').get_json()] == ['Éric']
@@ -0,0 +1,68 @@
+"""
+Tests for read/write routing between the primary and a read replica.
+"""
+import pytest
+from app import create_app
+from config import Config
+from models import db, User, Task
+from database.repositories import TaskRepository, UserRepository
+
+@pytest.fixture
+def app(tmp_path):
+    """Create an app whose reads go to a second SQLite file."""
+    primary = f'sqlite:///{tmp_path / "primary.db"}'
+    replica = f'sqlite:///{tmp_path / "replica.db"}'
+    
+    class ReplicaConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = primary
+        SQLALCHEMY_READ_DATABASE_URI = replica
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        read_engine = app.extensions['read_replica']['engine']
+        db.metadata.create_all(read_engine)
+        with read_engine.begin() as conn:
+            conn.execute(Task.__table__.insert(), [{'title': 'Replica Task', 'status': 'pending'}])
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+        app.extensions['read_replica']['engine'].dispose()
+
+def test_reads_use_replica(app):
+    """Test read methods are served by the replica."""
+    with app.test_request_context():
+        tasks = TaskRepository.get_all()
+        assert [task.title for task in tasks] == ['Replica Task']
+
+def test_reads_stick_to_primary_after_write(app):
+    """Test a write in the same request pins later reads to the primary."""
+    with app.test_request_context():
+        TaskRepository.create(title='Primary Task')
+        tasks = TaskRepository.get_all()
+        assert [task.title for task in tasks] == ['Primary Task']
+    
+    with app.test_request_context():
+        assert [task.title for task in TaskRepository.get_all()] == ['Replica Task']
+
+def test_read_only_uri(tmp_path):
+    """Test a read-only SQLite URI against the primary file works for reads."""
+    path = tmp_path / 'shared.db'
+    
+    class ReadOnlyConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLALCHEMY_READ_DATABASE_URI = f'sqlite:///file:{path}?mode=ro&uri=true'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    
+    app = create_app(ReadOnlyConfig)
+    with app.app_context():
+        db.create_all()
+        UserRepository.create(username='writer', email='writer@example.com')
+    with app.test_request_context():
+        assert [user.username for user in UserRepository.get_all()] == ['writer']
+    with app.app_context():
+        db.engine.dispose()
+        app.extensions['read_replica']['engine'].dispose()
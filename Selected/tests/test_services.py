@@ -4,19 +4,19 @@ Unit tests for service layer.
 import pytest
 from datetime import datetime, timedelta
 from app import create_app
+from config import TestConfig
 from models import db, User, Task
 from services.task_service import TaskService
 
 @pytest.fixture
 def app():
     """Create application for testing."""
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app(TestConfig)
     
     with app.app_context():
         db.create_all()
         yield app
+        db.session.remove()
         db.drop_all()
 
 def test_create_task(app):
@@ -52,3 +52,50 @@ def test_update_task(app):
         updated_task = TaskService.update_task(task.id, title='Updated Title')
         assert updated_task.title == 'Updated Title'
 
+
+def test_update_task_stores_structured_activity(app):
+    """Test updates record field changes as data without looking up users."""
+    from database.querycount import count_queries
+    from models import ActivityLog
+    with app.app_context():
+        alice = User(username='alice', email='alice@example.com')
+        bob = User(username='bob', email='bob@example.com')
+        db.session.add_all([alice, bob])
+        db.session.commit()
+        alice_id, bob_id = alice.id, bob.id
+        task = TaskService.create_task(title='Task', description='', assigned_to=alice_id)
+        due = datetime(2030, 1, 2, 15, 30)
+        
+        with count_queries() as counter:
+            TaskService.update_task(task.id, assigned_to=bob_id, due_date=due)
+        assert not any('FROM users' in statement for statement, _ in counter.statements)
+        
+        activity = ActivityLog.query.filter_by(action='updated').one()
+        assert activity.description is None
+        assert activity.details == [
+            {'field': 'assigned_to', 'old': alice_id, 'new': bob_id},
+            {'field': 'due_date', 'old': None, 'new': '2030-01-02T15:30:00'},
+        ]
+
+def test_activity_rendered_with_one_user_lookup(app):
+    """Test activity text is rendered at read time with batched usernames."""
+    from database.querycount import count_queries
+    from database.repositories import ActivityLogRepository
+    from services.activity_formatter import render_activities
+    with app.app_context():
+        users = [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(4)]
+        db.session.add_all(users)
+        db.session.commit()
+        task = TaskService.create_task(title='Task', description='')
+        for user in users:
+            TaskService.update_task(task.id, assigned_to=user.id)
+        TaskService.update_task(task.id, status='completed')
+        activities = ActivityLogRepository.get_recent(10)
+        
+        with count_queries() as counter:
+            descriptions = render_activities(activities)
+        assert counter.count == 1
+        assert descriptions[0] == 'status was changed from pending to completed'
+        assert descriptions[1] == 'assigned to was changed from user2 to user3'
+        assert descriptions[4] == 'assigned to was changed from not set to user0'
+        assert descriptions[-1] == 'Task "Task" was created'
@@ -0,0 +1,75 @@
+"""
+Tests for the in-memory task snapshot read model.
+"""
+import pytest
+from datetime import datetime, timedelta
+from app import create_app
+from config import TestConfig
+from database.snapshot import task_snapshot
+from models import db, User, Task
+
+class SnapshotConfig(TestConfig):
+    TASK_SNAPSHOT = True
+
+@pytest.fixture
+def app():
+    """Create application with the snapshot enabled and a few tasks."""
+    app = create_app(SnapshotConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='alice', email='alice@example.com')
+        db.session.add(user)
+        db.session.flush()
+        now = datetime.utcnow()
+        db.session.add_all([
+            Task(title='Soon', status='pending', due_date=now + timedelta(days=1), assigned_to=user.id),
+            Task(title='Done', status='completed', due_date=now + timedelta(days=2)),
+            Task(title='Undated', status='in_progress'),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+def test_snapshot_serves_stats_deadlines_and_calendar(app, client):
+    """Test the read-heavy views match the database without loading Task objects."""
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'1 of 3 tasks completed' in response.data
+    
+    notifications = client.get('/api/notifications').get_json()
+    assert [n['task_title'] for n in notifications] == ['Soon']
+    
+    response = client.get('/calendar')
+    assert response.status_code == 200
+    assert b'"assigned_to_username": "alice"' in response.data
+    assert b'Undated' not in response.data
+    assert task_snapshot().full_reloads == 1
+
+def test_snapshot_refreshes_incrementally_after_writes(app, client):
+    """Test updates are applied row by row and deletes force a reload."""
+    snapshot = task_snapshot()
+    assert snapshot.count_by_status() == {'pending': 1, 'completed': 1, 'in_progress': 1}
+    
+    task_id = Task.query.filter_by(title='Soon').one().id
+    assert client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'}).status_code == 200
+    client.post('/api/tasks', json={'title': 'New'})
+    assert snapshot.count_by_status() == {'pending': 1, 'completed': 2, 'in_progress': 1}
+    assert (snapshot.full_reloads, snapshot.incremental_refreshes) == (1, 1)
+    
+    assert client.delete(f'/api/tasks/{task_id}').status_code == 200
+    assert snapshot.count_by_status() == {'pending': 1, 'completed': 1, 'in_progress': 1}
+    assert snapshot.full_reloads == 2
+    assert len(snapshot) == 3
+
+def test_fresh_snapshot_costs_one_query(app, max_queries):
+    """Test an unchanged snapshot only checks the aggregate."""
+    snapshot = task_snapshot()
+    snapshot.refresh()
+    with max_queries(1):
+        assert snapshot.count_by_status()['pending'] == 1
@@ -0,0 +1,11 @@
+"""
+Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    uvicorn --interface wsgi --workers 4 wsgi:app
+"""
+import os
+from app import create_app
+from config import config_by_name
+
+app = create_app(config_by_name[os.environ.get('APP_ENV', 'production')])
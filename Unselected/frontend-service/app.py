@@ -4,41 +4,133 @@ Provides web interface for the microservices system.
 """
 from flask import Flask, render_template, request, jsonify, send_file
 from flask_cors import CORS
+from metrics import init_metrics, track_outbound
+from profiling import init_profiling
+from http_cache import init_compression
+from assets import init_assets
+from tracing import init_tracing, trace_outbound
+from deadlines import deadline_notifications
+from resilience import dependency, dependency_status
 import os
+import asyncio
+import httpx
+import json
 import requests
 import csv
 import io
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'frontend-service-secret-key')
+app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', 'true').lower() in ('1', 'true')
 CORS(app)
+init_metrics(app, service='frontend-service')
+init_tracing(app, service='frontend-service')
+init_profiling(app)
+init_compression(app)
+init_assets(app)
 
 # Service URLs
 TASK_SERVICE_URL = os.environ.get('TASK_SERVICE_URL', 'http://task-service:5000')
 USER_SERVICE_URL = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
 NOTIFICATION_SERVICE_URL = os.environ.get('NOTIFICATION_SERVICE_URL', 'http://notification-service:5001')
+SERVICE_NAMES = {
+    TASK_SERVICE_URL: 'task-service',
+    USER_SERVICE_URL: 'user-service',
+    NOTIFICATION_SERVICE_URL: 'notification-service',
+}
+
+# Fields each page asks the Task Service for (?fields= selects only those columns)
+DASHBOARD_TASK_FIELDS = 'status'
+DASHBOARD_ACTIVITY_FIELDS = 'action,description,created_at'
+TASK_LIST_FIELDS = 'title,description,status,priority,due_date,assigned_to'
+CALENDAR_TASK_FIELDS = 'title,description,status,priority,due_date,assigned_to,assigned_to_username'
+
+def guard(url):
+    """Circuit breaker and bulkhead for calls to the service at url (see resilience.py)."""
+    return dependency(SERVICE_NAMES.get(url, url)).guard()
+
+def guard_async(url):
+    """guard() for coroutines: calls over the limit from one request wait their turn."""
+    return dependency(SERVICE_NAMES.get(url, url)).guard_async()
+
+# Last validated body per service URL, revalidated with If-None-Match so an
+# unchanged list costs the service one cheap query and no body. Bodies are kept
+# as bytes and decoded per use, since pages modify the decoded data.
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+_response_cache = OrderedDict()  # full URL -> (ETag, body)
+_response_cache_lock = threading.Lock()
+
+def conditional_headers(full_url, headers):
+    """Add If-None-Match for the cached copy of full_url, if any."""
+    with _response_cache_lock:
+        cached = _response_cache.get(full_url)
+    if cached:
+        headers['If-None-Match'] = cached[0]
+    return headers
+
+def decode_response(full_url, response):
+    """JSON body of a 200 response, or of the cached copy on 304; None otherwise.
+    Remembers 200 responses that carry an ETag."""
+    with _response_cache_lock:
+        if response.status_code == 304 and full_url in _response_cache:
+            _response_cache.move_to_end(full_url)
+            return json.loads(_response_cache[full_url][1])
+        if response.status_code != 200:
+            return None
+        etag = response.headers.get('ETag')
+        if etag:
+            _response_cache[full_url] = (etag, response.content)
+            _response_cache.move_to_end(full_url)
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    return response.json()
 
 def get_from_service(url, endpoint):
-    """Helper to get data from a service."""
+    """Helper to get data from a service (compressed and revalidated, see above)."""
     try:
-        response = requests.get(f'{url}{endpoint}', timeout=5)
-        if response.status_code == 200:
-            return response.json()
-        return None
+        full_url = f'{url}{endpoint}'
+        with guard(url) as outcome, track_outbound(url) as call, trace_outbound('GET', full_url) as span:
+            response = requests.get(full_url, headers=conditional_headers(full_url, span.headers()), timeout=5)
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
+        return decode_response(full_url, response)
     except Exception as e:
         print(f"Error calling {url}{endpoint}: {e}")
         return None
 
+async def gather_from_services(*calls):
+    """Fetch several (url, endpoint) pairs concurrently.
+    Returns the decoded JSON bodies in order, with None for failed calls."""
+    async with httpx.AsyncClient(timeout=5) as client:
+        async def fetch(url, endpoint):
+            try:
+                full_url = f'{url}{endpoint}'
+                async with guard_async(url) as outcome:
+                    with track_outbound(url) as call, trace_outbound('GET', full_url) as span:
+                        response = await client.get(full_url, headers=conditional_headers(full_url, span.headers()))
+                        call['status'] = outcome['status'] = response.status_code
+                        span.set_attribute('http.status_code', response.status_code)
+                return decode_response(full_url, response)
+            except Exception as e:
+                print(f"Error calling {url}{endpoint}: {e}")
+                return None
+        return await asyncio.gather(*(fetch(url, endpoint) for url, endpoint in calls))
+
 def post_to_service(url, endpoint, data):
     """Helper to post data to a service."""
     try:
-        response = requests.post(
-            f'{url}{endpoint}',
-            json=data,
-            headers={'Content-Type': 'application/json'},
-            timeout=5
-        )
+        with guard(url) as outcome, track_outbound(url) as call, trace_outbound('POST', f'{url}{endpoint}') as span:
+            response = requests.post(
+                f'{url}{endpoint}',
+                json=data,
+                headers={'Content-Type': 'application/json', **span.headers()},
+                timeout=5
+            )
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
         return response
     except Exception as e:
         print(f"Error calling {url}{endpoint}: {e}")
@@ -47,12 +139,32 @@ def post_to_service(url, endpoint, data):
 def put_to_service(url, endpoint, data):
     """Helper to put data to a service."""
     try:
-        response = requests.put(
-            f'{url}{endpoint}',
-            json=data,
-            headers={'Content-Type': 'application/json'},
-            timeout=5
-        )
+        with guard(url) as outcome, track_outbound(url) as call, trace_outbound('PUT', f'{url}{endpoint}') as span:
+            response = requests.put(
+                f'{url}{endpoint}',
+                json=data,
+                headers={'Content-Type': 'application/json', **span.headers()},
+                timeout=5
+            )
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
+        return response
+    except Exception as e:
+        print(f"Error calling {url}{endpoint}: {e}")
+        return None
+
+def patch_to_service(url, endpoint, data):
+    """Helper to patch data on a service."""
+    try:
+        with guard(url) as outcome, track_outbound(url) as call, trace_outbound('PATCH', f'{url}{endpoint}') as span:
+            response = requests.patch(
+                f'{url}{endpoint}',
+                json=data,
+                headers={'Content-Type': 'application/json', **span.headers()},
+                timeout=5
+            )
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
         return response
     except Exception as e:
         print(f"Error calling {url}{endpoint}: {e}")
@@ -61,78 +173,34 @@ def put_to_service(url, endpoint, data):
 def delete_from_service(url, endpoint):
     """Helper to delete from a service."""
     try:
-        response = requests.delete(f'{url}{endpoint}', timeout=5)
+        with guard(url) as outcome, track_outbound(url) as call, trace_outbound('DELETE', f'{url}{endpoint}') as span:
+            response = requests.delete(f'{url}{endpoint}', headers=span.headers(), timeout=5)
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
         return response
     except Exception as e:
         print(f"Error calling {url}{endpoint}: {e}")
         return None
 
 @app.route('/')
-def index():
+async def index():
     """Dashboard view."""
-    # Get tasks
-    tasks = get_from_service(TASK_SERVICE_URL, '/api/tasks?include_username=true') or []
-    # Enrich tasks with usernames if not already included
-    if tasks:
-        users = get_from_service(USER_SERVICE_URL, '/api/users') or []
-        user_lookup = {user['id']: user['username'] for user in users}
-        for task in tasks:
-            if task.get('assigned_to') and not task.get('assigned_to_username'):
-                task['assigned_to_username'] = user_lookup.get(task['assigned_to'])
-    
-    # Get upcoming tasks and format as notifications
-    upcoming_tasks = get_from_service(TASK_SERVICE_URL, '/api/tasks/upcoming?days=7') or []
-    notifications = []
-    now = datetime.utcnow()
-    
-    for task in upcoming_tasks:
-        if task.get('due_date'):
-            try:
-                due_date = datetime.fromisoformat(task['due_date'].replace('Z', '+00:00'))
-                time_remaining = due_date - now
-                total_seconds = int(time_remaining.total_seconds())
-                days_until = time_remaining.days
-                hours_until = total_seconds // 3600
-                minutes_until = (total_seconds // 60) % 60
-                seconds_until = total_seconds % 60
-                
-                # Format message based on time remaining
-                if days_until > 0:
-                    message = f'Task "{task.get("title", "Task")}" is due in {days_until} day(s)'
-                elif hours_until > 0:
-                    remaining_minutes = (total_seconds % 3600) // 60
-                    if remaining_minutes > 0:
-                        message = f'Task "{task.get("title", "Task")}" is due in {hours_until} hour(s), {remaining_minutes} minute(s)'
-                    else:
-                        message = f'Task "{task.get("title", "Task")}" is due in {hours_until} hour(s)'
-                elif minutes_until > 0:
-                    if seconds_until > 0:
-                        message = f'Task "{task.get("title", "Task")}" is due in {minutes_until} minute(s), {seconds_until} second(s)'
-                    else:
-                        message = f'Task "{task.get("title", "Task")}" is due in {minutes_until} minute(s)'
-                elif seconds_until > 0:
-                    message = f'Task "{task.get("title", "Task")}" is due in {seconds_until} second(s)'
-                else:
-                    message = f'Task "{task.get("title", "Task")}" is overdue!'
-                
-                notifications.append({
-                    'type': 'deadline_approaching',
-                    'task_id': task.get('id'),
-                    'task_title': task.get('title', 'Task'),
-                    'due_date': task.get('due_date'),
-                    'days_until': days_until,
-                    'hours_until': hours_until,
-                    'minutes_until': minutes_until,
-                    'seconds_until': seconds_until,
-                    'total_seconds': total_seconds,
-                    'message': message
-                })
-            except Exception as e:
-                print(f"Error processing task notification: {e}")
-                continue
+    # Get task statuses, upcoming tasks and recent activity in parallel,
+    # asking only for the fields the dashboard shows
+    tasks, upcoming_tasks, activity = await gather_from_services(
+        (TASK_SERVICE_URL, f'/api/tasks?fields={DASHBOARD_TASK_FIELDS}'),
+        (TASK_SERVICE_URL, '/api/tasks/upcoming?days=7'),
+        (TASK_SERVICE_URL, f'/api/activity?fields={DASHBOARD_ACTIVITY_FIELDS}'),
+    )
+    tasks = tasks or []
+    upcoming_tasks = upcoming_tasks or []
+    activity = activity or []
     
-    # Get recent activity
-    activity = get_from_service(TASK_SERVICE_URL, '/api/activity') or []
+    # Format upcoming tasks as notifications in one batch
+    notifications = deadline_notifications(
+        (task.get('id'), task.get('title', 'Task'), task['due_date'])
+        for task in upcoming_tasks if task.get('due_date')
+    )
     
     return render_template('dashboard.html', 
                          tasks=tasks, 
@@ -140,25 +208,28 @@ def index():
                          recent_activity=activity)
 
 @app.route('/tasks')
-def tasks():
+async def tasks():
     """Task list view."""
-    tasks = get_from_service(TASK_SERVICE_URL, '/api/tasks?include_username=true') or []
-    users = get_from_service(USER_SERVICE_URL, '/api/users') or []
-    # Enrich tasks with usernames if not already included
-    if tasks:
-        user_lookup = {user['id']: user['username'] for user in users}
-        for task in tasks:
-            if task.get('assigned_to') and not task.get('assigned_to_username'):
-                task['assigned_to_username'] = user_lookup.get(task['assigned_to'])
+    tasks, users = await gather_from_services(
+        (TASK_SERVICE_URL, f'/api/tasks?fields={TASK_LIST_FIELDS}'),
+        (USER_SERVICE_URL, '/api/users?fields=username'),
+    )
+    tasks = tasks or []
+    users = users or []
+    # The template names assignees from the user list
     return render_template('tasks.html', tasks=tasks, users=users)
 
 @app.route('/calendar')
-def calendar():
+async def calendar():
     """Calendar view."""
-    tasks = get_from_service(TASK_SERVICE_URL, '/api/tasks?include_username=true') or []
+    tasks, users = await gather_from_services(
+        (TASK_SERVICE_URL, f'/api/tasks?fields={CALENDAR_TASK_FIELDS}'),
+        (USER_SERVICE_URL, '/api/users?fields=username'),
+    )
+    tasks = tasks or []
+    users = users or []
     # Enrich tasks with usernames if not already included
     if tasks:
-        users = get_from_service(USER_SERVICE_URL, '/api/users') or []
         user_lookup = {user['id']: user['username'] for user in users}
         for task in tasks:
             if task.get('assigned_to') and not task.get('assigned_to_username'):
@@ -216,6 +287,14 @@ def update_task(task_id):
         return jsonify(task), 200
     return jsonify({'error': 'Failed to update task'}), response.status_code if response else 503
 
+@app.route('/api/tasks/<int:task_id>', methods=['PATCH'])
+def patch_task(task_id):
+    """API endpoint to change some fields of a task."""
+    response = patch_to_service(TASK_SERVICE_URL, f'/api/tasks/{task_id}', request.json)
+    if response is None:
+        return jsonify({'error': 'Task Service unavailable'}), 503
+    return jsonify(response.json()), response.status_code
+
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """API endpoint to delete a task."""
@@ -326,6 +405,15 @@ def get_users():
         return jsonify(users), 200
     return jsonify({'error': 'User service unavailable'}), 503
 
+@app.route('/api/users/search', methods=['GET'])
+def search_users():
+    """API endpoint for the assignee picker's prefix search (?q=, ?limit=)."""
+    query_string = request.query_string.decode('latin-1')
+    users = get_from_service(USER_SERVICE_URL, f'/api/users/search?{query_string}')
+    if users is not None:
+        return jsonify(users), 200
+    return jsonify({'error': 'User service unavailable'}), 503
+
 @app.route('/api/users', methods=['POST'])
 def create_user():
     """API endpoint to create a user."""
@@ -344,11 +432,15 @@ def delete_user(user_id):
     return jsonify({'error': 'Failed to delete user'}), response.status_code if response else 503
 
 @app.route('/users')
-def users():
+async def users():
     """Users/Team members view."""
-    users = get_from_service(USER_SERVICE_URL, '/api/users') or []
-    # Get tasks to count assigned tasks per user
-    tasks = get_from_service(TASK_SERVICE_URL, '/api/tasks') or []
+    # Get users and tasks (to count assigned tasks per user) in parallel
+    users, tasks = await gather_from_services(
+        (USER_SERVICE_URL, '/api/users'),
+        (TASK_SERVICE_URL, '/api/tasks'),
+    )
+    users = users or []
+    tasks = tasks or []
     
     # Count assigned tasks per user
     task_counts = {}
@@ -373,8 +465,8 @@ def users():
 @app.route('/health')
 def health():
     """Health check endpoint."""
-    return jsonify({'status': 'healthy', 'service': 'frontend-service'}), 200
+    return jsonify({'status': 'healthy', 'service': 'frontend-service', 'dependencies': dependency_status()}), 200
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5003)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5003)
 
@@ -0,0 +1,269 @@
+"""
+Circuit breakers and bulkheads for outbound service calls.
+
+The Task Service and the Frontend Service keep an identical copy of this module.
+Every downstream service gets one Dependency, which combines:
+- a circuit breaker over the last BREAKER_WINDOW calls: once at least
+  BREAKER_MIN_CALLS have been seen, it opens when the share of failures (errors
+  or 5xx) reaches BREAKER_FAILURE_RATE or the share of calls slower than
+  BREAKER_SLOW_CALL_MS reaches BREAKER_SLOW_RATE. While open, calls fail at once;
+  after BREAKER_OPEN_SECONDS one probe call is let through (half-open) and its
+  outcome closes or re-opens the breaker. A probe that has not reported back
+  after another BREAKER_OPEN_SECONDS is given up on and a new one let through.
+- a bulkhead allowing at most BULKHEAD_LIMIT concurrent calls, so a slow
+  service can hold only that many worker threads. Calls over the limit wait up
+  to BULKHEAD_WAIT_MS (default 0, blocking the calling thread) and are then
+  rejected.
+
+Coroutines use guard_async() instead. Calls made from one event loop beyond
+the limit queue for that loop's share of the slots, so a request fanning out
+with asyncio.gather waits for its own earlier calls rather than having the
+rest rejected, and waiting for a slot held elsewhere never blocks the loop.
+
+Any setting can be given per dependency by suffixing the name, e.g.
+BULKHEAD_LIMIT_USER_SERVICE=4. Rejected calls raise DependencyUnavailable,
+which callers handle like any other failed call.
+
+    with dependency('user-service').guard() as outcome:
+        response = requests.get(...)
+        outcome['status'] = response.status_code
+
+    async with dependency('user-service').guard_async() as outcome:
+        response = await client.get(...)
+        outcome['status'] = response.status_code
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+# How often a coroutine waiting for a slot held by another thread retries
+ASYNC_POLL_SECONDS = 0.01
+
+class DependencyUnavailable(Exception):
+    """A call was rejected without being made."""
+
+class CircuitOpen(DependencyUnavailable):
+    """The dependency's circuit breaker is open."""
+
+class BulkheadFull(DependencyUnavailable):
+    """The dependency already has its maximum number of calls in flight."""
+
+def _setting(name, key, default):
+    suffix = name.upper().replace('-', '_')
+    return float(os.environ.get(f'{key}_{suffix}', os.environ.get(key, default)))
+
+class CircuitBreaker:
+    """Rolling-window breaker tripped by error rate or slow-call rate."""
+    
+    def __init__(self, window=20, min_calls=10, failure_rate=0.5, slow_call_seconds=1.0,
+                 slow_rate=0.8, open_seconds=10.0, clock=time.monotonic):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.calls = deque(maxlen=window)  # (failed, slow) per finished call
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.probe_started_at = 0.0
+    
+    def allow(self):
+        """Whether a call may go ahead now; in half-open, only one probe at a time."""
+        with self.lock:
+            now = self.clock()
+            if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and (not self.probing or now - self.probe_started_at >= self.open_seconds):
+                self.probing = True
+                self.probe_started_at = now
+                return True
+            return False
+    
+    def record(self, failed, seconds):
+        """Record a finished call and trip or reset the breaker."""
+        slow = seconds >= self.slow_call_seconds
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self.calls.clear()
+                return
+            self.calls.append((failed, slow))
+            if self.state == CLOSED and len(self.calls) >= self.min_calls:
+                failures = sum(1 for failed, _ in self.calls if failed) / len(self.calls)
+                slow_calls = sum(1 for _, slow in self.calls if slow) / len(self.calls)
+                if failures >= self.failure_rate or slow_calls >= self.slow_rate:
+                    self._open()
+    
+    def release_probe(self):
+        """Give back a half-open probe slot that was granted but not used."""
+        with self.lock:
+            self.probing = False
+    
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.calls.clear()
+
+class Bulkhead:
+    """Caps concurrent calls to one dependency."""
+    
+    def __init__(self, limit=10, wait_seconds=0.0):
+        self.limit = limit
+        self.wait_seconds = wait_seconds
+        self.slots = threading.BoundedSemaphore(limit)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.loop_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+    
+    def acquire(self, wait_seconds=None):
+        wait_seconds = self.wait_seconds if wait_seconds is None else wait_seconds
+        if wait_seconds > 0:
+            acquired = self.slots.acquire(timeout=wait_seconds)
+        else:
+            acquired = self.slots.acquire(blocking=False)
+        if acquired:
+            with self.lock:
+                self.in_flight += 1
+        return acquired
+    
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+    
+    def _loop_slots(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if loop not in self.loop_slots:
+                self.loop_slots[loop] = asyncio.Semaphore(self.limit)
+            return self.loop_slots[loop]
+    
+    async def acquire_async(self):
+        """acquire() for coroutines: queue behind the other calls from this
+        event loop, then wait up to wait_seconds for a slot without blocking."""
+        loop_slots = self._loop_slots()
+        await loop_slots.acquire()
+        deadline = time.monotonic() + self.wait_seconds
+        try:
+            while not self.acquire(wait_seconds=0):
+                if time.monotonic() >= deadline:
+                    loop_slots.release()
+                    return False
+                await asyncio.sleep(ASYNC_POLL_SECONDS)
+        except asyncio.CancelledError:
+            loop_slots.release()
+            raise
+        return True
+    
+    def release_async(self):
+        self.release()
+        self._loop_slots().release()
+
+class Dependency:
+    """Circuit breaker plus bulkhead guarding calls to one service."""
+    
+    def __init__(self, name, breaker=None, bulkhead=None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(
+            window=int(_setting(name, 'BREAKER_WINDOW', 20)),
+            min_calls=int(_setting(name, 'BREAKER_MIN_CALLS', 10)),
+            failure_rate=_setting(name, 'BREAKER_FAILURE_RATE', 0.5),
+            slow_call_seconds=_setting(name, 'BREAKER_SLOW_CALL_MS', 1000) / 1000,
+            slow_rate=_setting(name, 'BREAKER_SLOW_RATE', 0.8),
+            open_seconds=_setting(name, 'BREAKER_OPEN_SECONDS', 10),
+        )
+        self.bulkhead = bulkhead or Bulkhead(
+            limit=int(_setting(name, 'BULKHEAD_LIMIT', 10)),
+            wait_seconds=_setting(name, 'BULKHEAD_WAIT_MS', 0) / 1000,
+        )
+        self.rejected = 0
+    
+    @contextmanager
+    def guard(self):
+        """Run one call under the breaker and bulkhead.
+        Yields a dict; set outcome['status'] to the response status so 5xx
+        responses count as failures. Exceptions count as failures too."""
+        self._allow()
+        if not self.bulkhead.acquire():
+            self._reject_full()
+        try:
+            with self._record() as outcome:
+                yield outcome
+        finally:
+            self.bulkhead.release()
+    
+    @asynccontextmanager
+    async def guard_async(self):
+        """guard() for coroutines; see the module docstring."""
+        self._allow()
+        try:
+            acquired = await self.bulkhead.acquire_async()
+        except BaseException:
+            # Cancelled while queueing: a probe that was granted must not stay taken
+            self.breaker.release_probe()
+            raise
+        if not acquired:
+            self._reject_full()
+        try:
+            with self._record() as outcome:
+                yield outcome
+        finally:
+            self.bulkhead.release_async()
+    
+    def _allow(self):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpen(f'{self.name} circuit is open')
+    
+    def _reject_full(self):
+        self.breaker.release_probe()
+        self.rejected += 1
+        raise BulkheadFull(f'{self.name} has {self.bulkhead.limit} calls in flight')
+    
+    @contextmanager
+    def _record(self):
+        outcome = {'status': None}
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield outcome
+            failed = isinstance(outcome['status'], int) and outcome['status'] >= 500
+        finally:
+            self.breaker.record(failed, time.perf_counter() - start)
+    
+    def status(self):
+        return {
+            'state': self.breaker.state,
+            'in_flight': self.bulkhead.in_flight,
+            'limit': self.bulkhead.limit,
+            'rejected': self.rejected,
+        }
+
+DEPENDENCIES = {}
+_registry_lock = threading.Lock()
+
+def dependency(name):
+    """The process-wide Dependency for a service name, created on first use."""
+    with _registry_lock:
+        if name not in DEPENDENCIES:
+            DEPENDENCIES[name] = Dependency(name)
+        return DEPENDENCIES[name]
+
+def dependency_status():
+    """Breaker state and bulkhead usage per dependency, e.g. for /health."""
+    return {name: dep.status() for name, dep in sorted(DEPENDENCIES.items())}
@@ -97,28 +97,58 @@ async function deleteTask(taskId) {
     }
 }
 
+// Assignee picker: lists users matching the typed username or email prefix
+// instead of loading every user into the dropdown
+const ASSIGNEE_SEARCH_LIMIT = 20;
+let assigneeSearchTimer = null;
+let assigneeSearchSeq = 0;
+
+function userOption(id, username) {
+    const option = document.createElement('option');
+    option.value = id;
+    option.textContent = `${username} (ID: ${id})`;
+    return option;
+}
+
+function searchAssignees(query) {
+    clearTimeout(assigneeSearchTimer);
+    assigneeSearchTimer = setTimeout(() => loadAssignees(query), 200);
+}
+
+async function loadAssignees(query) {
+    const seq = ++assigneeSearchSeq;
+    const params = new URLSearchParams({ q: query.trim(), limit: ASSIGNEE_SEARCH_LIMIT, fields: 'username' });
+    const response = await fetch(`/api/users/search?${params}`);
+    const users = await response.json();
+    if (seq !== assigneeSearchSeq) {
+        return; // A later keystroke started a newer search
+    }
+    
+    // Keep the selected user listed even when it no longer matches
+    const assignSelect = document.getElementById('assignUserSelect');
+    const selected = assignSelect.selectedOptions[0];
+    const keep = selected && selected.value && !users.some(user => String(user.id) === selected.value) ? selected : null;
+    assignSelect.innerHTML = '<option value="">Unassigned</option>';
+    if (keep) {
+        assignSelect.appendChild(keep);
+    }
+    users.forEach(user => assignSelect.appendChild(userOption(user.id, user.username)));
+    assignSelect.value = selected ? selected.value : '';
+}
+
 async function assignTask(taskId) {
-    // Load users for the dropdown
     try {
-        const usersResponse = await fetch('/api/users');
-        const users = await usersResponse.json();
-        
-        // Populate the assign modal dropdown
-        const assignSelect = document.getElementById('assignUserSelect');
-        assignSelect.innerHTML = '<option value="">Unassigned</option>';
-        users.forEach(user => {
-            const option = document.createElement('option');
-            option.value = user.id;
-            option.textContent = `${user.username} (ID: ${user.id})`;
-            assignSelect.appendChild(option);
-        });
-        
-        // Get current task to pre-select assigned user
+        // Start from the current assignee, then list the first users by name
         const taskResponse = await fetch(`/api/tasks/${taskId}`);
         const task = await taskResponse.json();
+        const assignSelect = document.getElementById('assignUserSelect');
+        assignSelect.innerHTML = '<option value="">Unassigned</option>';
         if (task.assigned_to) {
-            assignSelect.value = task.assigned_to;
+            assignSelect.appendChild(userOption(task.assigned_to, task.assigned_to_username || 'User'));
         }
+        assignSelect.value = task.assigned_to || '';
+        document.getElementById('assignUserSearch').value = '';
+        await loadAssignees('');
         
         // Store task ID for the form submission
         document.getElementById('assignTaskId').value = taskId;
@@ -4,6 +4,10 @@ Handles all notifications and alerts.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from metrics import init_metrics
+from profiling import init_profiling
+from http_cache import init_compression
+from tracing import init_tracing
 from datetime import datetime
 import os
 import smtplib
@@ -12,7 +16,12 @@ from email.mime.multipart import MIMEMultipart
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'notification-service-secret-key')
+app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', 'true').lower() in ('1', 'true')
 CORS(app)
+init_metrics(app, service='notification-service')
+init_tracing(app, service='notification-service')
+init_profiling(app)
+init_compression(app)
 
 # In-memory storage for notifications (in production, use a proper database)
 notifications = []
@@ -148,5 +157,5 @@ def clear_notifications():
     return jsonify({'message': 'Notifications cleared'}), 200
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5001)
 
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for serving the notification-service in production.
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+
+# Notifications are kept in process memory, so this service must run a
+# single worker; concurrency comes from the thread pool instead.
+workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import the app once in the master and fork it into the workers.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true')
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
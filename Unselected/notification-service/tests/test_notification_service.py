@@ -32,3 +32,14 @@ def test_handle_event(client):
     data = response.get_json()
     assert data['status'] == 'processed'
 
+
+def test_metrics_endpoint(client):
+    """Test handled requests are exported in Prometheus format."""
+    client.get('/health')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_requests_total counter' in body
+    assert 'service="notification-service"' in body
+    assert 'route="/health",status="200"' in body
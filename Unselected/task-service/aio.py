@@ -0,0 +1,104 @@
+"""
+Async I/O helpers for the Task Service.
+Async views use these to query the database through SQLAlchemy's async engine
+and to call the User and Notification Services concurrently with httpx, so a
+request waits for the slowest outbound call instead of the sum of all of them.
+"""
+import asyncio
+import os
+from datetime import datetime
+import httpx
+from flask import current_app
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from models import db
+from engine import configure_engine
+from metrics import track_outbound
+from tracing import trace_outbound
+from resilience import DependencyUnavailable, dependency
+import user_directory
+
+# Async DBAPI drivers per backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def _user_service_url():
+    return os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
+
+def _notification_service_url():
+    return os.environ.get('NOTIFICATION_SERVICE_URL', 'http://notification-service:5001')
+
+def get_async_engine():
+    """Return the app's async engine, or None if the database can't be shared
+    with a second engine (in-memory SQLite lives in a single connection)."""
+    extensions = current_app.extensions
+    if 'async_engine' not in extensions:
+        url = db.engine.url
+        backend = url.get_backend_name()
+        if backend not in ASYNC_DRIVERS or (backend == 'sqlite' and url.database in (None, '', ':memory:')):
+            extensions['async_engine'] = None
+        else:
+            # Flask runs each async view in its own event loop, so connections
+            # must not outlive the request: NullPool opens one per session.
+            engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[backend]), poolclass=NullPool)
+            configure_engine(engine.sync_engine, current_app.config.get('DB_PROFILE', 'dev'))
+            extensions['async_engine'] = engine
+    return extensions['async_engine']
+
+async def scalars(statement):
+    """Execute a SELECT and return its ORM objects, detached and fully loaded."""
+    engine = get_async_engine()
+    if engine is None:
+        return db.session.execute(statement).scalars().all()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        result = await session.execute(statement)
+        return result.scalars().all()
+
+async def _get_user(client, user_id):
+    try:
+        async with dependency('user-service').guard_async() as outcome:
+            with track_outbound(str(client.base_url)) as call, \
+                    trace_outbound('GET', f'{client.base_url}api/users/{user_id}') as span:
+                response = await client.get(f'/api/users/{user_id}', headers=span.headers())
+                call['status'] = outcome['status'] = response.status_code
+                span.set_attribute('http.status_code', response.status_code)
+        if response.status_code == 200:
+            return response.json()
+    except (httpx.HTTPError, DependencyUnavailable) as e:
+        print(f"Failed to get user {user_id} from User Service: {e}")
+    return None
+
+async def fetch_users(user_ids):
+    """Look up several users, from the local user directory where possible and
+    from User Service (concurrently) for the rest.
+    Returns a dict of user_id -> user for the ones that exist."""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return {}
+    # A cold or stale replica syncs with blocking calls; keep them off the event loop
+    found = await asyncio.to_thread(user_directory.lookup, user_ids) or {}
+    missing = list(user_ids - found.keys())
+    if missing:
+        async with httpx.AsyncClient(base_url=_user_service_url(), timeout=2) as client:
+            users = await asyncio.gather(*(_get_user(client, user_id) for user_id in missing))
+        found.update((user_id, user) for user_id, user in zip(missing, users) if user)
+    return found
+
+async def notify(event_type, payload):
+    """Send an event to the Notification Service without failing the request."""
+    try:
+        async with httpx.AsyncClient(base_url=_notification_service_url(), timeout=2) as client, \
+                dependency('notification-service').guard_async() as outcome:
+            with track_outbound(str(client.base_url)) as call, \
+                    trace_outbound('POST', f'{client.base_url}api/events') as span:
+                response = await client.post('/api/events', json={
+                    'event_type': event_type,
+                    'payload': payload,
+                    'timestamp': datetime.utcnow().isoformat()
+                }, headers=span.headers())
+                call['status'] = outcome['status'] = response.status_code
+                span.set_attribute('http.status_code', response.status_code)
+    except (httpx.HTTPError, DependencyUnavailable) as e:
+        print(f"Failed to notify notification service: {e}")
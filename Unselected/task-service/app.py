@@ -5,77 +5,260 @@ Communicates with User Service for user-related operations.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from metrics import init_metrics, track_outbound
+from profiling import init_profiling
+from http_cache import init_compression, collection_etag, is_conditional, not_modified, set_validators
+from tracing import init_tracing, trace_outbound
+from resilience import dependency, dependency_status
+from cache import get_cache, init_cache
 from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import load_only
 from models import db, Task, ActivityLog
 from config import Config
+import change_feed
+from engine import configure_engine
 import os
 import requests
+import aio
+import user_directory
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+init_metrics(app, service='task-service')
+init_tracing(app, service='task-service')
+init_profiling(app)
+init_compression(app)
+init_cache(app, namespace='task-service')
 
 # Initialize database
 db.init_app(app)
 
-# Create tables
 with app.app_context():
+    configure_engine(db.engine, app.config['DB_PROFILE'])
+
+@app.cli.command('init-db')
+def init_db():
+    """Create missing tables: flask --app app init-db. Run once before
+    starting the workers rather than on every import."""
     db.create_all()
+    print('Initialized the database.')
+
+# Helper functions for formatting activity at read time. Updates store what
+# changed as structured details, so the write path does no user lookups.
+FIELD_NAMES = {
+    'due_date': 'due date',
+    'assigned_to': 'assigned to',
+    'created_by': 'created by',
+    'updated_by': 'updated by'
+}
+USER_FIELDS = frozenset(['assigned_to', 'created_by', 'updated_by'])
+DATETIME_FIELDS = frozenset(['due_date'])
 
-# Helper functions for formatting
+def describe_change(field, old_value, new_value):
+    """Structured record of one field change, safe to store as JSON."""
+    def to_json(value):
+        return value.isoformat() if isinstance(value, datetime) else value
+    return {'field': field, 'old': to_json(old_value), 'new': to_json(new_value)}
+
+@lru_cache(maxsize=256)
 def format_field_name(field_name):
     """Convert field names to user-friendly format."""
-    field_map = {
-        'due_date': 'due date',
-        'assigned_to': 'assigned to',
-        'created_by': 'created by',
-        'updated_by': 'updated by'
-    }
-    return field_map.get(field_name, field_name.replace('_', ' '))
+    return FIELD_NAMES.get(field_name, field_name.replace('_', ' '))
 
-def format_value(value, field_name='', user_service_url=None):
-    """Format values for display in activity logs."""
+@lru_cache(maxsize=4096)
+def format_datetime(iso_value):
+    """Format a stored ISO timestamp as readable date and time."""
+    return datetime.fromisoformat(iso_value).strftime('%B %d, %Y at %I:%M %p')
+
+def format_value(field_name, value, users):
+    """Format a stored value for display; users maps user_id -> user."""
     if value is None:
         return 'not set'
-    if isinstance(value, datetime):
-        # Format datetime as readable date and time
-        return value.strftime('%B %d, %Y at %I:%M %p')
-    if field_name == 'assigned_to':
-        # Handle user assignment - value is user_id (int)
-        if isinstance(value, int):
-            # Try to get username from User Service
-            try:
-                user = get_user_from_service(value)
-                return user['username'] if user else f'user {value}'
-            except:
-                return f'user {value}'
+    if field_name in DATETIME_FIELDS:
+        return format_datetime(value)
+    if field_name in USER_FIELDS and isinstance(value, int):
+        user = users.get(value)
+        return user['username'] if user else f'user {value}'
     return str(value)
 
+def activity_user_ids(activities):
+    """Every user ID mentioned in the details of the given activity entries."""
+    return {
+        change[side]
+        for activity in activities if activity.details
+        for change in activity.details if change['field'] in USER_FIELDS
+        for side in ('old', 'new') if isinstance(change[side], int)
+    }
+
+def render_activity(activity, users):
+    """Text for one activity entry; entries without details keep their stored text."""
+    if not activity.details:
+        return activity.description
+    return '; '.join(
+        f"{format_field_name(change['field'])} was changed from "
+        f"{format_value(change['field'], change['old'], users)} to "
+        f"{format_value(change['field'], change['new'], users)}"
+        for change in activity.details
+    )
+
+# Columns PATCH /api/tasks/<id> may set
+PATCHABLE_FIELDS = ('title', 'description', 'status', 'priority', 'due_date', 'assigned_to')
+
+# Fields and related records GET /api/tasks may be limited to or embed
+TASK_FIELDS = Task.FIELDS + ('assigned_to_username',)
+TASK_INCLUDES = ('assignee',)
+
+def requested(param, allowed):
+    """Names listed in ?<param>=a,b, or None when absent.
+    Raises ValueError naming any that are not allowed."""
+    value = request.args.get(param)
+    if value is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f'Unknown {param}: {", ".join(unknown)}. Choose from {", ".join(allowed)}.')
+    return names
+
+def requested_fields(allowed):
+    """Sparse fieldset from ?fields=; the id is always included."""
+    fields = requested('fields', allowed)
+    if fields is not None and 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def directory_version(shows_usernames):
+    """Validator part for the user names in a response: the local user
+    directory's position, '' when no names are shown, or None when names come
+    from User Service calls and the response can't be validated."""
+    if not shows_usernames:
+        return ''
+    return user_directory.position()
+
+def activity_validators(versions, directory):
+    """ETag and Last-Modified for a page of activity from its (id, created_at) pairs."""
+    return (collection_etag(directory, *[activity_id for activity_id, _ in versions]),
+            max((created_at for _, created_at in versions), default=None))
+
+def task_load_options(fields, include):
+    """Select only the task columns the requested fields need (all when fields is None)."""
+    if fields is None:
+        return []
+    # updated_at is always read for Last-Modified and the list ETag
+    columns = {'updated_at'} | {field for field in fields if field in Task.__table__.c}
+    if 'assigned_to_username' in fields or 'assignee' in include:
+        columns.add('assigned_to')
+    return [load_only(*[getattr(Task, column) for column in sorted(columns)])]
+
+def record_task_row(row):
+    """Add a task row written with a Core UPDATE to the change feed."""
+    task = Task(**{column.name: row._mapping[column] for column in Task.__table__.c})
+    change_feed.record(db.session, [('task', task.id, 'update', task.to_dict())])
+
+def update_task_columns(task_id, values, attempts=3):
+    """Set only the given task columns without loading the task.
+    Returns (old values of those columns, updated_at), or None if there is no such task.
+    The new row goes to the change feed in the same transaction.
+    PostgreSQL does this in one UPDATE ... RETURNING that reads the old values
+    from a locked CTE. SQLite's RETURNING only sees the new row, so there the
+    old values come from a narrow SELECT and the UPDATE only applies if they
+    are still current (retried if another writer got in between)."""
+    tasks = Task.__table__
+    columns = [tasks.c[key] for key in values]
+    now = datetime.utcnow()
+    
+    if db.session.get_bind().dialect.name == 'postgresql':
+        old = select(tasks.c.id, *columns).where(tasks.c.id == task_id).with_for_update().cte('old')
+        row = db.session.execute(
+            update(tasks)
+            .where(tasks.c.id == old.c.id)
+            .values(dict(values, updated_at=now))
+            .returning(*[old.c[key].label(f'old_{key}') for key in values], *tasks.c)
+        ).first()
+        if row is not None:
+            record_task_row(row)
+        db.session.commit()
+        return ({key: row._mapping[f'old_{key}'] for key in values}, now) if row else None
+    
+    for _ in range(attempts):
+        current = db.session.execute(select(*columns).where(tasks.c.id == task_id)).first()
+        if current is None:
+            return None
+        row = db.session.execute(
+            update(tasks)
+            .where(tasks.c.id == task_id, *[tasks.c[key].is_not_distinct_from(current._mapping[key]) for key in values])
+            .values(dict(values, updated_at=now))
+            .returning(*tasks.c)
+        ).first()
+        if row is not None:
+            record_task_row(row)
+        db.session.commit()
+        if row is not None:
+            return dict(current._mapping), now
+    raise RuntimeError(f'Task {task_id} kept changing during update')
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
-    return jsonify({'status': 'healthy', 'service': 'task-service'}), 200
+    return jsonify({'status': 'healthy', 'service': 'task-service', 'dependencies': dependency_status()}), 200
 
 @app.route('/api/tasks', methods=['GET'])
-def get_tasks():
-    """Get all tasks."""
-    tasks = Task.query.all()
-    user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
-    include_username = request.args.get('include_username', 'false').lower() == 'true'
-    return jsonify([task.to_dict(include_username=include_username, user_service_url=user_service_url) for task in tasks]), 200
+async def get_tasks():
+    """Get all tasks.
+    ?fields=title,status limits both the response and the columns selected;
+    ?include=assignee embeds the assigned user."""
+    try:
+        fields = requested_fields(TASK_FIELDS)
+        include = requested('include', TASK_INCLUDES) or ()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    include_username = request.args.get('include_username', 'false').lower() == 'true' or \
+        'assignee' in include or 'assigned_to_username' in (fields or ())
+    directory = directory_version(include_username)
+    if directory is not None and is_conditional():
+        # Answer a still-current client copy from one aggregate query
+        count, last_modified = db.session.execute(select(func.count(Task.id), func.max(Task.updated_at))).one()
+        response = not_modified(collection_etag(count, last_modified, directory), last_modified)
+        if response:
+            return response
+    
+    async def load():
+        tasks = await aio.scalars(select(Task).options(*task_load_options(fields, include)))
+        # One concurrent lookup per distinct assignee instead of one blocking call per task
+        users = await aio.fetch_users(task.assigned_to for task in tasks) if include_username else None
+        last_modified = max((task.updated_at for task in tasks), default=None)
+        return {'tasks': [task.to_dict(users=users, fields=fields, include=include) for task in tasks],
+                'last_modified': last_modified.isoformat() if last_modified else None}
+    
+    if directory is None:
+        result = await load()
+    else:
+        # Every task write advances the change feed and every rename the
+        # directory, so together they name the current list for all workers
+        key = f'tasks:{change_feed.head()}:{directory}:{",".join(fields or ())}:{",".join(include)}'
+        result = await get_cache().get_or_set_async(key, load)
+    response = jsonify(result['tasks'])
+    if directory is not None:
+        last_modified = datetime.fromisoformat(result['last_modified']) if result['last_modified'] else None
+        set_validators(response, collection_etag(len(result['tasks']), last_modified, directory), last_modified)
+    return response, 200
 
 @app.route('/api/tasks', methods=['POST'])
-def create_task():
+async def create_task():
     """Create a new task."""
     data = request.json
     
-    # Validate user IDs with User Service if provided
+    # Validate user IDs with User Service if provided (both lookups run concurrently)
+    users = await aio.fetch_users([data.get('assigned_to'), data.get('created_by')])
     if data.get('assigned_to'):
-        if not validate_user_id(data['assigned_to']):
+        if data['assigned_to'] not in users:
             return jsonify({'error': 'Invalid assigned_to user ID'}), 400
     
     if data.get('created_by'):
-        if not validate_user_id(data['created_by']):
+        if data['created_by'] not in users:
             return jsonify({'error': 'Invalid created_by user ID'}), 400
     
     due_date = None
@@ -104,31 +287,42 @@ def create_task():
     db.session.add(activity)
     db.session.commit()
     
-    # Notify notification service (async simulation via event queue)
-    notify_notification_service('task_created', {
+    # Notify notification service
+    await aio.notify('task_created', {
         'task_id': task.id,
         'title': task.title,
         'assigned_to': task.assigned_to
     })
     
-    user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
     include_username = request.args.get('include_username', 'false').lower() == 'true'
-    return jsonify(task.to_dict(include_username=include_username, user_service_url=user_service_url)), 201
+    return jsonify(task.to_dict(users=users if include_username else None)), 201
 
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
-def get_task(task_id):
-    """Get a specific task."""
-    task = Task.query.get_or_404(task_id)
-    user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
-    include_username = request.args.get('include_username', 'false').lower() == 'true'
-    return jsonify(task.to_dict(include_username=include_username, user_service_url=user_service_url)), 200
+async def get_task(task_id):
+    """Get a specific task (accepts ?fields= and ?include=)."""
+    try:
+        fields = requested_fields(TASK_FIELDS)
+        include = requested('include', TASK_INCLUDES) or ()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    task = Task.query.options(*task_load_options(fields, include)).get_or_404(task_id)
+    include_username = request.args.get('include_username', 'false').lower() == 'true' or \
+        'assignee' in include or 'assigned_to_username' in (fields or ())
+    users = await aio.fetch_users([task.assigned_to]) if include_username else None
+    return jsonify(task.to_dict(users=users, fields=fields, include=include)), 200
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
-def update_task(task_id):
+async def update_task(task_id):
     """Update a task."""
     task = Task.query.get_or_404(task_id)
     data = request.json
-    user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
+    include_username = request.args.get('include_username', 'false').lower() == 'true'
+    
+    # Fetch every user this update needs (validation, response) at once
+    user_ids = [data.get('assigned_to')] if 'assigned_to' in data else []
+    if include_username:
+        user_ids.append(task.assigned_to)
+    users = await aio.fetch_users(user_ids)
     
     changes = []
     update_data = {}
@@ -146,7 +340,7 @@ def update_task(task_id):
                 new_value = datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
             elif key == 'assigned_to':
                 # Validate user ID if provided
-                if value and not validate_user_id(value):
+                if value and value not in users:
                     return jsonify({'error': 'Invalid assigned_to user ID'}), 400
                 new_value = value
             else:
@@ -160,11 +354,7 @@ def update_task(task_id):
                 if key == 'status':
                     old_status_for_notification = old_value
                 
-                # Format the change message
-                field_name = format_field_name(key)
-                old_formatted = format_value(old_value, key, user_service_url)
-                new_formatted = format_value(new_value, key, user_service_url)
-                changes.append(f"{field_name} was changed from {old_formatted} to {new_formatted}")
+                changes.append(describe_change(key, old_value, new_value))
     
     # Apply updates
     for key, value in update_data.items():
@@ -177,7 +367,7 @@ def update_task(task_id):
     
     # Notify on status change
     if 'status' in update_data and old_status_for_notification:
-        notify_notification_service('task_status_changed', {
+        await aio.notify('task_status_changed', {
             'task_id': task.id,
             'old_status': old_status_for_notification.replace('_', ' ').title(),
             'new_status': update_data['status']
@@ -191,14 +381,57 @@ def update_task(task_id):
         activity = ActivityLog(
             task_id=task.id,
             action='updated',
-            description='; '.join(changes),
+            details=changes,
             user_id=data.get('updated_by')
         )
         db.session.add(activity)
         db.session.commit()
     
-    include_username = request.args.get('include_username', 'false').lower() == 'true'
-    return jsonify(task.to_dict(include_username=include_username, user_service_url=user_service_url)), 200
+    return jsonify(task.to_dict(users=users if include_username else None)), 200
+
+@app.route('/api/tasks/<int:task_id>', methods=['PATCH'])
+async def patch_task(task_id):
+    """Change some fields of a task with a single column-targeted UPDATE."""
+    data = request.json
+    changes = {key: data[key] for key in PATCHABLE_FIELDS if key in data}
+    if not changes:
+        return jsonify({'error': f'Nothing to update; send any of {", ".join(PATCHABLE_FIELDS)}'}), 400
+    if 'due_date' in changes:
+        try:
+            changes['due_date'] = datetime.fromisoformat(changes['due_date'].replace('Z', '+00:00')) if changes['due_date'] else None
+        except (AttributeError, ValueError):
+            return jsonify({'error': 'due_date must be an ISO 8601 date or time'}), 400
+    
+    users = await aio.fetch_users([changes['assigned_to']]) if changes.get('assigned_to') else {}
+    if changes.get('assigned_to') and changes['assigned_to'] not in users:
+        return jsonify({'error': 'Invalid assigned_to user ID'}), 400
+    
+    result = update_task_columns(task_id, changes)
+    if result is None:
+        return jsonify({'error': 'Task not found'}), 404
+    old_values, updated_at = result
+    
+    changed = [key for key in changes if old_values[key] != changes[key]]
+    
+    if 'status' in changed and old_values['status']:
+        await aio.notify('task_status_changed', {
+            'task_id': task_id,
+            'old_status': old_values['status'].replace('_', ' ').title(),
+            'new_status': changes['status']
+        })
+    
+    if changed:
+        db.session.add(ActivityLog(
+            task_id=task_id,
+            action='updated',
+            details=[describe_change(key, old_values[key], changes[key]) for key in changed],
+            user_id=data.get('updated_by')
+        ))
+        db.session.commit()
+    
+    if changes.get('due_date'):
+        changes['due_date'] = changes['due_date'].isoformat()
+    return jsonify({'id': task_id, **changes, 'updated_at': updated_at.isoformat()}), 200
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
@@ -209,17 +442,16 @@ def delete_task(task_id):
     return jsonify({'message': 'Task deleted successfully'}), 200
 
 @app.route('/api/tasks/<int:task_id>/assign', methods=['POST'])
-def assign_task(task_id):
+async def assign_task(task_id):
     """Assign a task to a user, or unassign if user_id is None."""
     task = Task.query.get_or_404(task_id)
     data = request.json
     user_id = data.get('user_id')  # Can be None for unassignment
-    user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
     
+    # Look up the previous and the new assignee concurrently
     old_assigned = task.assigned_to
-    old_user = None
-    if old_assigned:
-        old_user = get_user_from_service(old_assigned)
+    users = await aio.fetch_users([old_assigned, user_id])
+    old_user = users.get(old_assigned)
     
     if user_id is None:
         # Unassignment
@@ -241,7 +473,7 @@ def assign_task(task_id):
         db.session.commit()
     else:
         # Assignment
-        user = get_user_from_service(user_id)
+        user = users.get(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
@@ -265,7 +497,7 @@ def assign_task(task_id):
         db.session.commit()
         
         # Notify notification service
-        notify_notification_service('task_assigned', {
+        await aio.notify('task_assigned', {
             'task_id': task.id,
             'task_title': task.title,
             'assigned_to': user_id,
@@ -273,36 +505,94 @@ def assign_task(task_id):
         })
     
     include_username = request.args.get('include_username', 'false').lower() == 'true'
-    return jsonify(task.to_dict(include_username=include_username, user_service_url=user_service_url)), 200
+    return jsonify(task.to_dict(users=users if include_username else None)), 200
 
 @app.route('/api/tasks/upcoming', methods=['GET'])
-def get_upcoming_tasks():
+async def get_upcoming_tasks():
     """Get tasks with upcoming deadlines."""
     from datetime import timedelta
     days = request.args.get('days', 7, type=int)
     cutoff_date = datetime.utcnow() + timedelta(days=days)
     
-    tasks = Task.query.filter(
+    tasks = await aio.scalars(select(Task).where(
         Task.due_date <= cutoff_date,
         Task.due_date >= datetime.utcnow(),
         Task.status != 'completed'
-    ).all()
+    ))
     
     return jsonify([task.to_dict() for task in tasks]), 200
 
 @app.route('/api/activity', methods=['GET'])
-def get_activity():
-    """Get activity log."""
+async def get_activity():
+    """Get activity log, looking up every mentioned user in one batch.
+    ?fields= limits the keys returned and the columns selected."""
     limit = request.args.get('limit', 50, type=int)
-    activities = ActivityLog.query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
+    try:
+        fields = requested_fields(ActivityLog.FIELDS) or ActivityLog.FIELDS
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Entries never change, so a page is identified by its ids (and, when
+    # descriptions name users, the user directory's position)
+    directory = directory_version('description' in fields)
+    if directory is not None and is_conditional():
+        versions = db.session.execute(
+            select(ActivityLog.id, ActivityLog.created_at).order_by(ActivityLog.created_at.desc()).limit(limit)
+        ).all()
+        response = not_modified(*activity_validators(versions, directory))
+        if response:
+            return response
+    
+    # The description is rendered from the stored text or the change details
+    columns = ['created_at'] + [column for field in fields
+                                for column in (('description', 'details') if field == 'description' else (field,))]
+    activities = ActivityLog.query.options(load_only(*[getattr(ActivityLog, column) for column in columns])) \
+        .order_by(ActivityLog.created_at.desc()).limit(limit).all()
+    users = await aio.fetch_users(activity_user_ids(activities)) if 'description' in fields else {}
     
-    return jsonify([{
-        'id': activity.id,
-        'task_id': activity.task_id,
-        'action': activity.action,
-        'description': activity.description,
-        'created_at': activity.created_at.isoformat()
-    } for activity in activities]), 200
+    entries = []
+    for activity in activities:
+        entry = {field: getattr(activity, field) for field in fields}
+        if 'description' in entry:
+            entry['description'] = render_activity(activity, users)
+        if 'created_at' in entry:
+            entry['created_at'] = entry['created_at'].isoformat()
+        entries.append(entry)
+    response = jsonify(entries)
+    if directory is not None:
+        versions = [(activity.id, activity.created_at) for activity in activities]
+        set_validators(response, *activity_validators(versions, directory))
+    return response, 200
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """Task and activity changes after a sequence number, oldest first.
+    wait=<seconds> long-polls until there is at least one change."""
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', 100, type=int)
+    wait = request.args.get('wait', 0, type=float)
+    with change_feed.waiting_slot(wait) as may_wait:
+        changes = change_feed.read(after, limit=limit, wait=wait if may_wait else 0)
+    response = jsonify({
+        'changes': changes,
+        'last_seq': changes[-1]['seq'] if changes else after,
+        'head_seq': change_feed.head()
+    })
+    if wait > 0 and not may_wait:
+        # Every long-poll slot is taken: answer now rather than starve other requests
+        response.headers['Retry-After'] = '1'
+    return response, 200
+
+@app.route('/api/user-events', methods=['POST'])
+def receive_user_events():
+    """Apply user change events pushed by User Service to the local user directory."""
+    data = request.json
+    events = data if isinstance(data, list) else [data]
+    return jsonify({'applied': user_directory.receive(events)}), 200
+
+@app.route('/api/user-directory', methods=['GET'])
+def get_user_directory_status():
+    """Replication position and lag of the local user directory."""
+    return jsonify(user_directory.status()), 200
 
 @app.route('/api/users', methods=['GET'])
 def get_users():
@@ -322,10 +612,12 @@ def get_user_from_service(user_id):
     user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
     
     try:
-        response = requests.get(
-            f'{user_service_url}/api/users/{user_id}',
-            timeout=2
-        )
+        url = f'{user_service_url}/api/users/{user_id}'
+        with dependency('user-service').guard() as outcome, \
+                track_outbound(user_service_url) as call, trace_outbound('GET', url) as span:
+            response = requests.get(url, headers=span.headers(), timeout=2)
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
         if response.status_code == 200:
             return response.json()
         return None
@@ -338,10 +630,12 @@ def get_users_from_service():
     user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
     
     try:
-        response = requests.get(
-            f'{user_service_url}/api/users',
-            timeout=2
-        )
+        url = f'{user_service_url}/api/users'
+        with dependency('user-service').guard() as outcome, \
+                track_outbound(user_service_url) as call, trace_outbound('GET', url) as span:
+            response = requests.get(url, headers=span.headers(), timeout=2)
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
         if response.status_code == 200:
             return response.json(), 200
         return jsonify({'error': 'Failed to fetch users'}), 500
@@ -350,7 +644,9 @@ def get_users_from_service():
         return jsonify({'error': 'User Service unavailable'}), 503
 
 def validate_user_id(user_id):
-    """Validate that a user ID exists in User Service."""
+    """Validate that a user ID exists, checking the local user directory first."""
+    if user_id in (user_directory.lookup([user_id]) or {}):
+        return True
     user = get_user_from_service(user_id)
     return user is not None
 
@@ -364,19 +660,32 @@ def notify_notification_service(event_type, payload):
     
     try:
         import requests
-        requests.post(
-            f'{notification_service_url}/api/events',
-            json={
-                'event_type': event_type,
-                'payload': payload,
-                'timestamp': datetime.utcnow().isoformat()
-            },
-            timeout=2
-        )
+        url = f'{notification_service_url}/api/events'
+        with dependency('notification-service').guard() as outcome, \
+                track_outbound(notification_service_url) as call, trace_outbound('POST', url) as span:
+            response = requests.post(
+                url,
+                json={
+                    'event_type': event_type,
+                    'payload': payload,
+                    'timestamp': datetime.utcnow().isoformat()
+                },
+                headers=span.headers(),
+                timeout=2
+            )
+            call['status'] = outcome['status'] = response.status_code
+            span.set_attribute('http.status_code', response.status_code)
     except Exception as e:
         # Log error but don't fail the request
         print(f"Failed to notify notification service: {e}")
 
+def shutdown_app():
+    """Release pooled database connections before the process exits."""
+    with app.app_context():
+        db.engine.dispose()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    with app.app_context():
+        db.create_all()
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
 
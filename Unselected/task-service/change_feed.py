@@ -0,0 +1,111 @@
+"""
+Ordered change feed of task and activity writes.
+
+Every flush that inserts, updates or deletes a Task or ActivityLog also writes
+one TaskChange row per changed object, in the same transaction. Sequence
+numbers come from the single change_sequence row, which each writer
+increments: the row lock is held until commit, so numbers are gap-free and
+become visible in order. A consumer that has seen everything up to seq N
+reads GET /api/changes?after=N and never misses or reorders a change.
+
+Writes that bypass the ORM (column-targeted UPDATEs) call record() themselves.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event, insert, select, update
+from models import db, Task, ActivityLog, ChangeSequence, TaskChange
+
+MAX_WAIT = float(os.environ.get('CHANGE_FEED_MAX_WAIT', '25'))
+# Long polls held at once per process; each ties up one of the worker's
+# GUNICORN_THREADS request threads, so keep this well below it
+MAX_WAITERS = int(os.environ.get('CHANGE_FEED_MAX_WAITERS', '2'))
+# How often a long poll re-reads the table, for writes made by other workers
+POLL_INTERVAL = 0.5
+MAX_LIMIT = 1000
+
+ENTITIES = {Task: 'task', ActivityLog: 'activity'}
+
+_committed = threading.Condition()
+_waiters = threading.BoundedSemaphore(MAX_WAITERS)
+
+def _next_seq(connection, count):
+    """Reserve count sequence numbers; returns the first."""
+    sequence = ChangeSequence.__table__
+    last = connection.execute(
+        update(sequence).where(sequence.c.id == 1)
+        .values(value=sequence.c.value + count)
+        .returning(sequence.c.value)
+    ).scalar()
+    if last is None:
+        raise RuntimeError('change_sequence has no row; create the tables with flask init-db')
+    return last - count + 1
+
+def record(session, changes):
+    """Write (entity, entity_id, op, data) tuples to the feed in the session's
+    current transaction."""
+    if not changes:
+        return
+    connection = session.connection()
+    first = _next_seq(connection, len(changes))
+    connection.execute(insert(TaskChange.__table__), [
+        {'seq': first + offset, 'entity': entity, 'entity_id': entity_id, 'op': op, 'data': data}
+        for offset, (entity, entity_id, op, data) in enumerate(changes)
+    ])
+    session.info['changes_recorded'] = True
+
+@event.listens_for(db.session, 'after_flush')
+def _record_flush(session, flush_context):
+    changes = []
+    for op, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            entity = ENTITIES.get(type(obj))
+            if entity is None or (op == 'update' and not session.is_modified(obj)):
+                continue
+            changes.append((entity, obj.id, op, None if op == 'delete' else obj.to_dict()))
+    changes.sort(key=lambda change: (change[0] != 'task', change[1]))
+    record(session, changes)
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_waiters(session):
+    if session.info.pop('changes_recorded', False):
+        with _committed:
+            _committed.notify_all()
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget(session):
+    session.info.pop('changes_recorded', None)
+
+def read(after, limit=100, wait=0):
+    """Changes with seq > after as dicts, oldest first. With wait > 0, blocks up
+    to that many seconds (capped at CHANGE_FEED_MAX_WAIT) until there is at least one."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    deadline = time.monotonic() + min(max(wait, 0), MAX_WAIT)
+    while True:
+        rows = db.session.execute(
+            select(TaskChange).where(TaskChange.seq > after).order_by(TaskChange.seq).limit(limit)
+        ).scalars().all()
+        rows = [row.to_dict() for row in rows]
+        # End the read transaction so the next poll sees new commits
+        db.session.rollback()
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows
+        with _committed:
+            _committed.wait(min(remaining, POLL_INTERVAL))
+
+@contextmanager
+def waiting_slot(wait):
+    """Yields whether a long poll of wait seconds may hold its request thread.
+    Past MAX_WAITERS concurrent polls it may not, and should answer at once."""
+    acquired = wait > 0 and _waiters.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            _waiters.release()
+
+def head():
+    """The newest sequence number handed out (0 if none)."""
+    return db.session.execute(select(ChangeSequence.value).where(ChangeSequence.id == 1)).scalar() or 0
@@ -2,12 +2,21 @@
 Configuration for Task Service.
 """
 import os
+from engine import engine_options, normalize_database_uri
 
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'task-service-secret-key'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///task_service.db'
+    SQLALCHEMY_DATABASE_URI = normalize_database_uri(os.environ.get('DATABASE_URL') or 'sqlite:///task_service.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DEBUG = os.environ.get('FLASK_DEBUG', 'true').lower() in ('1', 'true')
+    # Database performance profile: 'dev' or 'throughput' (see engine.py)
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'dev')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    # Cache for the task list: memory://, mmap:// (shared by the workers on a
+    # host), redis://host:6379/0 or none:// (see cache.py)
+    CACHE_URL = os.environ.get('CACHE_URL', 'memory://')
+    CACHE_TTL = float(os.environ.get('CACHE_TTL', '30'))
     NOTIFICATION_SERVICE_URL = os.environ.get('NOTIFICATION_SERVICE_URL', 'http://notification-service:5001')
     USER_SERVICE_URL = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
 
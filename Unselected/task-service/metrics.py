@@ -0,0 +1,187 @@
+"""
+Request-level performance metrics, exposed at /metrics in Prometheus text format.
+
+The monolith and every microservice keep an identical copy of this module.
+It records, per route:
+- request latency histogram and status counts
+- SQL queries per request and time spent in them (SQLAlchemy engine events)
+- outbound HTTP call latency per target service (see track_outbound)
+
+Metrics live in process memory, so under gunicorn each worker reports its own
+series; the pid label keeps them apart.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+    
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+    
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+    
+    def render(self, const_labels):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{_format_labels(const_labels, self.label_names, labels)} {value}')
+        return lines
+
+class Histogram:
+    """Cumulative histogram keyed by a tuple of label values."""
+    
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.values = {}
+    
+    def observe(self, labels, value):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['buckets'][i] += 1
+        series['sum'] += value
+        series['count'] += 1
+    
+    def render(self, const_labels):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, series['buckets']):
+                bucket_labels = _format_labels(const_labels, self.label_names + ('le',), labels + (_format_number(bound),))
+                lines.append(f'{self.name}_bucket{bucket_labels} {count}')
+            inf_labels = _format_labels(const_labels, self.label_names + ('le',), labels + ('+Inf',))
+            lines.append(f'{self.name}_bucket{inf_labels} {series["count"]}')
+            plain = _format_labels(const_labels, self.label_names, labels)
+            lines.append(f'{self.name}_sum{plain} {series["sum"]}')
+            lines.append(f'{self.name}_count{plain} {series["count"]}')
+        return lines
+
+def _format_number(value):
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(const_labels, names, values):
+    pairs = list(const_labels) + list(zip(names, values))
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class MetricsRegistry:
+    """All metrics recorded by this process."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.service = 'app'
+        self.requests_total = Counter(
+            'http_requests_total', 'HTTP requests handled.', ('method', 'route', 'status'))
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'HTTP request latency.', ('method', 'route'), LATENCY_BUCKETS)
+        self.db_queries = Histogram(
+            'db_queries_per_request', 'SQL statements executed per request.', ('route',), QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram(
+            'db_query_seconds_per_request', 'Time spent in SQL per request.', ('route',), LATENCY_BUCKETS)
+        self.db_queries_total = Counter(
+            'db_queries_total', 'SQL statements executed.', ('route',))
+        self.outbound_duration = Histogram(
+            'outbound_request_duration_seconds', 'Outbound HTTP call latency.', ('target', 'status'), LATENCY_BUCKETS)
+        self.outbound_time = Histogram(
+            'outbound_seconds_per_request', 'Time spent in outbound HTTP calls per request.', ('route',), LATENCY_BUCKETS)
+    
+    def render(self):
+        const_labels = (('service', self.service), ('pid', os.getpid()))
+        with self.lock:
+            lines = []
+            for metric in (self.requests_total, self.request_duration, self.db_queries,
+                           self.db_time, self.db_queries_total, self.outbound_duration, self.outbound_time):
+                lines.extend(metric.render(const_labels))
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@contextmanager
+def track_outbound(url):
+    """Time an outbound HTTP call. Set call['status'] to the response status.
+
+        with track_outbound(USER_SERVICE_URL) as call:
+            response = requests.get(...)
+            call['status'] = response.status_code
+    """
+    call = {'status': 'error'}
+    start = time.perf_counter()
+    try:
+        yield call
+    finally:
+        elapsed = time.perf_counter() - start
+        target = urlsplit(url).netloc or url
+        with REGISTRY.lock:
+            REGISTRY.outbound_duration.observe((target, str(call['status'])), elapsed)
+        if has_request_context():
+            g.metrics_outbound_seconds = g.get('metrics_outbound_seconds', 0.0) + elapsed
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        g.metrics_sql_count = g.get('metrics_sql_count', 0) + 1
+        g.metrics_sql_seconds = g.get('metrics_sql_seconds', 0.0) + elapsed
+
+def init_metrics(app, service):
+    """Record metrics for every request of app and serve them at /metrics."""
+    REGISTRY.service = service
+    
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_seconds = 0.0
+        g.metrics_outbound_seconds = 0.0
+    
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None or request.path == '/metrics':
+            return response
+        elapsed = time.perf_counter() - start
+        route = _route_label()
+        with REGISTRY.lock:
+            REGISTRY.requests_total.inc((request.method, route, str(response.status_code)))
+            REGISTRY.request_duration.observe((request.method, route), elapsed)
+            REGISTRY.db_queries.observe((route,), g.metrics_sql_count)
+            REGISTRY.db_time.observe((route,), g.metrics_sql_seconds)
+            REGISTRY.db_queries_total.inc((route,), g.metrics_sql_count)
+            REGISTRY.outbound_time.observe((route,), g.metrics_outbound_seconds)
+        return response
+    
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+    
+    return REGISTRY
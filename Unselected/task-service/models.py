@@ -4,6 +4,7 @@ Note: User data is managed by the User Service, so we only store user IDs as int
 """
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 db = SQLAlchemy()
 
@@ -28,23 +29,31 @@ class Task(db.Model):
     def __repr__(self):
         return f'<Task {self.title}>'
     
-    def to_dict(self, include_username=False, user_service_url=None):
-        """Convert task to dictionary."""
-        result = {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'assigned_to': self.assigned_to,
-            'created_by': self.created_by
-        }
+    # Keys of to_dict() (besides assigned_to_username); API clients may ask
+    # for a subset with ?fields=
+    FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date', 'created_at',
+              'updated_at', 'assigned_to', 'created_by')
+    
+    def to_dict(self, include_username=False, user_service_url=None, users=None, fields=None, include=()):
+        """Convert task to dictionary.
+        users is an optional dict of user_id -> user already fetched by the
+        caller; when given, usernames come from it instead of per-task calls.
+        fields limits the keys and only those attributes are read, so a task
+        loaded with just their columns serializes without further queries.
+        include=('assignee',) adds the assigned user from users."""
+        result = {}
+        for field in fields or Task.FIELDS:
+            if field != 'assigned_to_username':
+                value = getattr(self, field)
+                result[field] = value.isoformat() if isinstance(value, datetime) else value
         
+        if users is not None:
+            if self.assigned_to in users and (fields is None or 'assigned_to_username' in fields):
+                result['assigned_to_username'] = users[self.assigned_to].get('username')
+            if 'assignee' in include:
+                result['assignee'] = users.get(self.assigned_to)
         # Optionally include username if requested and user_id exists
-        if include_username and self.assigned_to and user_service_url:
+        elif include_username and self.assigned_to and user_service_url:
             try:
                 import requests
                 response = requests.get(f'{user_service_url}/api/users/{self.assigned_to}', timeout=1)
@@ -64,10 +73,85 @@ class ActivityLog(db.Model):
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
+    # Field changes as [{'field', 'old', 'new'}]; rendered to text when read
+    details = db.Column(db.JSON, nullable=True)
     # Store user ID as integer (users are managed by User Service)
     user_id = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Keys of the activity API; API clients may ask for a subset with ?fields=
+    FIELDS = ('id', 'task_id', 'action', 'description', 'created_at')
+    
     def __repr__(self):
         return f'<ActivityLog {self.action} for Task {self.task_id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'action': self.action,
+            'description': self.description,
+            'details': self.details,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class DirectoryUser(db.Model):
+    """Local copy of a User Service user, kept current from its change events."""
+    __tablename__ = 'user_directory'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    username = db.Column(db.String(80), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    
+    def to_dict(self):
+        return {'id': self.id, 'username': self.username, 'email': self.email}
+
+class DirectoryState(db.Model):
+    """Replication position of the user directory (a single row)."""
+    __tablename__ = 'user_directory_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Newest User Service event applied, and when it happened there
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    last_event_at = db.Column(db.DateTime, nullable=True)
+    # Delay between that event and applying it here
+    lag_seconds = db.Column(db.Float, nullable=True)
+    bootstrapped_at = db.Column(db.DateTime, nullable=False)
+    synced_at = db.Column(db.DateTime, nullable=False)
+
+class ChangeSequence(db.Model):
+    """Last sequence number handed to the change feed (a single row).
+    Writers increment it in their own transaction, which also orders them."""
+    __tablename__ = 'change_sequence'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+@event.listens_for(ChangeSequence.__table__, 'after_create')
+def _seed_change_sequence(table, connection, **kw):
+    # Created with the table so concurrent first writers only ever UPDATE it
+    connection.execute(table.insert().values(id=1, value=0))
 
+class TaskChange(db.Model):
+    """One entry of the change feed: a task or activity row that was written."""
+    __tablename__ = 'task_changes'
+    
+    seq = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    entity = db.Column(db.String(20), nullable=False)  # 'task' or 'activity'
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'insert', 'update' or 'delete'
+    # The row after the change (None for deletes)
+    data = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'entity': self.entity,
+            'id': self.entity_id,
+            'op': self.op,
+            'data': self.data,
+            'created_at': self.created_at.isoformat()
+        }
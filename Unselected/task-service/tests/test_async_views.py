@@ -0,0 +1,172 @@
+"""
+Tests for the async views and concurrent User Service lookups.
+"""
+import asyncio
+import pytest
+import aio
+import user_directory
+from app import app
+from cache import get_cache
+from models import db, Task
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create test client with the outbound calls stubbed."""
+    app.config['TESTING'] = True
+    lookups = []
+    
+    async def fake_fetch_users(user_ids):
+        user_ids = {user_id for user_id in user_ids if user_id}
+        lookups.append(user_ids)
+        return {user_id: {'id': user_id, 'username': f'user{user_id}'} for user_id in user_ids if user_id < 100}
+    
+    async def fake_notify(event_type, payload):
+        pass
+    
+    monkeypatch.setattr(aio, 'fetch_users', fake_fetch_users)
+    monkeypatch.setattr(aio, 'notify', fake_notify)
+    
+    with app.app_context():
+        db.create_all()
+        # The app outlives each test's database, and change feed positions restart with it
+        get_cache().clear()
+        test_client = app.test_client()
+        test_client.lookups = lookups
+        yield test_client
+        db.session.remove()
+        db.drop_all()
+
+def test_list_fetches_each_assignee_once(client):
+    """Test GET /api/tasks batches username lookups per distinct assignee."""
+    for assignee in (1, 1, 2):
+        response = client.post('/api/tasks', json={'title': 'Task', 'assigned_to': assignee})
+        assert response.status_code == 201
+    client.lookups.clear()
+    
+    response = client.get('/api/tasks?include_username=true')
+    assert response.status_code == 200
+    assert [task['assigned_to_username'] for task in response.get_json()] == ['user1', 'user1', 'user2']
+    assert client.lookups == [{1, 2}]
+
+def test_create_rejects_unknown_user(client):
+    """Test POST /api/tasks validates users through the async lookup."""
+    response = client.post('/api/tasks', json={'title': 'Task', 'assigned_to': 500})
+    assert response.status_code == 400
+
+def test_async_engine_reads_committed_tasks(client):
+    """Test the async engine sees rows written through the sync session."""
+    with app.app_context():
+        db.session.add(Task(title='Written synchronously'))
+        db.session.commit()
+        tasks = asyncio.run(aio.scalars(db.select(Task)))
+    assert [task.title for task in tasks] == ['Written synchronously']
+
+def test_patch_updates_columns_and_logs_old_values(client):
+    """Test PATCH sets only the sent columns and logs the diff from their old values."""
+    task_id = client.post('/api/tasks', json={'title': 'Task', 'description': 'Keep', 'assigned_to': 1}).get_json()['id']
+    
+    response = client.patch(f'/api/tasks/{task_id}', json={'status': 'completed', 'assigned_to': 2})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['status'] == 'completed'
+    assert data['assigned_to'] == 2
+    assert 'title' not in data
+    
+    task = client.get(f'/api/tasks/{task_id}').get_json()
+    assert (task['status'], task['assigned_to'], task['description']) == ('completed', 2, 'Keep')
+    activity = client.get('/api/activity').get_json()
+    assert activity[0]['description'] == (
+        'status was changed from pending to completed; assigned to was changed from user1 to user2')
+
+def test_patch_rejects_unknown_task_and_user(client):
+    """Test PATCH validates the assignee and 404s for unknown tasks."""
+    task_id = client.post('/api/tasks', json={'title': 'Task'}).get_json()['id']
+    assert client.patch(f'/api/tasks/{task_id}', json={'assigned_to': 500}).status_code == 400
+    assert client.patch('/api/tasks/9999', json={'status': 'completed'}).status_code == 404
+    assert client.patch(f'/api/tasks/{task_id}', json={}).status_code == 400
+    assert client.patch(f'/api/tasks/{task_id}', json={'due_date': 'garbage'}).status_code == 400
+
+def test_patch_clears_due_date_with_empty_value(client):
+    """Test PATCH treats an empty due_date as clearing it, like PUT."""
+    task_id = client.post('/api/tasks', json={'title': 'Dated', 'due_date': '2030-01-02T00:00:00'}).get_json()['id']
+    response = client.patch(f'/api/tasks/{task_id}', json={'due_date': ''})
+    assert response.status_code == 200
+    assert response.get_json()['due_date'] is None
+    assert client.get(f'/api/tasks/{task_id}').get_json()['due_date'] is None
+    assert client.get('/api/activity').get_json()[0]['action'] == 'updated'
+
+def test_activity_stored_as_details_and_rendered_in_one_lookup(client):
+    """Test PUT logs changes without user lookups and GET /api/activity batches them."""
+    first = client.post('/api/tasks', json={'title': 'First', 'assigned_to': 1}).get_json()['id']
+    second = client.post('/api/tasks', json={'title': 'Second', 'assigned_to': 3}).get_json()['id']
+    client.lookups.clear()
+    
+    assert client.put(f'/api/tasks/{first}', json={'assigned_to': 2}).status_code == 200
+    assert client.put(f'/api/tasks/{second}', json={'assigned_to': 4, 'status': 'completed'}).status_code == 200
+    assert client.lookups == [{2}, {4}]
+    client.lookups.clear()
+    
+    activity = client.get('/api/activity').get_json()
+    assert client.lookups == [{1, 2, 3, 4}]
+    descriptions = {entry['task_id']: entry['description'] for entry in activity if entry['action'] == 'updated'}
+    assert descriptions[first] == 'assigned to was changed from user1 to user2'
+    assert descriptions[second] == 'assigned to was changed from user3 to user4; status was changed from pending to completed'
+
+def test_sparse_fieldsets(client):
+    """Test ?fields= and ?include= shape tasks and activity, and skip lookups nobody asked for."""
+    task_id = client.post('/api/tasks', json={'title': 'Task', 'description': 'Long text', 'assigned_to': 1}).get_json()['id']
+    client.lookups.clear()
+    
+    assert client.get('/api/tasks?fields=title,status').get_json() == [{'id': task_id, 'title': 'Task', 'status': 'pending'}]
+    assert client.lookups == []
+    
+    task = client.get(f'/api/tasks/{task_id}?fields=assigned_to_username&include=assignee').get_json()
+    assert task == {'id': task_id, 'assigned_to_username': 'user1', 'assignee': {'id': 1, 'username': 'user1'}}
+    
+    assert client.get('/api/activity?fields=action').get_json() == [{'id': 1, 'action': 'created'}]
+    assert client.lookups == [{1}]
+    
+    response = client.get('/api/tasks?fields=title,secret')
+    assert response.status_code == 400
+    assert 'secret' in response.get_json()['error']
+
+def test_lists_answer_304_until_they_change(client, monkeypatch):
+    """Test task and activity lists carry validators and honour If-None-Match."""
+    monkeypatch.setattr(user_directory, 'position', lambda: 7)
+    task_id = client.post('/api/tasks', json={'title': 'Task', 'assigned_to': 1}).get_json()['id']
+    
+    for path in ('/api/tasks?fields=title', '/api/tasks?include_username=true', '/api/activity'):
+        response = client.get(path)
+        assert response.headers['Last-Modified']
+        assert client.get(path, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    
+    etag = client.get('/api/tasks?include_username=true').headers['ETag']
+    monkeypatch.setattr(user_directory, 'position', lambda: 8)  # a user was renamed
+    assert client.get('/api/tasks?include_username=true', headers={'If-None-Match': etag}).status_code == 200
+    
+    etag = client.get('/api/tasks?fields=title').headers['ETag']
+    client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'})
+    assert client.get('/api/tasks?fields=title', headers={'If-None-Match': etag}).status_code == 200
+    
+    monkeypatch.setattr(user_directory, 'position', lambda: None)  # names come from remote calls
+    assert 'ETag' not in client.get('/api/tasks?include_username=true').headers
+
+def test_list_is_cached_until_the_change_feed_moves(client, monkeypatch):
+    """Test repeat list reads skip the task query until a task is written."""
+    task_id = client.post('/api/tasks', json={'title': 'Task'}).get_json()['id']
+    queries = []
+    scalars = aio.scalars
+    
+    async def counting_scalars(statement):
+        queries.append(statement)
+        return await scalars(statement)
+    
+    monkeypatch.setattr(aio, 'scalars', counting_scalars)
+    first = client.get('/api/tasks?fields=title,status')
+    assert client.get('/api/tasks?fields=title,status').get_json() == first.get_json()
+    assert len(queries) == 1
+    assert client.get('/api/tasks?fields=title,status', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    
+    client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'})
+    assert client.get('/api/tasks?fields=title,status').get_json()[0]['status'] == 'completed'
+    assert len(queries) == 2
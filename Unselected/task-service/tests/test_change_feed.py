@@ -0,0 +1,95 @@
+"""
+Tests for the task change feed.
+"""
+import threading
+import time
+import pytest
+import aio
+import change_feed
+from app import app
+from models import db
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create test client with the outbound calls stubbed."""
+    app.config['TESTING'] = True
+    
+    async def fake_fetch_users(user_ids):
+        return {user_id: {'id': user_id, 'username': f'user{user_id}'} for user_id in user_ids if user_id}
+    
+    async def fake_notify(event_type, payload):
+        pass
+    
+    monkeypatch.setattr(aio, 'fetch_users', fake_fetch_users)
+    monkeypatch.setattr(aio, 'notify', fake_notify)
+    
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+def summary(feed):
+    return [(change['seq'], change['entity'], change['op']) for change in feed['changes']]
+
+def test_writes_appear_in_order(client):
+    """Test every task and activity write gets the next sequence number."""
+    task_id = client.post('/api/tasks', json={'title': 'Write docs'}).get_json()['id']
+    client.put(f'/api/tasks/{task_id}', json={'status': 'in_progress'})
+    client.patch(f'/api/tasks/{task_id}', json={'priority': 'high'})
+    
+    feed = client.get('/api/changes').get_json()
+    assert summary(feed) == [
+        (1, 'task', 'insert'), (2, 'activity', 'insert'),
+        (3, 'task', 'update'), (4, 'activity', 'insert'),
+        (5, 'task', 'update'), (6, 'activity', 'insert'),
+    ]
+    assert feed['last_seq'] == feed['head_seq'] == 6
+    assert feed['changes'][2]['data']['status'] == 'in_progress'
+    assert feed['changes'][4]['data']['priority'] == 'high'
+    assert feed['changes'][5]['data']['details'] == [{'field': 'priority', 'old': 'medium', 'new': 'high'}]
+    
+    client.delete(f'/api/tasks/{task_id}')
+    feed = client.get('/api/changes?after=6').get_json()
+    assert sorted(summary(feed)) == [
+        (7, 'task', 'delete'), (8, 'activity', 'delete'), (9, 'activity', 'delete'), (10, 'activity', 'delete')]
+    assert client.get('/api/changes?after=2&limit=2').get_json()['last_seq'] == 4
+
+def test_long_poll_returns_when_a_change_commits(client):
+    """Test a waiting reader wakes up on the next commit instead of the timeout."""
+    client.post('/api/tasks', json={'title': 'First'})
+    head = client.get('/api/changes').get_json()['head_seq']
+    
+    def write_later():
+        time.sleep(0.2)
+        with app.app_context():
+            app.test_client().post('/api/tasks', json={'title': 'Second'})
+    
+    writer = threading.Thread(target=write_later)
+    writer.start()
+    start = time.monotonic()
+    feed = client.get(f'/api/changes?after={head}&wait=5').get_json()
+    writer.join()
+    assert time.monotonic() - start < 2
+    assert feed['changes'][0]['seq'] == head + 1
+    assert feed['changes'][0]['data']['title'] == 'Second'
+    
+    start = time.monotonic()
+    assert client.get(f'/api/changes?after={head + 2}&wait=0.3').get_json()['changes'] == []
+    assert time.monotonic() - start >= 0.3
+
+def test_long_polls_over_the_limit_answer_at_once(client, monkeypatch):
+    """Test only MAX_WAITERS long polls hold request threads; the rest are told to retry."""
+    monkeypatch.setattr(change_feed, '_waiters', threading.BoundedSemaphore(1))
+    with change_feed.waiting_slot(5) as may_wait:
+        assert may_wait
+        start = time.monotonic()
+        response = client.get('/api/changes?after=0&wait=5')
+        assert time.monotonic() - start < 1
+        assert response.get_json()['changes'] == []
+        assert response.headers['Retry-After'] == '1'
+    
+    start = time.monotonic()
+    response = client.get('/api/changes?after=0&wait=0.2')
+    assert time.monotonic() - start >= 0.2
+    assert 'Retry-After' not in response.headers
@@ -0,0 +1,146 @@
+"""
+Tests for the circuit breaker and bulkhead around outbound calls.
+"""
+import asyncio
+import httpx
+import pytest
+import requests
+import aio
+import resilience
+import user_directory
+from resilience import Bulkhead, BulkheadFull, CircuitBreaker, CircuitOpen, Dependency
+from app import app, get_user_from_service
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def make_dependency(clock, limit=2):
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0,
+                             slow_rate=0.75, open_seconds=10, clock=clock)
+    return Dependency('user-service', breaker=breaker, bulkhead=Bulkhead(limit=limit))
+
+def call(dependency, status):
+    with dependency.guard() as outcome:
+        outcome['status'] = status
+
+def test_breaker_opens_on_errors_and_recovers_through_probe():
+    """Test the error rate trips the breaker and a half-open probe closes it."""
+    clock = FakeClock()
+    dependency = make_dependency(clock)
+    for status in (200, 500, 200, 503):
+        call(dependency, status)
+    assert dependency.breaker.state == 'open'
+    with pytest.raises(CircuitOpen):
+        call(dependency, 200)
+    
+    clock.now = 10
+    with dependency.guard() as outcome:
+        assert dependency.breaker.state == 'half_open'
+        with pytest.raises(CircuitOpen):
+            call(dependency, 200)  # only one probe at a time
+        outcome['status'] = 200
+    assert dependency.breaker.state == 'closed'
+    assert dependency.rejected == 2
+
+def test_breaker_opens_on_slow_calls_and_failed_probe_reopens():
+    """Test the slow-call rate trips the breaker and a failing probe re-opens it."""
+    clock = FakeClock()
+    dependency = make_dependency(clock)
+    for seconds in (2.0, 2.0, 2.0, 0.1):
+        dependency.breaker.record(False, seconds)
+    assert dependency.breaker.state == 'open'
+    
+    clock.now = 10
+    with pytest.raises(requests.ConnectionError):
+        with dependency.guard():
+            raise requests.ConnectionError('refused')
+    assert dependency.breaker.state == 'open'
+    assert dependency.breaker.opened_at == 10
+
+def test_bulkhead_rejects_calls_over_the_limit():
+    """Test a dependency never has more than its limit of calls in flight."""
+    dependency = make_dependency(FakeClock(), limit=1)
+    with dependency.guard() as outcome:
+        outcome['status'] = 200
+        with pytest.raises(BulkheadFull):
+            call(dependency, 200)
+        assert dependency.status()['in_flight'] == 1
+    assert dependency.status() == {'state': 'closed', 'in_flight': 0, 'limit': 1, 'rejected': 1}
+
+def test_async_fan_out_over_the_limit_waits_instead_of_failing(monkeypatch):
+    """Test one request looking up more users than the bulkhead allows gets them all."""
+    dependency = Dependency('user-service', bulkhead=Bulkhead(limit=10))
+    monkeypatch.setattr(resilience, 'DEPENDENCIES', {'user-service': dependency})
+    monkeypatch.setattr(user_directory, 'lookup', lambda user_ids: None)
+    calls = {'in_flight': 0, 'peak': 0}
+    
+    async def user_service(request):
+        calls['in_flight'] += 1
+        calls['peak'] = max(calls['peak'], calls['in_flight'])
+        await asyncio.sleep(0.01)
+        calls['in_flight'] -= 1
+        user_id = int(request.url.path.rsplit('/', 1)[1])
+        return httpx.Response(200, json={'id': user_id, 'username': f'user{user_id}'})
+    
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, 'AsyncClient',
+                        lambda **kwargs: async_client(transport=httpx.MockTransport(user_service), **kwargs))
+    with app.app_context():
+        users = asyncio.run(aio.fetch_users(range(1, 26)))
+    assert sorted(users) == list(range(1, 26))
+    assert calls['peak'] == 10
+    assert dependency.status() == {'state': 'closed', 'in_flight': 0, 'limit': 10, 'rejected': 0}
+
+def test_cancelled_or_lost_probe_does_not_keep_the_breaker_shut():
+    """Test a probe cancelled while waiting for a slot is given back, and one
+    that never reports back is replaced after open_seconds."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=4, min_calls=4, open_seconds=10, clock=clock)
+    dependency = Dependency('user-service', breaker=breaker, bulkhead=Bulkhead(limit=1, wait_seconds=5))
+    for _ in range(4):
+        call(dependency, 500)
+    clock.now = 10
+    assert dependency.bulkhead.acquire()  # the only slot is busy
+    
+    async def cancelled_probe():
+        async def probe():
+            async with dependency.guard_async() as outcome:
+                outcome['status'] = 200
+        waiting = asyncio.ensure_future(probe())
+        await asyncio.sleep(0.05)
+        assert (breaker.state, breaker.probing) == ('half_open', True)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+    
+    asyncio.run(cancelled_probe())
+    dependency.bulkhead.release()
+    assert (breaker.state, breaker.probing) == ('half_open', False)
+    
+    assert breaker.allow()  # a probe that never reports back
+    assert not breaker.allow()
+    clock.now = 20
+    with dependency.guard() as outcome:
+        outcome['status'] = 200
+    assert breaker.state == 'closed'
+
+def test_user_lookups_fail_fast_once_the_circuit_opens(monkeypatch):
+    """Test a failing User Service stops receiving calls after the breaker trips."""
+    monkeypatch.setattr(resilience, 'DEPENDENCIES', {'user-service': make_dependency(FakeClock())})
+    attempts = []
+    
+    def refuse(url, **kwargs):
+        attempts.append(url)
+        raise requests.ConnectionError('refused')
+    
+    monkeypatch.setattr(requests, 'get', refuse)
+    with app.app_context():
+        for _ in range(10):
+            assert get_user_from_service(1) is None
+        health = app.test_client().get('/health').get_json()
+    assert len(attempts) == 4
+    assert health['dependencies']['user-service']['state'] == 'open'
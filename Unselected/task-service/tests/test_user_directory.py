@@ -0,0 +1,161 @@
+"""
+Tests for the local user directory replica.
+"""
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+import pytest
+import requests
+import resilience
+import user_directory
+from app import app, validate_user_id
+from models import db, DirectoryState, DirectoryUser
+
+class FakeResponse:
+    def __init__(self, body, headers=None, status_code=200):
+        self.body = body
+        self.headers = headers or {}
+        self.status_code = status_code
+    
+    def json(self):
+        return self.body
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code}')
+
+class FakeUserService:
+    """Just enough of User Service: the user list, single users and the event log."""
+    
+    def __init__(self):
+        self.users = {}
+        self.events = []
+        self.last_id = 0
+        self.calls = []
+    
+    def change(self, event_type, user_id, username):
+        user = {'id': user_id, 'username': username, 'email': f'{username}@example.com'}
+        if event_type == 'user_deleted':
+            self.users.pop(user_id, None)
+        else:
+            self.users[user_id] = user
+        self.last_id += 1
+        event = {'id': self.last_id, 'event_type': event_type, 'user': user,
+                 'timestamp': datetime.utcnow().isoformat()}
+        self.events.append(event)
+        return event
+    
+    def get(self, url, **kwargs):
+        parts = urlsplit(url)
+        self.calls.append(parts.path)
+        if parts.path == '/api/users':
+            return FakeResponse(list(self.users.values()), {'X-Last-Event-Id': str(self.last_id)})
+        if parts.path == '/api/users/events':
+            after = int(parse_qs(parts.query)['after'][0])
+            return FakeResponse([event for event in self.events if event['id'] > after])
+        user_id = int(parts.path.rsplit('/', 1)[1])
+        if user_id in self.users:
+            return FakeResponse(self.users[user_id])
+        return FakeResponse({'error': 'not found'}, status_code=404)
+
+@pytest.fixture
+def service(monkeypatch):
+    """Empty task-service database wired to a fake User Service."""
+    app.config['TESTING'] = True
+    fake = FakeUserService()
+    monkeypatch.setattr(requests, 'get', fake.get)
+    monkeypatch.setattr(resilience, 'DEPENDENCIES', {})
+    with app.app_context():
+        db.create_all()
+        yield fake
+        db.session.remove()
+        db.drop_all()
+
+def test_bootstraps_then_serves_lookups_locally(service):
+    """Test the first lookup copies the directory and later ones stay local."""
+    service.change('user_created', 1, 'alice')
+    service.change('user_created', 2, 'bob')
+    
+    assert validate_user_id(1)
+    assert service.calls == ['/api/users']
+    assert user_directory.lookup([1, 2, 3]) == {
+        1: {'id': 1, 'username': 'alice', 'email': 'alice@example.com'},
+        2: {'id': 2, 'username': 'bob', 'email': 'bob@example.com'},
+    }
+    assert validate_user_id(2)
+    assert service.calls == ['/api/users']
+    
+    status = app.test_client().get('/api/user-directory').get_json()
+    assert (status['bootstrapped'], status['users'], status['last_event_id']) == (True, 2, 2)
+
+def test_concurrent_bootstrap_by_another_worker_is_not_an_error(service, monkeypatch):
+    """Test losing the race to create the replica falls back to the winner's copy."""
+    service.change('user_created', 1, 'alice')
+    list_users = service.get
+    read_state = user_directory._state
+    reads = []
+    
+    def other_worker_bootstraps_meanwhile(url, **kwargs):
+        with db.engine.begin() as connection:
+            now = datetime.utcnow()
+            connection.execute(DirectoryState.__table__.insert().values(
+                id=1, last_event_id=1, bootstrapped_at=now, synced_at=now))
+            connection.execute(DirectoryUser.__table__.insert().values(
+                id=1, username='alice', email='alice@example.com'))
+        return list_users(url, **kwargs)
+    
+    def read_before_it_committed():
+        reads.append(1)
+        return None if len(reads) <= 2 else read_state()
+    
+    monkeypatch.setattr(requests, 'get', other_worker_bootstraps_meanwhile)
+    monkeypatch.setattr(user_directory, '_state', read_before_it_committed)
+    assert validate_user_id(1)
+    assert service.calls == ['/api/users']
+    assert user_directory.status()['last_event_id'] == 1
+
+def test_pushed_events_applied_in_order_with_catch_up_on_gaps(service):
+    """Test pushes update the replica, duplicates are ignored and gaps are filled."""
+    service.change('user_created', 1, 'alice')
+    user_directory.ensure_synced()
+    client = app.test_client()
+    
+    renamed = service.change('user_updated', 1, 'alice2')
+    assert client.post('/api/user-events', json=renamed).get_json() == {'applied': 1}
+    assert client.post('/api/user-events', json=renamed).get_json() == {'applied': 0}
+    assert user_directory.lookup([1])[1]['username'] == 'alice2'
+    
+    service.change('user_created', 2, 'bob')  # push lost
+    deleted = service.change('user_deleted', 1, 'alice2')
+    assert client.post('/api/user-events', json=deleted).get_json() == {'applied': 2}
+    assert service.calls[-1] == '/api/users/events'
+    assert user_directory.lookup([1, 2]) == {2: {'id': 2, 'username': 'bob', 'email': 'bob@example.com'}}
+    
+    status = client.get('/api/user-directory').get_json()
+    assert status['last_event_id'] == 4
+    assert 0 <= status['lag_seconds'] < 5
+
+def test_gap_left_by_a_rolled_back_event_is_skipped_once_settled(service, monkeypatch):
+    """Test an id missing from the event log holds the replica back only for the grace period."""
+    service.change('user_created', 1, 'alice')
+    user_directory.ensure_synced()
+    client = app.test_client()
+    
+    service.last_id += 1  # the insert of event 2 was rolled back
+    bob = service.change('user_created', 2, 'bob')
+    assert client.post('/api/user-events', json=bob).get_json() == {'applied': 0}
+    assert service.calls[-1] == '/api/users/events'
+    
+    monkeypatch.setattr(user_directory, 'GAP_GRACE', 0)
+    assert client.post('/api/user-events', json=bob).get_json() == {'applied': 1}
+    renamed = service.change('user_updated', 2, 'bobby')
+    assert client.post('/api/user-events', json=renamed).get_json() == {'applied': 1}
+    assert user_directory.lookup([2])[2]['username'] == 'bobby'
+    assert client.get('/api/user-directory').get_json()['last_event_id'] == 4
+
+def test_unknown_users_fall_back_to_user_service(service):
+    """Test a user the replica has not heard of yet is still found remotely."""
+    user_directory.ensure_synced()
+    service.users[7] = {'id': 7, 'username': 'new', 'email': 'new@example.com'}
+    assert validate_user_id(7)
+    assert not validate_user_id(8)
+    assert service.calls == ['/api/users', '/api/users/7', '/api/users/8']
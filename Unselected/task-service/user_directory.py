@@ -0,0 +1,156 @@
+"""
+Local replica of the User Service's user directory (id -> username/email).
+
+Validation and username lookups read the user_directory table in this service's
+own database instead of calling the User Service. The replica:
+- bootstraps from GET /api/users, whose X-Last-Event-Id header says which
+  change event the list already reflects
+- applies user_created/user_updated/user_deleted events pushed to
+  POST /api/user-events, in event-id order; a gap in the ids (a lost push)
+  triggers a catch-up read of GET /api/users/events?after=<last applied id>
+- also catches up when nothing has arrived for USER_DIRECTORY_MAX_AGE seconds
+  (default 60)
+- steps over an id the event log itself is missing once a later event is
+  USER_DIRECTORY_GAP_GRACE seconds old (default 30): the insert that took the
+  id was rolled back rather than still committing
+
+Applying an event twice has no effect, so overlapping pushes and catch-ups are
+harmless. Users missing from the replica are looked up remotely by the caller.
+"""
+import os
+from datetime import datetime
+import requests
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from metrics import track_outbound
+from models import db, DirectoryUser, DirectoryState
+from resilience import DependencyUnavailable, dependency
+from tracing import trace_outbound
+
+MAX_AGE = float(os.environ.get('USER_DIRECTORY_MAX_AGE', '60'))
+GAP_GRACE = float(os.environ.get('USER_DIRECTORY_GAP_GRACE', '30'))
+EVENT_PAGE_SIZE = 1000
+
+def _get(path):
+    user_service_url = os.environ.get('USER_SERVICE_URL', 'http://user-service:5002')
+    url = f'{user_service_url}{path}'
+    with dependency('user-service').guard() as outcome, \
+            track_outbound(user_service_url) as call, trace_outbound('GET', url) as span:
+        response = requests.get(url, headers=span.headers(), timeout=5)
+        call['status'] = outcome['status'] = response.status_code
+        span.set_attribute('http.status_code', response.status_code)
+    response.raise_for_status()
+    return response
+
+def _state():
+    return db.session.get(DirectoryState, 1)
+
+def bootstrap():
+    """Replace the replica with the User Service's current user list."""
+    response = _get('/api/users?fields=id,username,email')
+    now = datetime.utcnow()
+    db.session.execute(delete(DirectoryUser))
+    db.session.add_all(DirectoryUser(id=user['id'], username=user['username'], email=user['email'])
+                       for user in response.json())
+    state = _state() or DirectoryState(id=1)
+    state.last_event_id = int(response.headers.get('X-Last-Event-Id', 0))
+    state.bootstrapped_at = state.synced_at = now
+    db.session.add(state)
+    db.session.commit()
+    return state
+
+def _settled(event):
+    """Whether ids below event that are still missing from the log never will be."""
+    return (datetime.utcnow() - datetime.fromisoformat(event['timestamp'])).total_seconds() >= GAP_GRACE
+
+def _apply(state, events, skip_gaps=False):
+    """Apply consecutive events after state.last_event_id; stop at a gap,
+    unless skip_gaps and the events come from the log and have settled."""
+    applied = 0
+    for event in sorted(events, key=lambda event: event['id']):
+        if event['id'] <= state.last_event_id:
+            continue
+        if event['id'] != state.last_event_id + 1 and not (skip_gaps and _settled(event)):
+            break
+        user = event['user']
+        if event['event_type'] == 'user_deleted':
+            db.session.execute(delete(DirectoryUser).where(DirectoryUser.id == user['id']))
+        else:
+            db.session.merge(DirectoryUser(id=user['id'], username=user['username'], email=user['email']))
+        state.last_event_id = event['id']
+        state.last_event_at = datetime.fromisoformat(event['timestamp'])
+        applied += 1
+    now = datetime.utcnow()
+    if applied:
+        state.lag_seconds = (now - state.last_event_at).total_seconds()
+    state.synced_at = now
+    db.session.commit()
+    return applied
+
+def catch_up():
+    """Read and apply every event newer than the replica. Returns the number applied."""
+    state = _state()
+    applied = 0
+    while True:
+        events = _get(f'/api/users/events?after={state.last_event_id}&limit={EVENT_PAGE_SIZE}').json()
+        applied += _apply(state, events, skip_gaps=True)
+        # A short page is the end of the log; stopping early is a gap still filling
+        if len(events) < EVENT_PAGE_SIZE or state.last_event_id < max(event['id'] for event in events):
+            return applied
+
+def receive(events):
+    """Apply pushed events. Returns the number applied (0 before bootstrap,
+    which will include them anyway)."""
+    state = _state()
+    if state is None or not events:
+        return 0
+    first = min(event['id'] for event in events)
+    if first > state.last_event_id + 1:
+        return catch_up()
+    return _apply(state, events)
+
+def ensure_synced():
+    """Bootstrap or catch up if needed; returns the state, or None if the
+    replica could not be bootstrapped."""
+    state = _state()
+    try:
+        if state is None:
+            state = bootstrap()
+        elif (datetime.utcnow() - state.synced_at).total_seconds() > MAX_AGE:
+            catch_up()
+    except IntegrityError:
+        # Another thread or worker bootstrapped or applied the same events first
+        db.session.rollback()
+    except (requests.RequestException, DependencyUnavailable, ValueError) as e:
+        db.session.rollback()
+        print(f"Failed to sync user directory: {e}")
+    return _state()
+
+def lookup(user_ids):
+    """Dict of user_id -> user from the replica for the ids it knows,
+    or None when the replica is unavailable."""
+    if ensure_synced() is None:
+        return None
+    rows = db.session.execute(select(DirectoryUser).where(DirectoryUser.id.in_(list(user_ids)))).scalars()
+    return {row.id: row.to_dict() for row in rows}
+
+def position():
+    """Id of the newest applied event (after catching up if due), or None when
+    the replica is unavailable. Changes whenever a username may have changed."""
+    state = ensure_synced()
+    return state.last_event_id if state else None
+
+def status():
+    """Replication position and lag, for monitoring."""
+    state = _state()
+    if state is None:
+        return {'bootstrapped': False}
+    return {
+        'bootstrapped': True,
+        'users': db.session.execute(select(func.count(DirectoryUser.id))).scalar(),
+        'last_event_id': state.last_event_id,
+        'last_event_at': state.last_event_at.isoformat() if state.last_event_at else None,
+        'lag_seconds': state.lag_seconds,
+        'seconds_since_sync': (datetime.utcnow() - state.synced_at).total_seconds(),
+        'bootstrapped_at': state.bootstrapped_at.isoformat()
+    }
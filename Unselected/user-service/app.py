@@ -4,48 +4,159 @@ Manages all user-related operations.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from metrics import init_metrics
+from profiling import init_profiling
+from http_cache import init_compression, collection_etag, not_modified, set_validators
+from tracing import init_tracing
+from cache import get_cache, init_cache
 from datetime import datetime
-from models import db, User
+from models import db, User, UserEvent
+from events import EventPublisher
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 from config import Config
+from engine import configure_engine
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+init_metrics(app, service='user-service')
+init_tracing(app, service='user-service')
+init_profiling(app)
+init_compression(app)
+init_cache(app, namespace='user-service')
 
 # Initialize database
 db.init_app(app)
+publisher = EventPublisher(app.config['USER_EVENT_SUBSCRIBERS'].split(','))
+
+# Largest POST /api/users/bulk batch; keeps the username/email lookup within
+# SQLite's bound-parameter limit
+BULK_IMPORT_MAX = 10000
+# Events pushed to subscribers per POST after a bulk import
+EVENT_PUSH_BATCH = 1000
+# Default and largest page of GET /api/users/search
+USER_SEARCH_LIMIT = 20
+USER_SEARCH_MAX = 100
 
-# Create tables
 with app.app_context():
+    configure_engine(db.engine, app.config['DB_PROFILE'])
+
+@app.cli.command('init-db')
+def init_db():
+    """Create missing tables and indexes: flask --app app init-db. Run once
+    before starting the workers rather than on every import."""
     db.create_all()
+    # create_all skips existing tables; add indexes defined since
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+    print('Initialized the database.')
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
     return jsonify({'status': 'healthy', 'service': 'user-service'}), 200
 
+def record_event(event_type, user):
+    """Add a change event to the current transaction; publish it after commit."""
+    event = UserEvent(event_type=event_type, user_id=user.id, username=user.username, email=user.email)
+    db.session.add(event)
+    return event
+
+def requested_fields():
+    """User fields listed in ?fields=a,b (the id is always included), or None
+    when absent. Raises ValueError naming unknown fields."""
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [field for field in fields if field not in User.FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}. Choose from {", ".join(User.FIELDS)}.')
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def user_query(fields):
+    """User query selecting only the columns of fields (all when None)."""
+    if fields is None:
+        return User.query
+    return User.query.options(load_only(*[getattr(User, field) for field in fields]))
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
-    """Get all users."""
-    users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'created_at': user.created_at.isoformat()
-    } for user in users]), 200
+    """Get all users (accepts ?fields=).
+    X-Last-Event-Id is the newest change event already reflected in the list,
+    so replicas can continue from there."""
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    last_event_id = db.session.query(func.max(UserEvent.id)).scalar() or 0
+    # Every create, update and delete adds an event, so the newest event id
+    # also validates a cached copy of the list
+    etag = collection_etag(last_event_id)
+    response = not_modified(etag)
+    if response is None:
+        # Keyed by the same event id, so workers share one copy per version of the list
+        key = f'users:{last_event_id}:{",".join(fields or ())}'
+        users = get_cache().get_or_set(key, lambda: [user.to_dict(fields) for user in user_query(fields).all()])
+        response = set_validators(jsonify(users), etag)
+    response.headers['X-Last-Event-Id'] = str(last_event_id)
+    return response
+
+def starts_with(expression, prefix):
+    """Prefix match on an expression, as a range its index can serve;
+    the LIKE re-checks the prefix exactly."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return and_(expression >= prefix, expression < upper, expression.like(pattern, escape='\\'))
+
+def starts_with_ignoring_case(column, prefix):
+    """Prefix match on lower(column), or on the column as typed, since SQLite's
+    lower() only folds ASCII."""
+    return or_(starts_with(func.lower(column), prefix.lower()), starts_with(column, prefix))
+
+@app.route('/api/users/search', methods=['GET'])
+def search_users():
+    """Users whose username or email starts with ?q=, ignoring case, by username
+    (accepts ?limit=, default 20, at most 100, and ?fields=). Used by the
+    assignee picker instead of loading every user."""
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = min(max(request.args.get('limit', USER_SEARCH_LIMIT, type=int), 1), USER_SEARCH_MAX)
+    query = user_query(fields)
+    prefix = request.args.get('q', '').strip()
+    if prefix:
+        query = query.filter(or_(starts_with_ignoring_case(User.username, prefix),
+                                 starts_with_ignoring_case(User.email, prefix)))
+    users = query.order_by(User.username).limit(limit).all()
+    return jsonify([user.to_dict(fields) for user in users]), 200
+
+@app.route('/api/users/events', methods=['GET'])
+def get_user_events():
+    """Change events after a given event id, oldest first."""
+    after = request.args.get('after', 0, type=int)
+    limit = min(request.args.get('limit', 1000, type=int), 1000)
+    events = UserEvent.query.filter(UserEvent.id > after).order_by(UserEvent.id).limit(limit).all()
+    return jsonify([event.to_dict() for event in events]), 200
 
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    """Get a specific user by ID."""
-    user = User.query.get_or_404(user_id)
-    return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'created_at': user.created_at.isoformat()
-    }), 200
+    """Get a specific user by ID (accepts ?fields=)."""
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    user = user_query(fields).get_or_404(user_id)
+    return jsonify(user.to_dict(fields)), 200
 
 @app.route('/api/users', methods=['POST'])
 def create_user():
@@ -70,7 +181,10 @@ def create_user():
     )
     
     db.session.add(user)
+    db.session.flush()
+    event = record_event('user_created', user)
     db.session.commit()
+    publisher.publish(event.to_dict())
     
     return jsonify({
         'id': user.id,
@@ -79,6 +193,70 @@ def create_user():
         'created_at': user.created_at.isoformat()
     }), 201
 
+@app.route('/api/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """Create many users in one transaction, e.g. {"users": [{"username": ..., "email": ...}]}.
+    Rows missing a field, repeating an earlier row's username or email, or
+    matching an existing user are skipped and reported with their index."""
+    data = request.json or {}
+    rows = data.get('users')
+    if not isinstance(rows, list):
+        return jsonify({'error': 'users must be a list'}), 400
+    if len(rows) > BULK_IMPORT_MAX:
+        return jsonify({'error': f'At most {BULK_IMPORT_MAX} users per request'}), 400
+    
+    skipped = []
+    candidates = []
+    seen_usernames, seen_emails = set(), set()
+    for index, row in enumerate(rows):
+        username = row.get('username') if isinstance(row, dict) else None
+        email = row.get('email') if isinstance(row, dict) else None
+        if not username or not email:
+            skipped.append({'index': index, 'reason': 'Username and email are required'})
+        elif username in seen_usernames or email in seen_emails:
+            skipped.append({'index': index, 'reason': 'Duplicate username or email in request'})
+        else:
+            seen_usernames.add(username)
+            seen_emails.add(email)
+            candidates.append((index, username, email))
+    
+    # One query finds every existing user clashing with any candidate
+    taken_usernames, taken_emails = set(), set()
+    if candidates:
+        for username, email in db.session.execute(
+                select(User.username, User.email).where(or_(User.username.in_(seen_usernames),
+                                                            User.email.in_(seen_emails)))):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+    new_rows = []
+    for index, username, email in candidates:
+        if username in taken_usernames or email in taken_emails:
+            skipped.append({'index': index, 'reason': 'User with this username or email already exists'})
+        else:
+            new_rows.append({'username': username, 'email': email})
+    
+    created, events = [], []
+    if new_rows:
+        try:
+            # Multi-row INSERT ... RETURNING; rows come back in no set order
+            users = sorted(db.session.scalars(insert(User).returning(User), new_rows), key=lambda user: user.id)
+            events = sorted(db.session.scalars(insert(UserEvent).returning(UserEvent), [
+                {'event_type': 'user_created', 'user_id': user.id, 'username': user.username, 'email': user.email}
+                for user in users]), key=lambda event: event.id)
+            # Serialize before commit expires the rows
+            created = [user.to_dict() for user in users]
+            events = [event.to_dict() for event in events]
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request created one of these users after the check
+            db.session.rollback()
+            return jsonify({'error': 'A user with one of these usernames or emails was created concurrently; retry the import'}), 409
+    for start in range(0, len(events), EVENT_PUSH_BATCH):
+        publisher.publish(events[start:start + EVENT_PUSH_BATCH])
+    
+    skipped.sort(key=lambda entry: entry['index'])
+    return jsonify({'created': created, 'skipped': skipped}), 201
+
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
     """Update a user."""
@@ -105,7 +283,10 @@ def update_user(user_id):
             return jsonify({'error': 'Email already taken'}), 409
         user.email = data['email']
     
+    event = record_event('user_updated', user) if db.session.is_modified(user) else None
     db.session.commit()
+    if event is not None:
+        publisher.publish(event.to_dict())
     
     return jsonify({
         'id': user.id,
@@ -118,14 +299,17 @@ def update_user(user_id):
 def delete_user(user_id):
     """Delete a user."""
     user = User.query.get_or_404(user_id)
+    event = record_event('user_deleted', user)
     db.session.delete(user)
     db.session.commit()
+    publisher.publish(event.to_dict())
     return jsonify({'message': 'User deleted successfully'}), 200
 
 @app.route('/api/users/by-username/<username>', methods=['GET'])
 def get_user_by_username(username):
-    """Get a user by username."""
-    user = User.query.filter_by(username=username).first()
+    """Get a user by username, ignoring case (an exact-case match wins)."""
+    user = (User.query.filter(func.lower(User.username) == func.lower(username))
+            .order_by((User.username == username).desc()).first())
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
@@ -138,8 +322,9 @@ def get_user_by_username(username):
 
 @app.route('/api/users/by-email/<email>', methods=['GET'])
 def get_user_by_email(email):
-    """Get a user by email."""
-    user = User.query.filter_by(email=email).first()
+    """Get a user by email, ignoring case (an exact-case match wins)."""
+    user = (User.query.filter(func.lower(User.email) == func.lower(email))
+            .order_by((User.email == email).desc()).first())
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
@@ -156,9 +341,10 @@ def validate_users():
     data = request.json
     user_ids = data.get('user_ids', [])
     
-    users = User.query.filter(User.id.in_(user_ids)).all()
-    found_ids = [user.id for user in users]
-    missing_ids = [uid for uid in user_ids if uid not in found_ids]
+    requested = set(user_ids)
+    found = set(db.session.scalars(select(User.id).where(User.id.in_(requested))))
+    found_ids = sorted(found)
+    missing_ids = [uid for uid in user_ids if uid not in found]
     
     return jsonify({
         'valid': len(missing_ids) == 0,
@@ -166,6 +352,13 @@ def validate_users():
         'missing_ids': missing_ids
     }), 200
 
+def shutdown_app():
+    """Release pooled database connections before the process exits."""
+    with app.app_context():
+        db.engine.dispose()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5002)
+    with app.app_context():
+        db.create_all()
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5002)
 
@@ -0,0 +1,520 @@
+"""
+Result cache shared by a service's worker processes, with single-flight fills.
+
+The monolith, the task service and the user service keep an identical copy of
+this module. CACHE_URL picks the backend:
+
+    memory://                 LRU dict in each process (the default)
+    mmap:///tmp/app.cache     fixed-size slots in a memory-mapped file shared by
+                              every worker on the host (mmap:// alone uses a
+                              file per service in the temp directory; add
+                              ?slots=256&slot_size=1048576 to size it)
+    redis://host:6379/0       any server speaking the Redis protocol, shared by
+                              every host; spoken directly over a socket
+    none://                   caching off
+
+Values are stored as JSON, so callers cache dicts and lists rather than ORM
+objects, and every reader gets its own copy.
+
+get_or_set(key, compute) is single-flight: on a miss one caller claims the key
+with an atomic add() of a lock entry and computes the value, while other
+threads and workers asking for the same key poll for the result instead of all
+running the same expensive query at once. A caller that has waited
+CACHE_LOCK_TIMEOUT seconds computes the value itself.
+
+Invalidation is by generation rather than by deleting keys: key(...,
+depends_on=names) embeds a token per name, invalidate(name) replaces it, and
+entries filled under the old token are never read again and expire within
+CACHE_TTL seconds. The TTL also bounds how long a write made outside the app
+(a script, another host without the cache) can go unnoticed.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+# How often a caller waiting on another's fill checks for the value
+POLL_INTERVAL = 0.01
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':')).encode()
+
+class Cache:
+    """Common interface. Backends store bytes under string keys and implement
+    _get, _set, _add (set only if absent, atomically), _delete and clear."""
+    
+    def __init__(self, prefix='', ttl=30, lock_timeout=10):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+    
+    def get(self, key, default=None):
+        data = self._get(self.prefix + key)
+        return default if data is None else json.loads(data)
+    
+    def set(self, key, value, ttl=None):
+        """Store value for ttl seconds (the cache's default when None, forever when 0)."""
+        self._set(self.prefix + key, _encode(value), self.ttl if ttl is None else ttl)
+    
+    def add(self, key, value, ttl=None):
+        """Set key only if it is absent; returns whether it was set."""
+        return self._add(self.prefix + key, _encode(value), self.ttl if ttl is None else ttl)
+    
+    def delete(self, key):
+        self._delete(self.prefix + key)
+    
+    def generation(self, name):
+        """Current token for name; a new one if it was never set or was evicted."""
+        token = self.get(f'gen:{name}')
+        if token is None:
+            self.add(f'gen:{name}', uuid.uuid4().hex[:12], ttl=0)
+            token = self.get(f'gen:{name}', '')
+        return token
+    
+    def invalidate(self, *names):
+        """Make every key that depends on any of names unreachable."""
+        for name in names:
+            self.set(f'gen:{name}', uuid.uuid4().hex[:12], ttl=0)
+    
+    def key(self, *parts, depends_on=()):
+        """Key from parts plus the current generation of each name it depends on."""
+        return ':'.join([str(part) for part in parts] + [self.generation(name) for name in depends_on])
+    
+    def get_or_set(self, key, compute, ttl=None):
+        """Cached value of key, calling compute() to fill it on a miss. Only one
+        caller per key computes at a time; the others wait for its result."""
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        lock = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        claimed = self.add(lock, 1, ttl=self.lock_timeout)
+        while not claimed and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+            claimed = self.add(lock, 1, ttl=self.lock_timeout)
+        try:
+            if claimed:
+                # The previous holder may have filled it between our miss and the claim
+                value = self.get(key, MISSING)
+            if value is MISSING:
+                value = compute()
+                self.set(key, value, ttl)
+        finally:
+            if claimed:
+                self.delete(lock)
+        return value
+    
+    async def get_or_set_async(self, key, compute, ttl=None):
+        """get_or_set for async views: compute is a coroutine function, and
+        waiting for another caller's fill does not block the event loop."""
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        lock = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        claimed = self.add(lock, 1, ttl=self.lock_timeout)
+        while not claimed and time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+            claimed = self.add(lock, 1, ttl=self.lock_timeout)
+        try:
+            if claimed:
+                # The previous holder may have filled it between our miss and the claim
+                value = self.get(key, MISSING)
+            if value is MISSING:
+                value = await compute()
+                self.set(key, value, ttl)
+        finally:
+            if claimed:
+                self.delete(lock)
+        return value
+    
+    def _get(self, key):
+        raise NotImplementedError
+    
+    def _set(self, key, data, ttl):
+        raise NotImplementedError
+    
+    def _add(self, key, data, ttl):
+        raise NotImplementedError
+    
+    def _delete(self, key):
+        raise NotImplementedError
+    
+    def clear(self):
+        raise NotImplementedError
+
+class NullCache(Cache):
+    """Caches nothing; get_or_set always computes."""
+    
+    def _get(self, key):
+        return None
+    
+    def _set(self, key, data, ttl):
+        pass
+    
+    def _add(self, key, data, ttl):
+        return True
+    
+    def _delete(self, key):
+        pass
+    
+    def clear(self):
+        pass
+
+class LocalCache(Cache):
+    """Least-recently-used entries in this process's memory."""
+    
+    def __init__(self, max_entries=1024, **options):
+        super().__init__(**options)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (data, expiry or None)
+        self._lock = threading.Lock()
+    
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._entries[key]
+            return None
+        return entry
+    
+    def _get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def _store(self, key, data, ttl):
+        self._entries[key] = (data, time.monotonic() + ttl if ttl else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _set(self, key, data, ttl):
+        with self._lock:
+            self._store(key, data, ttl)
+    
+    def _add(self, key, data, ttl):
+        with self._lock:
+            if self._live(key, time.monotonic()) is not None:
+                return False
+            self._store(key, data, ttl)
+            return True
+    
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SharedMemoryCache(Cache):
+    """Entries in a memory-mapped file that every worker on the host maps.
+
+    The file is `slots` fixed-size slots. A key hashes to a slot and may live
+    in any of the PROBE slots from there; when all are taken the one closest to
+    expiry is replaced. Each slot holds its key, so hash collisions are never
+    confused. Values over COMPRESS_OVER bytes are stored zlib-compressed
+    (a task list shrinks about tenfold) and ones that still do not fit a slot
+    are not cached. An flock on the file
+    orders access between processes and a thread lock within one (flock is
+    shared by the threads of a process); each process maps the file itself,
+    so a forked worker does not share its parent's lock.
+    """
+    # key hash (0 = empty), expiry (0 = never), key length, value length, compressed
+    HEADER = struct.Struct('<QdHI?')
+    PROBE = 8
+    COMPRESS_OVER = 16384
+    
+    def __init__(self, path, slots=256, slot_size=1 << 20, **options):
+        super().__init__(**options)
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._file = None
+        self._map = None
+        self._warned = False
+    
+    def _mapped(self):
+        if self._pid != os.getpid():
+            self._file = open(self.path, 'a+b')
+            size = self.slots * self.slot_size
+            if os.fstat(self._file.fileno()).st_size != size:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+                try:
+                    self._file.truncate(size)
+                finally:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._file.fileno(), size)
+            self._pid = os.getpid()
+        return self._map
+    
+    def _locked(self, operation, exclusive, *args):
+        with self._lock:
+            memory = self._mapped()
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                return operation(memory, *args)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') or 1
+    
+    def _candidates(self, key_hash):
+        first = key_hash % self.slots
+        return [(first + i) % self.slots * self.slot_size for i in range(min(self.PROBE, self.slots))]
+    
+    def _find(self, memory, key, now):
+        """(offset of key's live slot or None, offset to write key to)."""
+        key_hash = self._hash(key)
+        target, target_expiry = None, None
+        for offset in self._candidates(key_hash):
+            slot_hash, expiry, key_length, _, _ = self.HEADER.unpack_from(memory, offset)
+            start = offset + self.HEADER.size
+            if slot_hash == key_hash and memory[start:start + key_length] == key:
+                if not expiry or expiry > now:
+                    return offset, offset
+                return None, offset
+            if not slot_hash or (expiry and expiry <= now):
+                expiry = -1
+            elif not expiry:
+                expiry = float('inf')
+            if target is None or expiry < target_expiry:
+                target, target_expiry = offset, expiry
+        return None, target
+    
+    def _read(self, memory, key):
+        offset, _ = self._find(memory, key, time.time())
+        if offset is None:
+            return None
+        _, _, key_length, value_length, compressed = self.HEADER.unpack_from(memory, offset)
+        start = offset + self.HEADER.size + key_length
+        data = memory[start:start + value_length]
+        return zlib.decompress(data) if compressed else data
+    
+    def _write(self, memory, key, data, ttl, only_if_absent=False):
+        live, offset = self._find(memory, key, time.time())
+        if live is not None and only_if_absent:
+            return False
+        compressed = len(data) > self.COMPRESS_OVER
+        if compressed:
+            data = zlib.compress(data, 1)
+        if self.HEADER.size + len(key) + len(data) > self.slot_size:
+            if live is not None:
+                self.HEADER.pack_into(memory, live, 0, 0, 0, 0, False)
+            if not self._warned:
+                self._warned = True
+                logger.warning('Not caching %s: %d bytes do not fit a %d-byte slot', key.decode(), len(data), self.slot_size)
+            return False
+        self.HEADER.pack_into(memory, offset, self._hash(key), time.time() + ttl if ttl else 0,
+                              len(key), len(data), compressed)
+        start = offset + self.HEADER.size
+        memory[start:start + len(key) + len(data)] = key + data
+        return True
+    
+    def _remove(self, memory, key):
+        offset, _ = self._find(memory, key, time.time())
+        if offset is not None:
+            self.HEADER.pack_into(memory, offset, 0, 0, 0, 0, False)
+    
+    def _get(self, key):
+        return self._locked(self._read, False, key.encode())
+    
+    def _set(self, key, data, ttl):
+        self._locked(self._write, True, key.encode(), data, ttl)
+    
+    def _add(self, key, data, ttl):
+        return self._locked(self._write, True, key.encode(), data, ttl, True)
+    
+    def _delete(self, key):
+        self._locked(self._remove, True, key.encode())
+    
+    def clear(self):
+        def wipe(memory):
+            for slot in range(self.slots):
+                self.HEADER.pack_into(memory, slot * self.slot_size, 0, 0, 0, 0, False)
+        self._locked(wipe, True)
+
+class RedisError(Exception):
+    """Error reply from the server."""
+
+class RedisCache(Cache):
+    """Entries on a server speaking the Redis protocol (RESP), one connection
+    per thread. When the server is unreachable the cache misses and fills
+    proceed uncached rather than failing the request."""
+    
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=1.0, **options):
+        super().__init__(**options)
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+        self._failing = False
+        self._retry_at = 0
+    
+    def _connect(self):
+        connection = socket.create_connection(self.address, timeout=self.timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.socket = connection
+        self._local.reader = connection.makefile('rb')
+        self._local.pid = os.getpid()
+        try:
+            if self.password:
+                self._send('AUTH', self.password)
+            if self.db:
+                self._send('SELECT', self.db)
+        except RedisError as e:
+            # A refused login or database is as unusable as a refused connection
+            raise ConnectionError(f'{self.address[0]}:{self.address[1]} rejected the connection: {e}') from e
+    
+    def _reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('connection closed by server')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            return None if length < 0 else self._local.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self._reply() for _ in range(length)]
+        raise ConnectionError(f'unexpected reply {line!r}')
+    
+    def _send(self, *args):
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        self._local.socket.sendall(b''.join(
+            [b'*%d\r\n' % len(parts)] + [b'$%d\r\n%s\r\n' % (len(part), part) for part in parts]))
+        return self._reply()
+    
+    def command(self, *args, fallback=None):
+        """Run one command, reconnecting once if the connection went stale.
+        Returns fallback if the server cannot be reached."""
+        if self._failing and time.monotonic() < self._retry_at:
+            return fallback
+        for attempt in range(2):
+            try:
+                if getattr(self._local, 'pid', None) != os.getpid():
+                    self._connect()
+                result = self._send(*args)
+                if self._failing:
+                    self._failing = False
+                    logger.warning('Cache server %s:%s is reachable again', *self.address)
+                return result
+            except OSError as e:
+                if getattr(self._local, 'pid', None) is not None:
+                    self._local.socket.close()
+                self._local.pid = None
+                if attempt:
+                    self._retry_at = time.monotonic() + 1
+                if attempt and not self._failing:
+                    self._failing = True
+                    logger.warning('Cache server %s:%s unavailable, not caching: %s', *self.address, e)
+        return fallback
+    
+    def _expiry(self, ttl):
+        return ('PX', int(ttl * 1000)) if ttl else ()
+    
+    def _get(self, key):
+        return self.command('GET', key)
+    
+    def _set(self, key, data, ttl):
+        self.command('SET', key, data, *self._expiry(ttl))
+    
+    def _add(self, key, data, ttl):
+        return self.command('SET', key, data, 'NX', *self._expiry(ttl), fallback='OK') == 'OK'
+    
+    def _delete(self, key):
+        self.command('DEL', key)
+    
+    def clear(self):
+        """Delete this cache's keys (those under its prefix)."""
+        cursor = b'0'
+        while True:
+            reply = self.command('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 1000)
+            if reply is None:
+                return
+            cursor, keys = reply
+            if keys:
+                self.command('DEL', *keys)
+            if cursor == b'0':
+                return
+
+def create_cache(url, namespace, ttl=30, lock_timeout=10):
+    """Cache for a CACHE_URL; keys are prefixed with namespace."""
+    parts = urlsplit(url)
+    options = {'prefix': f'{namespace}:', 'ttl': ttl, 'lock_timeout': lock_timeout}
+    if parts.scheme == 'memory':
+        return LocalCache(**options)
+    if parts.scheme == 'mmap':
+        path = unquote(parts.path) or os.path.join(tempfile.gettempdir(), f'{namespace}.cache')
+        sizes = {name: int(values[-1]) for name, values in parse_qs(parts.query).items()
+                 if name in ('slots', 'slot_size')}
+        return SharedMemoryCache(path, **sizes, **options)
+    if parts.scheme == 'redis':
+        db = int(parts.path.strip('/') or 0)
+        return RedisCache(parts.hostname or 'localhost', parts.port or 6379, db,
+                          unquote(parts.password) if parts.password else None, **options)
+    if parts.scheme == 'none':
+        return NullCache(**options)
+    raise ValueError(f'Unsupported CACHE_URL {url!r}: use memory://, mmap://, redis:// or none://')
+
+def _setting(app, name, default):
+    return app.config.get(name, os.environ.get(name, default))
+
+def init_cache(app, namespace):
+    """Create app's cache from CACHE_URL, CACHE_TTL and CACHE_LOCK_TIMEOUT.
+    A shared memory file starts empty, since the database may have changed
+    while no worker was running; Redis entries rely on their TTL instead."""
+    cache = create_cache(_setting(app, 'CACHE_URL', 'memory://'), namespace,
+                         ttl=float(_setting(app, 'CACHE_TTL', 30)),
+                         lock_timeout=float(_setting(app, 'CACHE_LOCK_TIMEOUT', 10)))
+    if isinstance(cache, SharedMemoryCache):
+        cache.clear()
+    app.extensions['cache'] = cache
+    return cache
+
+def get_cache():
+    """The current app's cache; a NullCache outside an app or before init_cache."""
+    if has_app_context():
+        cache = current_app.extensions.get('cache')
+        if cache is not None:
+            return cache
+    return _null_cache
+
+_null_cache = NullCache()
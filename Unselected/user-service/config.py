@@ -2,10 +2,21 @@
 Configuration for User Service.
 """
 import os
+from engine import engine_options, normalize_database_uri
 
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'user-service-secret-key'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///user_service.db'
+    SQLALCHEMY_DATABASE_URI = normalize_database_uri(os.environ.get('DATABASE_URL') or 'sqlite:///user_service.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DEBUG = os.environ.get('FLASK_DEBUG', 'true').lower() in ('1', 'true')
+    # Database performance profile: 'dev' or 'throughput' (see engine.py)
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'dev')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    # Cache for the user list: memory://, mmap:// (shared by the workers on a
+    # host), redis://host:6379/0 or none:// (see cache.py)
+    CACHE_URL = os.environ.get('CACHE_URL', 'memory://')
+    CACHE_TTL = float(os.environ.get('CACHE_TTL', '30'))
+    # Comma-separated URLs that receive user change events
+    USER_EVENT_SUBSCRIBERS = os.environ.get('USER_EVENT_SUBSCRIBERS', 'http://task-service:5000/api/user-events')
 
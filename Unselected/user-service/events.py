@@ -0,0 +1,43 @@
+"""
+User change events for other services.
+Every create, update and delete is stored as a UserEvent in the same
+transaction as the change, so events have a gap-free sequence (their id) and
+can be re-read from GET /api/users/events. After commit the event is also
+pushed to each subscriber URL by a background thread, in order.
+"""
+import queue
+import threading
+import requests
+
+class EventPublisher:
+    """POSTs events to subscriber URLs from a background thread."""
+    
+    def __init__(self, subscribers, timeout=2):
+        self.subscribers = [url for url in subscribers if url]
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=10000)
+        self.thread = None
+        self.lock = threading.Lock()
+    
+    def publish(self, event):
+        """Queue an event, or a list of consecutive events sent in one POST."""
+        if not self.subscribers:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='user-events', daemon=True)
+                self.thread.start()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            pass  # Subscribers catch up from GET /api/users/events
+    
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            for url in self.subscribers:
+                try:
+                    requests.post(url, json=event, timeout=self.timeout)
+                except Exception as e:
+                    ids = [item['id'] for item in event] if isinstance(event, list) else [event['id']]
+                    print(f"Failed to deliver user events {ids[0]}-{ids[-1]} to {url}: {e}")
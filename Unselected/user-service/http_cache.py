@@ -0,0 +1,102 @@
+"""
+Response compression and conditional GET helpers.
+
+The monolith and every microservice keep an identical copy of this module.
+
+init_compression(app) compresses responses of at least COMPRESS_MIN_SIZE
+bytes (default 1024) with a textual content type, using brotli when the
+Brotli package is installed and the client prefers or accepts it, otherwise
+gzip, as negotiated from Accept-Encoding. Streamed and file responses and
+responses that already have a Content-Encoding are sent as they are.
+Compressed responses get Vary: Accept-Encoding, and a strong ETag becomes
+weak because the bytes differ from the identity encoding.
+GZIP_LEVEL (default 6) and BROTLI_QUALITY (default 5, about as fast as gzip -6
+with smaller output) tune the effort; COMPRESSION=false turns it off.
+
+For list endpoints, views compute a validator from the rows (e.g. row count
+and newest updated_at) and use:
+
+    if is_conditional():
+        response = not_modified(etag, last_modified)   # cheap validator query first
+        if response: return response
+    ...
+    set_validators(response, etag, last_modified)
+"""
+import gzip
+import hashlib
+import os
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset([
+    'application/json', 'application/javascript', 'image/svg+xml',
+    'text/css', 'text/csv', 'text/html', 'text/javascript', 'text/plain',
+])
+
+def choose_encoding(accept_encodings):
+    """The content coding to use for a request's Accept-Encoding, or None."""
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = max(candidates, key=lambda coding: (accept_encodings.quality(coding), coding == 'br'))
+    return best if accept_encodings.quality(best) > 0 else None
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=int(os.environ.get('BROTLI_QUALITY', 5)))
+    return gzip.compress(data, compresslevel=int(os.environ.get('GZIP_LEVEL', 6)), mtime=0)
+
+def init_compression(app):
+    """Compress large textual responses according to Accept-Encoding."""
+    if os.environ.get('COMPRESSION', 'true').lower() not in ('1', 'true'):
+        return
+    min_size = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+        coding = choose_encoding(request.accept_encodings)
+        if coding is None:
+            return response
+        response.set_data(compress(response.get_data(), coding))
+        response.headers['Content-Encoding'] = coding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+def collection_etag(*parts):
+    """ETag for a collection from its validator parts (row count, newest change,
+    ...) and the query string, which can change the representation."""
+    key = '|'.join(str(part) for part in parts) + '|' + request.query_string.decode('latin-1')
+    return hashlib.sha1(key.encode()).hexdigest()[:24]
+
+def is_conditional():
+    """Whether the client sent a validator it already has."""
+    return bool(request.if_none_match) or request.if_modified_since is not None
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the client's copy matches, else None."""
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = Response(status=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+def set_validators(response, etag, last_modified=None):
+    """Add ETag and Last-Modified to a response (Last-Modified in whole seconds)."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(microsecond=0)
+    response.vary.add('Accept-Encoding')
+    return response
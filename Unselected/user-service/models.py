@@ -15,6 +15,43 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Case-insensitive lookups and prefix search compare lower(column)
+    __table_args__ = (
+        db.Index('ix_users_username_lower', db.func.lower(username)),
+        db.Index('ix_users_email_lower', db.func.lower(email)),
+    )
+    
+    # Keys of to_dict(); API clients may ask for a subset with ?fields=
+    FIELDS = ('id', 'username', 'email', 'created_at')
+    
     def __repr__(self):
         return f'<User {self.username}>'
+    
+    def to_dict(self, fields=None):
+        """Convert user to dictionary, limited to fields if given."""
+        result = {}
+        for field in fields or User.FIELDS:
+            value = getattr(self, field)
+            result[field] = value.isoformat() if isinstance(value, datetime) else value
+        return result
+
+class UserEvent(db.Model):
+    """A user change, kept so other services can replicate the user directory.
+    The id is the event's position in the stream."""
+    __tablename__ = 'user_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(20), nullable=False)  # user_created, user_updated, user_deleted
+    user_id = db.Column(db.Integer, nullable=False)
+    username = db.Column(db.String(80), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'user': {'id': self.user_id, 'username': self.username, 'email': self.email},
+            'timestamp': self.created_at.isoformat()
+        }
 
@@ -1,9 +1,11 @@
 """
 Tests for User Service.
 """
+import multiprocessing
 import pytest
 from app import app
 from models import db, User
+from cache import get_cache
 
 @pytest.fixture
 def client():
@@ -13,6 +15,8 @@ def client():
     
     with app.app_context():
         db.create_all()
+        # The app outlives each test's database, and event ids restart with it
+        get_cache().clear()
         yield app.test_client()
         db.drop_all()
 
@@ -49,3 +53,170 @@ def test_get_user(client):
     data = response.get_json()
     assert data['username'] == 'testuser'
 
+
+def test_trace_context_propagation(client):
+    """Test that incoming traceparent is continued and SQL gets child spans."""
+    from tracing import TRACER
+    
+    class ListExporter:
+        def __init__(self):
+            self.spans = []
+        
+        def export(self, span):
+            self.spans.append(span)
+    
+    exporter = ListExporter()
+    previous, TRACER.exporter = TRACER.exporter, exporter
+    try:
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        response = client.get('/api/users', headers={
+            'traceparent': f'00-{trace_id}-00f067aa0ba902b7-01'
+        })
+    finally:
+        TRACER.exporter = previous
+    
+    assert response.status_code == 200
+    assert response.headers['traceparent'].startswith(f'00-{trace_id}-')
+    server = [span for span in exporter.spans if span.kind == 'server']
+    assert len(server) == 1
+    assert server[0].parent_id == '00f067aa0ba902b7'
+    assert server[0].attributes['http.route'] == '/api/users'
+    queries = [span for span in exporter.spans if span.attributes.get('db.statement')]
+    assert queries
+    assert all(span.trace_id == trace_id and span.parent_id == server[0].span_id for span in queries)
+
+def test_otlp_exporter_sends_from_forked_workers():
+    """Test a worker forked after the exporter was created still sends its spans."""
+    from tracing import TRACER, OTLPHttpExporter
+    context = multiprocessing.get_context('fork')
+    sent, done = context.Queue(), context.Event()
+    exporter = OTLPHttpExporter('http://localhost:4318', 'user-service', interval=0.05)
+    exporter._send = lambda batch: sent.put([span.name for span in batch])
+    
+    def worker():
+        exporter.export(TRACER.start_span('in worker'))
+        done.wait(5)
+    
+    child = context.Process(target=worker)
+    child.start()
+    try:
+        assert sent.get(timeout=5) == ['in worker']
+    finally:
+        done.set()
+        child.join()
+    exporter.export(TRACER.start_span('in master'))
+    assert sent.get(timeout=5) == ['in master']
+
+def test_user_changes_recorded_as_events(client, monkeypatch):
+    """Test changes are numbered events, readable after an id and pushed in order."""
+    import app as user_app
+    published = []
+    monkeypatch.setattr(user_app.publisher, 'publish', published.append)
+    
+    user_id = client.post('/api/users', json={'username': 'a', 'email': 'a@example.com'}).get_json()['id']
+    client.put(f'/api/users/{user_id}', json={'username': 'a'})  # no change, no event
+    client.put(f'/api/users/{user_id}', json={'username': 'b'})
+    response = client.get('/api/users')
+    assert response.headers['X-Last-Event-Id'] == '2'
+    client.delete(f'/api/users/{user_id}')
+    
+    events = client.get('/api/users/events?after=1').get_json()
+    assert [(e['id'], e['event_type'], e['user']['username']) for e in events] == [
+        (2, 'user_updated', 'b'), (3, 'user_deleted', 'b')]
+    assert [e['id'] for e in published] == [1, 2, 3]
+
+def test_sparse_fieldsets(client):
+    """Test ?fields= limits the returned user keys."""
+    user_id = client.post('/api/users', json={'username': 'a', 'email': 'a@example.com'}).get_json()['id']
+    assert client.get('/api/users?fields=username').get_json() == [{'id': user_id, 'username': 'a'}]
+    assert client.get(f'/api/users/{user_id}?fields=email').get_json() == {'id': user_id, 'email': 'a@example.com'}
+    assert client.get('/api/users?fields=password').status_code == 400
+
+def test_user_list_answers_304_until_a_user_changes(client, monkeypatch):
+    """Test GET /api/users revalidates against the newest change event."""
+    import app as user_app
+    monkeypatch.setattr(user_app.publisher, 'publish', lambda event: None)
+    user_id = client.post('/api/users', json={'username': 'a', 'email': 'a@example.com'}).get_json()['id']
+    etag = client.get('/api/users').headers['ETag']
+    
+    response = client.get('/api/users', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['X-Last-Event-Id'] == '1'
+    
+    client.put(f'/api/users/{user_id}', json={'username': 'b'})
+    assert client.get('/api/users', headers={'If-None-Match': etag}).status_code == 200
+
+def test_user_list_is_cached_per_event_id(client, monkeypatch):
+    """Test repeat list reads reuse the cached users until a change event is added."""
+    import app as user_app
+    monkeypatch.setattr(user_app.publisher, 'publish', lambda event: None)
+    user_id = client.post('/api/users', json={'username': 'a', 'email': 'a@example.com'}).get_json()['id']
+    queries = []
+    user_query = user_app.user_query
+    monkeypatch.setattr(user_app, 'user_query', lambda fields: queries.append(fields) or user_query(fields))
+    
+    assert client.get('/api/users?fields=username').get_json() == [{'id': user_id, 'username': 'a'}]
+    assert client.get('/api/users?fields=username').get_json() == [{'id': user_id, 'username': 'a'}]
+    assert len(queries) == 1
+    
+    client.put(f'/api/users/{user_id}', json={'username': 'b'})
+    assert client.get('/api/users?fields=username').get_json() == [{'id': user_id, 'username': 'b'}]
+    assert len(queries) == 2
+
+def test_bulk_import_skips_duplicates_in_one_transaction(client, monkeypatch):
+    """Test bulk import checks all rows with one lookup and creates the rest with events."""
+    from sqlalchemy import event
+    import app as user_app
+    published = []
+    monkeypatch.setattr(user_app.publisher, 'publish', published.append)
+    client.post('/api/users', json={'username': 'taken', 'email': 'taken@example.com'})
+    
+    rows = [{'username': f'user{i}', 'email': f'user{i}@example.com'} for i in range(50)]
+    rows[10] = {'username': 'taken', 'email': 'new@example.com'}
+    rows[20] = {'username': 'other', 'email': 'taken@example.com'}
+    rows[30] = {'username': 'user0', 'email': 'again@example.com'}
+    rows[40] = {'username': 'nomail'}
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.post('/api/users/bulk', json={'users': rows})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    
+    assert response.status_code == 201
+    data = response.get_json()
+    assert len(data['created']) == 46
+    assert [entry['index'] for entry in data['skipped']] == [10, 20, 30, 40]
+    assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 1
+    assert [e['user']['username'] for e in published[-1]] == [user['username'] for user in data['created']]
+    assert [e['id'] for e in client.get('/api/users/events?after=1').get_json()] == list(range(2, 48))
+    assert client.post('/api/users/bulk', json={'users': 'nope'}).status_code == 400
+
+def test_validate_reports_missing_ids_in_request_order(client):
+    """Test validate finds ids with one query and lists missing ones as sent."""
+    ids = [client.post('/api/users', json={'username': f'u{i}', 'email': f'u{i}@example.com'}).get_json()['id']
+           for i in range(3)]
+    data = client.post('/api/users/validate', json={'user_ids': [99, ids[2], 98, ids[0], ids[2]]}).get_json()
+    assert data == {'valid': False, 'found_ids': [ids[0], ids[2]], 'missing_ids': [99, 98]}
+    assert client.post('/api/users/validate', json={'user_ids': ids}).get_json()['valid'] is True
+
+def test_search_and_lookups_ignore_case(client):
+    """Test prefix search on username or email and case-insensitive exact lookups."""
+    for username, email in [('Alice', 'alice@example.com'), ('alfred', 'fred@corp.example'),
+                            ('bob', 'Al.bob@example.com'), ('carol', 'carol@example.com')]:
+        client.post('/api/users', json={'username': username, 'email': email})
+    
+    assert [u['username'] for u in client.get('/api/users/search?q=aL').get_json()] == ['Alice', 'alfred', 'bob']
+    assert client.get('/api/users/search?q=al&limit=1&fields=username').get_json() == [{'id': 1, 'username': 'Alice'}]
+    assert client.get('/api/users/search?q=al%25').get_json() == []
+    assert client.get('/api/users/by-username/ALICE').get_json()['id'] == 1
+    assert client.get('/api/users/by-email/Carol@Example.com').get_json()['username'] == 'carol'
+
+def test_lookups_find_non_ascii_names(client):
+    """Test names SQLite's ASCII-only lower() leaves alone are still found."""
+    client.post('/api/users', json={'username': 'Éric', 'email': 'Éric@example.com'})
+    assert client.get('/api/users/by-username/Éric').get_json()['username'] == 'Éric'
+    assert client.get('/api/users/by-email/Éric@EXAMPLE.com').get_json()['username'] == 'Éric'
+    assert [u['username'] for u in client.get('/api/users/search?q=É').get_json()] == ['Éric']
+    assert [u['username'] for u in client.get('/api/users/search?q=Ér').get_json()] == ['Éric']
@@ -0,0 +1,287 @@
+"""
+Distributed tracing with W3C trace-context propagation.
+
+Every service keeps an identical copy of this module. init_tracing() opens a
+server span per request (continuing the caller's trace from the `traceparent`
+header), SQLAlchemy events add a span per SQL statement, and trace_outbound()
+wraps calls to other services and supplies the `traceparent` header to send.
+
+Finished spans go to the exporter picked by TRACE_EXPORTER:
+- none (default): spans are dropped, context is still propagated
+- file: JSON lines appended to TRACE_FILE (default traces.jsonl)
+- otlp: OTLP/HTTP JSON batches posted to OTEL_EXPORTER_OTLP_ENDPOINT
+  (default http://localhost:4318), e.g. a local collector or Jaeger
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# OTLP span kinds and status codes
+SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    """A timed operation within a trace."""
+    
+    def __init__(self, name, kind, trace_id, parent_id=None, sampled=True, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+    
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+    
+    def set_error(self, message):
+        self.status = STATUS_ERROR
+        self.attributes['error.message'] = message
+    
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-{"01" if self.sampled else "00"}'
+    
+    def headers(self):
+        """Headers that continue this trace in the called service."""
+        return {'traceparent': self.traceparent()}
+    
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KINDS[self.kind],
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': self.status},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+def parse_traceparent(value):
+    """Return (trace_id, parent_span_id, sampled) from a traceparent header, or None."""
+    match = TRACEPARENT_RE.match((value or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+class NoopExporter:
+    """Drops spans; used when tracing export is off."""
+    
+    def export(self, span):
+        pass
+
+class FileExporter:
+    """Appends each span as one OTLP-shaped JSON line."""
+    
+    def __init__(self, path, service):
+        self.path = path
+        self.service = service
+        self.lock = threading.Lock()
+    
+    def export(self, span):
+        line = json.dumps({'service': self.service, **span.to_otlp()})
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+class OTLPHttpExporter:
+    """Batches spans and posts them to an OTLP/HTTP collector from a background
+    thread, started on the first export in each process: threads do not survive
+    fork, so a gunicorn worker forked from a preloaded app needs its own."""
+    
+    def __init__(self, endpoint, service, batch_size=256, interval=2.0):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.service = service
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = None
+        self.pid = None
+        self.lock = threading.Lock()
+    
+    def export(self, span):
+        if self.pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            pass  # Drop spans rather than slow down requests
+    
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            # Spans queued before a fork stay with the parent's thread
+            self.queue = queue.Queue(maxsize=10000)
+            threading.Thread(target=self._run, args=(self.queue,), name='otlp-exporter', daemon=True).start()
+            self.pid = os.getpid()
+    
+    def _run(self, spans):
+        while True:
+            batch = [spans.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(spans.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._send(batch)
+    
+    def _send(self, batch):
+        import requests
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', self.service)]},
+            'scopeSpans': [{'scope': {'name': 'task-manager'}, 'spans': [span.to_otlp() for span in batch]}],
+        }]}
+        try:
+            requests.post(self.url, json=payload, timeout=5)
+        except Exception as e:
+            logger.warning('Failed to export spans to %s: %s', self.url, e)
+
+class Tracer:
+    """Creates spans for this process and hands finished ones to the exporter."""
+    
+    def __init__(self):
+        self.service = 'app'
+        self.exporter = NoopExporter()
+    
+    def start_span(self, name, kind='internal', attributes=None, parent=None):
+        """Start a span under parent (trace_id, span_id, sampled) or the current span."""
+        if parent is None:
+            current = _current_span.get()
+            if current is not None:
+                parent = (current.trace_id, current.span_id, current.sampled)
+        if parent is None:
+            return Span(name, kind, secrets.token_hex(16), attributes=attributes)
+        trace_id, parent_id, sampled = parent
+        return Span(name, kind, trace_id, parent_id, sampled, attributes)
+    
+    def end_span(self, span):
+        span.end_ns = time.time_ns()
+        if span.sampled:
+            self.exporter.export(span)
+    
+    @contextmanager
+    def span(self, name, kind='internal', attributes=None):
+        """Run a block inside a new child span of the current one."""
+        span = self.start_span(name, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+TRACER = Tracer()
+
+def current_span():
+    return _current_span.get()
+
+@contextmanager
+def trace_outbound(method, url):
+    """Client span for a call to another service. Send span.headers() with it.
+
+        with trace_outbound('GET', url) as span:
+            response = requests.get(url, headers=span.headers())
+            span.set_attribute('http.status_code', response.status_code)
+    """
+    with TRACER.span(f'{method} {url.split("?")[0]}', 'client',
+                     {'http.method': method, 'http.url': url}) as span:
+        yield span
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_db_span(conn, cursor, statement, parameters, context, executemany):
+    if _current_span.get() is None or context is None:
+        return
+    context.trace_span = TRACER.start_span(
+        statement.split(None, 1)[0].upper() if statement else 'SQL', 'client',
+        {'db.system': conn.engine.dialect.name, 'db.statement': statement[:1000]})
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_db_span(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, 'trace_span', None)
+    if span is not None:
+        TRACER.end_span(span)
+        context.trace_span = None
+
+def _make_exporter(service):
+    kind = os.environ.get('TRACE_EXPORTER', 'none').lower()
+    if kind == 'file':
+        return FileExporter(os.environ.get('TRACE_FILE', 'traces.jsonl'), service)
+    if kind == 'otlp':
+        return OTLPHttpExporter(os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318'), service)
+    return NoopExporter()
+
+def init_tracing(app, service, exporter=None):
+    """Open a server span around every request of app."""
+    TRACER.service = service
+    TRACER.exporter = exporter or _make_exporter(service)
+    
+    @app.before_request
+    def start_request_span():
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        span = TRACER.start_span(
+            f'{request.method} {rule}', 'server',
+            {'http.method': request.method, 'http.route': rule, 'http.target': request.full_path.rstrip('?')},
+            parent=parse_traceparent(request.headers.get('traceparent')))
+        g.trace_span = span
+        g.trace_token = _current_span.set(span)
+    
+    @app.after_request
+    def record_status(response):
+        span = g.get('trace_span')
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.status = STATUS_ERROR
+            response.headers['traceparent'] = span.traceparent()
+        return response
+    
+    @app.teardown_request
+    def end_request_span(exc):
+        span = g.pop('trace_span', None)
+        token = g.pop('trace_token', None)
+        if span is None:
+            return
+        if exc is not None:
+            span.set_error(str(exc))
+        if token is not None:
+            _current_span.reset(token)
+        TRACER.end_span(span)
+    
+    return TRACER
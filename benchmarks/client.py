@@ -0,0 +1,58 @@
+"""
+Minimal keep-alive HTTP client shared by the benchmark scripts.
+Uses only the standard library so it runs anywhere the apps can be reached.
+"""
+import http.client
+import json
+from urllib.parse import urlsplit
+
+class RequestFailed(Exception):
+    """Raised for connection errors and non-2xx responses."""
+
+class Client:
+    """One persistent connection to a base URL such as http://localhost:5000."""
+    
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.conn = None
+    
+    def request(self, method, path, body=None):
+        """Send a request and return the response body; raise RequestFailed on error."""
+        headers = {}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.conn.request(method, self.prefix + path, body=data, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise RequestFailed(f'{method} {path}: {e}') from e
+        if not 200 <= response.status < 300:
+            raise RequestFailed(f'{method} {path}: HTTP {response.status}')
+        return payload
+    
+    def get(self, path):
+        return self.request('GET', path)
+    
+    def get_json(self, path):
+        return json.loads(self.request('GET', path))
+    
+    def post_json(self, path, body):
+        return json.loads(self.request('POST', path, body))
+    
+    def put_json(self, path, body):
+        return json.loads(self.request('PUT', path, body))
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
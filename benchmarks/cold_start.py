@@ -0,0 +1,97 @@
+"""
+Cold-start time of the monolith and each microservice.
+
+Starts a fresh interpreter per run (as a new gunicorn worker without preload,
+a CLI command or a test session would) and times importing the app module and,
+for the monolith, create_app(), then serving the first page. Reports the median
+of several runs in milliseconds, plus the slowest imports from -X importtime.
+Tables are created beforehand with each app's init-db command, so schema
+creation is not part of the start-up being measured.
+
+Usage (from the repository root):
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 20 --apps monolith,task-service --imports 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from worker_scaling import SELECTED_DIR
+
+UNSELECTED_DIR = os.path.join(os.path.dirname(SELECTED_DIR), 'Unselected')
+
+# (directory, code that leaves the WSGI app in `app`, path of the first request)
+APPS = {
+    'monolith': (SELECTED_DIR, 'from app import create_app\napp = create_app()', '/'),
+    'task-service': (os.path.join(UNSELECTED_DIR, 'task-service'), 'from app import app', '/api/tasks'),
+    'user-service': (os.path.join(UNSELECTED_DIR, 'user-service'), 'from app import app', '/api/users'),
+    'notification-service': (os.path.join(UNSELECTED_DIR, 'notification-service'), 'from app import app', '/health'),
+    'frontend-service': (os.path.join(UNSELECTED_DIR, 'frontend-service'), 'from app import app', '/health'),
+}
+
+PROBE = '''
+import json, time
+start = time.perf_counter()
+{load}
+loaded = time.perf_counter()
+app.test_client().get({path!r})
+served = time.perf_counter()
+print(json.dumps({{'load_ms': (loaded - start) * 1000, 'first_request_ms': (served - loaded) * 1000}}))
+'''
+
+def run_once(directory, load, path, env):
+    """Milliseconds to load the app and to serve its first request, plus the
+    whole interpreter's wall time, in a fresh process."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', PROBE.format(load=load, path=path)],
+                            cwd=directory, env=env, check=True, capture_output=True, text=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - start) * 1000
+    return timings
+
+def slowest_imports(directory, load, env, count):
+    """The count slowest imports made by the app module itself, as
+    (cumulative ms, module)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', load],
+                            cwd=directory, env=env, check=True, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # -X importtime indents by two spaces per level; app is at one
+        if len(name) - len(name.lstrip()) == 3:
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--apps', default=','.join(APPS), help=f'comma-separated subset of {", ".join(APPS)}')
+    parser.add_argument('--imports', type=int, default=8, help='slowest imports to list per app (0 for none)')
+    args = parser.parse_args()
+    
+    db_dir = tempfile.mkdtemp(prefix='cold_start_')
+    print(f'{"app":<22} {"load ms":>8} {"1st req ms":>11} {"process ms":>11}')
+    for name in args.apps.split(','):
+        directory, load, path = APPS[name]
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.join(db_dir, name + ".db")}',
+                   FLASK_DEBUG='false')
+        if name in ('monolith', 'task-service', 'user-service'):
+            subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+                           cwd=directory, env=env, check=True, stdout=subprocess.DEVNULL)
+        # The first run compiles bytecode; it is not counted
+        run_once(directory, load, path, env)
+        runs = [run_once(directory, load, path, env) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f'{name:<22} {medians["load_ms"]:>8.0f} {medians["first_request_ms"]:>11.0f} '
+              f'{medians["process_ms"]:>11.0f}')
+        for milliseconds, module in slowest_imports(directory, load, env, args.imports) if args.imports else ():
+            print(f'    {milliseconds:>7.1f} ms  import {module}')
+
+if __name__ == '__main__':
+    main()
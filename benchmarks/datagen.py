@@ -0,0 +1,205 @@
+"""
+Deterministic data generator for the benchmarks.
+
+Seeds N users, M tasks and K activity log entries, either straight into the
+database tables (fast, needs a database URL this machine can reach) or through
+the public HTTP API (works against any running deployment, but slower). The
+same --seed always produces the same rows.
+
+The monolith keeps all three tables in one database; the microservices keep
+users in the User Service database and tasks/activity in the Task Service
+database. The apps create the tables on startup, so start them once first.
+
+Usage (from the repository root):
+    # monolith database
+    python benchmarks/datagen.py --users 200 --tasks 50000 --activity 200000 \\
+        --database-url sqlite:///Selected/instance/task_manager.db
+
+    # microservice databases
+    python benchmarks/datagen.py --users 200 --tasks 50000 --activity 200000 \\
+        --user-database-url sqlite:///path/to/user_service.db \\
+        --task-database-url sqlite:///path/to/task_service.db
+
+    # any running deployment, through the API (monolith :5000, frontend :5003)
+    python benchmarks/datagen.py --users 50 --tasks 2000 --activity 2000 --api http://localhost:5003
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, create_engine, func, select
+from client import Client
+
+BATCH_SIZE = 5000
+
+STATUSES = ('pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'high')
+ACTIONS = ('created', 'updated', 'assigned', 'status_changed')
+VERBS = ('Review', 'Fix', 'Write', 'Deploy', 'Refactor', 'Test', 'Document', 'Plan', 'Migrate', 'Benchmark')
+NOUNS = ('login page', 'billing report', 'API client', 'release notes', 'search index',
+         'database schema', 'onboarding flow', 'CSV export', 'dashboard', 'notification emails')
+
+def generate_users(rng, count, start_id=1):
+    """Return user rows with ids start_id .. start_id + count - 1."""
+    now = datetime.utcnow()
+    return [{
+        'id': user_id,
+        'username': f'user{user_id:06d}',
+        'email': f'user{user_id:06d}@example.com',
+        'created_at': now - timedelta(days=rng.randint(0, 365)),
+    } for user_id in range(start_id, start_id + count)]
+
+def generate_tasks(rng, count, user_ids, start_id=1):
+    """Return task rows; 10% are unassigned and 20% have no due date."""
+    now = datetime.utcnow()
+    rows = []
+    for task_id in range(start_id, start_id + count):
+        created_at = now - timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 1439))
+        due_date = None
+        if rng.random() >= 0.2:
+            due_date = now + timedelta(days=rng.randint(-30, 60), hours=rng.randint(0, 23))
+        rows.append({
+            'id': task_id,
+            'title': f'{rng.choice(VERBS)} {rng.choice(NOUNS)} #{task_id}',
+            'description': f'Generated task {task_id} for benchmarking.',
+            'status': rng.choice(STATUSES),
+            'priority': rng.choice(PRIORITIES),
+            'due_date': due_date,
+            'created_at': created_at,
+            'updated_at': created_at + timedelta(hours=rng.randint(0, 72)),
+            'assigned_to': rng.choice(user_ids) if user_ids and rng.random() >= 0.1 else None,
+            'created_by': rng.choice(user_ids) if user_ids else None,
+        })
+    return rows
+
+def generate_activity(rng, count, task_ids, user_ids):
+    """Return activity log rows spread over the given tasks."""
+    now = datetime.utcnow()
+    rows = []
+    for _ in range(count):
+        action = rng.choice(ACTIONS)
+        task_id = rng.choice(task_ids)
+        rows.append({
+            'task_id': task_id,
+            'action': action,
+            'description': f'Task {task_id} {action.replace("_", " ")}',
+            'user_id': rng.choice(user_ids) if user_ids else None,
+            'created_at': now - timedelta(days=rng.randint(0, 180), seconds=rng.randint(0, 86399)),
+        })
+    return rows
+
+def _next_id(conn, table):
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def _insert(conn, table, rows):
+    for i in range(0, len(rows), BATCH_SIZE):
+        conn.execute(table.insert(), rows[i:i + BATCH_SIZE])
+
+def _reflect(engine, names):
+    metadata = MetaData()
+    metadata.reflect(engine, only=names)
+    return [metadata.tables[name] for name in names]
+
+def seed_database(users, tasks, activity, seed=42, database_url=None,
+                  user_database_url=None, task_database_url=None):
+    """Bulk-insert generated rows; returns (user_ids, task_ids).
+    Pass database_url for the monolith, or both service URLs for the microservices."""
+    rng = random.Random(seed)
+    user_engine = create_engine(user_database_url or database_url)
+    task_engine = create_engine(task_database_url or database_url)
+    try:
+        (users_table,) = _reflect(user_engine, ['users'])
+        tasks_table, activity_table = _reflect(task_engine, ['tasks', 'activity_logs'])
+        
+        with user_engine.begin() as conn:
+            user_rows = generate_users(rng, users, _next_id(conn, users_table))
+            _insert(conn, users_table, user_rows)
+        user_ids = [row['id'] for row in user_rows]
+        
+        with task_engine.begin() as conn:
+            task_rows = generate_tasks(rng, tasks, user_ids, _next_id(conn, tasks_table))
+            _insert(conn, tasks_table, task_rows)
+            task_ids = [row['id'] for row in task_rows]
+            if task_ids:
+                _insert(conn, activity_table, generate_activity(rng, activity, task_ids, user_ids))
+        return user_ids, task_ids
+    finally:
+        user_engine.dispose()
+        task_engine.dispose()
+
+def seed_api(base_url, users, tasks, activity, seed=42, concurrency=8):
+    """Create rows through the public API; returns (user_ids, task_ids).
+    Task creation logs activity itself; `activity` extra status updates add more."""
+    rng = random.Random(seed)
+    suffix = f'{seed}_{int(time.time())}'
+    
+    def run(calls):
+        def worker(chunk):
+            client = Client(base_url)
+            try:
+                return [call(client) for call in chunk]
+            finally:
+                client.close()
+        chunks = [calls[i::concurrency] for i in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return [result for results in pool.map(worker, chunks) for result in results]
+    
+    user_ids = run([
+        lambda client, i=i: client.post_json('/api/users', {
+            'username': f'bench_{suffix}_{i}',
+            'email': f'bench_{suffix}_{i}@example.com',
+        })['id']
+        for i in range(users)
+    ])
+    
+    task_rows = generate_tasks(rng, tasks, user_ids)
+    task_ids = run([
+        lambda client, row=row: client.post_json('/api/tasks', {
+            'title': row['title'],
+            'description': row['description'],
+            'priority': row['priority'],
+            'due_date': row['due_date'].isoformat() if row['due_date'] else None,
+            'assigned_to': row['assigned_to'],
+            'created_by': row['created_by'],
+        })['id']
+        for row in task_rows
+    ])
+    
+    if task_ids:
+        run([
+            lambda client, task_id=rng.choice(task_ids), status=rng.choice(STATUSES):
+                client.put_json(f'/api/tasks/{task_id}', {'status': status})
+            for _ in range(activity)
+        ])
+    return user_ids, task_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--activity', type=int, default=30000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='monolith database')
+    parser.add_argument('--user-database-url', help='User Service database')
+    parser.add_argument('--task-database-url', help='Task Service database')
+    parser.add_argument('--api', help='seed through the HTTP API at this base URL instead')
+    parser.add_argument('--concurrency', type=int, default=8, help='parallel API requests')
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    if args.api:
+        user_ids, task_ids = seed_api(args.api, args.users, args.tasks, args.activity,
+                                      args.seed, args.concurrency)
+    elif args.database_url or (args.user_database_url and args.task_database_url):
+        user_ids, task_ids = seed_database(args.users, args.tasks, args.activity, args.seed,
+                                           args.database_url, args.user_database_url,
+                                           args.task_database_url)
+    else:
+        parser.error('give --database-url, both service database URLs, or --api')
+    print(f'Seeded {len(user_ids)} users, {len(task_ids)} tasks and {args.activity} activity entries '
+          f'in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
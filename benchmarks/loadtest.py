@@ -0,0 +1,206 @@
+"""
+Load test for the monolith and the microservices.
+
+Runs each scenario in scenarios.py (dashboard, list, create_update, csv_export,
+assign) from several client processes for a fixed time and reports throughput
+and latency percentiles. The monolith (:5000) and the frontend service (:5003)
+serve the same routes, so the two architectures can be compared directly.
+Results can be saved as JSON and compared later to catch regressions.
+
+Usage (from the repository root):
+    # start a throwaway monolith under gunicorn, seed it and run every scenario
+    python benchmarks/loadtest.py --start-monolith --users 200 --tasks 20000 --activity 50000
+
+    # an already running deployment (seed it first with datagen.py)
+    python benchmarks/loadtest.py --target http://localhost:5000 --label monolith --json monolith.json
+    python benchmarks/loadtest.py --target http://localhost:5003 --label microservices --json micro.json
+
+    # side-by-side comparison; exit 1 if p50 of the second is >20% worse than the first
+    python benchmarks/loadtest.py --compare monolith.json micro.json --fail-over 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from client import Client, RequestFailed
+from datagen import seed_database
+from scenarios import SCENARIOS, Context
+from worker_scaling import SELECTED_DIR, init_database, wait_for_server
+
+def client_loop(target, name, user_ids, task_ids, seed, duration, results):
+    """Run one scenario repeatedly until the duration elapses."""
+    client = Client(target)
+    ctx = Context(user_ids, task_ids, seed)
+    action = SCENARIOS[name]
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            action(client, ctx)
+            latencies.append(time.perf_counter() - start)
+        except (RequestFailed, ValueError, KeyError):
+            errors += 1
+    client.close()
+    results.put((latencies, errors))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_scenario(target, name, user_ids, task_ids, args):
+    """Drive one scenario from args.clients processes and summarise the run."""
+    results = multiprocessing.Queue()
+    clients = [
+        multiprocessing.Process(target=client_loop,
+                                args=(target, name, user_ids, task_ids, args.seed + i, args.duration, results))
+        for i in range(args.clients)
+    ]
+    for client in clients:
+        client.start()
+    totals = [results.get() for _ in clients]
+    for client in clients:
+        client.join()
+    
+    latencies = sorted(latency for batch, _ in totals for latency in batch)
+    return {
+        'iterations': len(latencies),
+        'errors': sum(errors for _, errors in totals),
+        'per_second': len(latencies) / args.duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+def discover_ids(target):
+    """Read the user and task ids the scenarios can use from the target."""
+    client = Client(target, timeout=300)
+    try:
+        user_ids = [user['id'] for user in client.get_json('/api/users')]
+        task_ids = [task['id'] for task in client.get_json('/api/tasks')]
+    finally:
+        client.close()
+    return user_ids, task_ids
+
+def print_report(report):
+    print(f'{report["label"]}: {report["target"]} clients={report["clients"]} '
+          f'duration={report["duration"]}s users={report["users"]} tasks={report["tasks"]}')
+    print(f'{"scenario":<14} {"ops/s":>9} {"p50 ms":>9} {"p90 ms":>9} {"p99 ms":>9} {"max ms":>9} {"errors":>7}')
+    for name, result in report['results'].items():
+        print(f'{name:<14} {result["per_second"]:>9.1f} {result["p50_ms"]:>9.1f} {result["p90_ms"]:>9.1f} '
+              f'{result["p99_ms"]:>9.1f} {result["max_ms"]:>9.1f} {result["errors"]:>7}')
+
+def compare(baseline_path, candidate_path, fail_over=None):
+    """Print two saved reports side by side; return 1 if p50 regressed past fail_over percent."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    print(f'{"scenario":<14} {baseline["label"] + " p50":>18} {candidate["label"] + " p50":>18} '
+          f'{"change":>8} {baseline["label"] + " ops/s":>18} {candidate["label"] + " ops/s":>18}')
+    status = 0
+    for name, before in baseline['results'].items():
+        after = candidate['results'].get(name)
+        if after is None:
+            continue
+        change = (after['p50_ms'] / before['p50_ms'] - 1) * 100 if before['p50_ms'] else 0.0
+        print(f'{name:<14} {before["p50_ms"]:>18.1f} {after["p50_ms"]:>18.1f} {change:>+7.0f}% '
+              f'{before["per_second"]:>18.1f} {after["per_second"]:>18.1f}')
+        if fail_over is not None and change > fail_over:
+            status = 1
+    return status
+
+def start_monolith(args):
+    """Start the monolith under gunicorn on a fresh SQLite file and seed it."""
+    db_path = os.path.join(tempfile.mkdtemp(prefix='loadtest_'), 'bench.db')
+    env = dict(
+        os.environ,
+        GUNICORN_BIND=f'127.0.0.1:{args.port}',
+        GUNICORN_ACCESS_LOG='',
+        DATABASE_URL=f'sqlite:///{db_path}',
+    )
+    init_database(env)
+    # Seed before the workers start, so nothing they cache predates the data
+    seed_database(args.users, args.tasks, args.activity, args.seed, database_url=f'sqlite:///{db_path}')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=SELECTED_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    if not wait_for_server('127.0.0.1', args.port):
+        server.terminate()
+        raise RuntimeError('gunicorn did not start')
+    return server, f'http://127.0.0.1:{args.port}'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='http://localhost:5000', help='base URL to load')
+    parser.add_argument('--label', help='name for this run (default: the target)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'comma-separated subset of {", ".join(SCENARIOS)}')
+    parser.add_argument('--clients', type=int, default=multiprocessing.cpu_count() * 2,
+                        help='number of client processes generating load')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per scenario')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--start-monolith', action='store_true',
+                        help='run against a fresh, seeded monolith started by this script')
+    parser.add_argument('--port', type=int, default=8765, help='port for --start-monolith')
+    parser.add_argument('--users', type=int, default=100, help='users to seed with --start-monolith')
+    parser.add_argument('--tasks', type=int, default=10000, help='tasks to seed with --start-monolith')
+    parser.add_argument('--activity', type=int, default=30000, help='activity entries to seed with --start-monolith')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help='compare two saved reports instead of running')
+    parser.add_argument('--fail-over', type=float, help='with --compare, exit 1 if p50 grew by more than this percent')
+    args = parser.parse_args()
+    
+    if args.compare:
+        sys.exit(compare(*args.compare, fail_over=args.fail_over))
+    
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenario(s): {", ".join(unknown)}')
+    
+    server = None
+    target = args.target
+    if args.start_monolith:
+        server, target = start_monolith(args)
+    try:
+        user_ids, task_ids = discover_ids(target)
+        if not task_ids:
+            parser.error('the target has no tasks; seed it with benchmarks/datagen.py first')
+        report = {
+            'label': args.label or ('monolith' if args.start_monolith else target),
+            'target': target,
+            'timestamp': datetime.utcnow().isoformat(),
+            'clients': args.clients,
+            'duration': args.duration,
+            'users': len(user_ids),
+            'tasks': len(task_ids),
+            'results': {},
+        }
+        for name in names:
+            report['results'][name] = run_scenario(target, name, user_ids, task_ids, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+    
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Scripted scenarios for loadtest.py.
+
+Each scenario is one user action, possibly several HTTP requests; its latency
+is measured for the whole action. The monolith and the frontend service expose
+the same routes, so every scenario runs unchanged against either architecture.
+"""
+import random
+
+SCENARIOS = {}
+
+class Context:
+    """Ids a scenario can pick from, plus a per-client random generator."""
+    
+    def __init__(self, user_ids, task_ids, seed):
+        self.user_ids = user_ids
+        self.task_ids = task_ids
+        self.rng = random.Random(seed)
+    
+    def task_id(self):
+        return self.rng.choice(self.task_ids)
+    
+    def user_id(self):
+        return self.rng.choice(self.user_ids) if self.user_ids else None
+
+def scenario(name):
+    """Register a scenario function(client, ctx) under name."""
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+@scenario('dashboard')
+def dashboard(client, ctx):
+    """Render the dashboard page."""
+    client.get('/')
+
+@scenario('list')
+def list_tasks(client, ctx):
+    """Fetch the full task list as JSON."""
+    client.get('/api/tasks')
+
+@scenario('create_update')
+def create_update(client, ctx):
+    """Create a task and move it through in_progress to completed."""
+    task = client.post_json('/api/tasks', {
+        'title': f'Load test task {ctx.rng.randint(0, 10**9)}',
+        'description': 'Created by benchmarks/loadtest.py',
+        'priority': ctx.rng.choice(('low', 'medium', 'high')),
+        'assigned_to': ctx.user_id(),
+    })
+    client.put_json(f'/api/tasks/{task["id"]}', {'status': 'in_progress'})
+    client.put_json(f'/api/tasks/{task["id"]}', {'status': 'completed'})
+
+@scenario('csv_export')
+def csv_export(client, ctx):
+    """Download the full CSV export."""
+    client.get('/export/csv')
+
+@scenario('assign')
+def assign(client, ctx):
+    """Reassign a random existing task to a random user."""
+    client.post_json(f'/api/tasks/{ctx.task_id()}/assign', {'user_id': ctx.user_id()})
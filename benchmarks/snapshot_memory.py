@@ -0,0 +1,101 @@
+"""
+Memory and time per task: Task ORM objects versus the in-memory task snapshot.
+
+Seeds a throwaway SQLite database, then loads every task twice inside the
+monolith: once as Task instances (what the dashboard and calendar used to do)
+and once into the column-oriented TaskSnapshot. Reports traced allocations per
+task, load time and the time to compute the dashboard counts per request
+(ORM: load and count; snapshot: freshness check and count).
+
+Usage (from the repository root):
+    python benchmarks/snapshot_memory.py
+    python benchmarks/snapshot_memory.py --tasks 100000 --users 500
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datagen import seed_database
+from worker_scaling import SELECTED_DIR
+
+def measure(load):
+    """Return (result, bytes it keeps allocated, seconds).
+    Timed on a separate untraced run, since tracemalloc slows allocation down."""
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, allocated, elapsed
+
+def timed(func, repeat=5):
+    """Best of repeat runs, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    database_url = f'sqlite:///{os.path.join(tempfile.mkdtemp(prefix="snapshot_"), "bench.db")}'
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SLOW_QUERY_THRESHOLD_MS'] = '0'
+    sys.path.insert(0, SELECTED_DIR)
+    from app import create_app
+    from config import Config
+    from database.repositories import TaskRepository
+    from database.snapshot import TaskSnapshot
+    from models import db
+    
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+    seed_database(args.users, args.tasks, 0, args.seed, database_url=database_url)
+    
+    def orm_load():
+        db.session.remove()
+        return TaskRepository.get_all()
+    
+    def orm_counts():
+        counts = Counter(task.status for task in TaskRepository.get_all())
+        db.session.remove()
+        return counts
+    
+    def load_snapshot():
+        snapshot = TaskSnapshot()
+        snapshot.refresh()
+        return snapshot
+    
+    with app.app_context():
+        tasks, orm_bytes, orm_seconds = measure(orm_load)
+        count = len(tasks)
+        del tasks
+        db.session.remove()
+        orm_stats_ms = timed(orm_counts)
+        
+        snapshot, snapshot_bytes, snapshot_seconds = measure(load_snapshot)
+        snapshot_stats_ms = timed(snapshot.count_by_status)
+    
+    print(f'{count} tasks')
+    print(f'{"":<16} {"bytes/task":>11} {"load s":>8} {"stats ms":>9}')
+    print(f'{"ORM objects":<16} {orm_bytes / count:>11.0f} {orm_seconds:>8.2f} {orm_stats_ms:>9.1f}')
+    print(f'{"task snapshot":<16} {snapshot_bytes / count:>11.0f} {snapshot_seconds:>8.2f} {snapshot_stats_ms:>9.1f}')
+    print(f'snapshot.memory_bytes(): {snapshot.memory_bytes() / count:.0f} bytes/task')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Load test showing how requests/sec scales with gunicorn worker count.
+
+Starts the monolith under gunicorn with 1, 2, ... N workers (N defaults to the
+number of cores), drives it from several client processes and prints a
+requests/sec table.
+
+Usage (from the repository root):
+    python benchmarks/worker_scaling.py
+    python benchmarks/worker_scaling.py --max-workers 8 --duration 15 --path /api/tasks
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SELECTED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Selected')
+
+def init_database(env):
+    """Create the monolith's tables in env's DATABASE_URL, as a deploy would."""
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+                   cwd=SELECTED_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+def wait_for_server(host, port, timeout=20):
+    """Block until the server answers or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request('GET', '/api/tasks')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def client_loop(host, port, path, duration, results):
+    """Issue keep-alive GET requests until the duration elapses."""
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    completed = 0
+    errors = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                completed += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.close()
+    results.put((completed, errors))
+
+def run_level(workers, args):
+    """Run one load level against a fresh gunicorn and return requests/sec."""
+    db_dir = tempfile.mkdtemp(prefix='worker_scaling_')
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_BIND=f'{args.host}:{args.port}',
+        GUNICORN_ACCESS_LOG='',
+        DATABASE_URL=f'sqlite:///{os.path.join(db_dir, "bench.db")}',
+    )
+    init_database(env)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=SELECTED_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_server(args.host, args.port):
+            raise RuntimeError(f'gunicorn with {workers} worker(s) did not start')
+        
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_loop,
+                                    args=(args.host, args.port, args.path, args.duration, results))
+            for _ in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        totals = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+        
+        completed = sum(t[0] for t in totals)
+        errors = sum(t[1] for t in totals)
+        return completed / args.duration, errors
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--clients', type=int, default=multiprocessing.cpu_count() * 2,
+                        help='number of client processes generating load')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per level')
+    parser.add_argument('--path', default='/api/tasks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    
+    print(f'cores={multiprocessing.cpu_count()} clients={args.clients} '
+          f'threads/worker={args.threads} path={args.path}')
+    print(f'{"workers":>8} {"req/s":>10} {"speedup":>8} {"errors":>7}')
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        rps, errors = run_level(workers, args)
+        baseline = baseline or rps
+        print(f'{workers:>8} {rps:>10.1f} {rps / baseline:>7.2f}x {errors:>7}')
+
+if __name__ == '__main__':
+    main()